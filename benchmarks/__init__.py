@@ -0,0 +1,5 @@
+"""Performance benchmarks for zyte-parsers.
+
+Run ``python -m benchmarks --help`` from the root of the repository for
+usage.
+"""
@@ -0,0 +1,144 @@
+"""Command-line interface of the benchmark suite.
+
+Examples::
+
+    python -m benchmarks list
+    python -m benchmarks run --output baseline.json
+    python -m benchmarks run -k breadcrumbs --baseline baseline.json
+    python -m benchmarks compare baseline.json current.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Any
+
+from .cases import CASES
+from .runner import compare, environment, format_table, measure
+
+
+def _selected_cases(patterns: list[str]) -> list[str]:
+    if not patterns:
+        return list(CASES)
+    return [
+        name
+        for name in CASES
+        if any(pattern in name or fnmatch(name, pattern) for pattern in patterns)
+    ]
+
+
+def _load(path: str) -> dict[str, Any]:
+    data: dict[str, Any] = json.loads(Path(path).read_text(encoding="utf8"))
+    return data
+
+
+def _print_comparison(
+    baseline: dict[str, Any], current: dict[str, Any], threshold: float
+) -> int:
+    rows, regressions = compare(baseline, current, threshold=threshold)
+    print(format_table(["case", "metric", "baseline", "current", "change"], rows))
+    if regressions:
+        print(
+            f"\n{len(regressions)} case(s) slower by more than {threshold:.0%}: "
+            + ", ".join(regressions)
+        )
+        return 1
+    return 0
+
+
+def _run(args: argparse.Namespace) -> int:
+    names = _selected_cases(args.k)
+    if not names:
+        print("No benchmark case matches the given patterns.", file=sys.stderr)
+        return 2
+    results: dict[str, Any] = {"environment": environment(), "cases": {}}
+    header = ["case", "ops/sec", "p50 (µs)", "p99 (µs)", "peak (KiB)"]
+    rows = []
+    for name in names:
+        metrics = measure(CASES[name](), min_time=args.min_time)
+        results["cases"][name] = metrics
+        row = [
+            name,
+            f"{metrics['ops_per_sec']:.1f}",
+            f"{metrics['p50_us']:.1f}",
+            f"{metrics['p99_us']:.1f}",
+            f"{metrics['peak_memory_kib']:.1f}",
+        ]
+        rows.append(row)
+        print("  ".join(row), file=sys.stderr)
+    print(format_table(header, rows))
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2) + "\n", "utf8")
+    if args.baseline:
+        print()
+        return _print_comparison(_load(args.baseline), results, args.threshold)
+    return 0
+
+
+def _compare(args: argparse.Namespace) -> int:
+    return _print_comparison(_load(args.baseline), _load(args.current), args.threshold)
+
+
+def _list(args: argparse.Namespace) -> int:
+    for name in _selected_cases(args.k):
+        print(name)
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    subparsers = parser.add_subparsers(required=True)
+
+    threshold_kwargs: dict[str, Any] = {
+        "type": float,
+        "default": 0.1,
+        "help": (
+            "fraction by which a timing metric may get worse before the case "
+            "is reported as a regression (default: %(default)s)"
+        ),
+    }
+    filter_kwargs: dict[str, Any] = {
+        "action": "append",
+        "default": [],
+        "metavar": "PATTERN",
+        "help": "only use cases whose name contains or matches PATTERN",
+    }
+
+    run_parser = subparsers.add_parser("run", help="run benchmark cases")
+    run_parser.set_defaults(func=_run)
+    run_parser.add_argument("-k", **filter_kwargs)
+    run_parser.add_argument(
+        "--min-time",
+        type=float,
+        default=0.5,
+        help="minimum seconds to spend on each case (default: %(default)s)",
+    )
+    run_parser.add_argument("-o", "--output", help="save results to a JSON file")
+    run_parser.add_argument(
+        "--baseline", help="compare results to a JSON file saved with --output"
+    )
+    run_parser.add_argument("--threshold", **threshold_kwargs)
+
+    compare_parser = subparsers.add_parser(
+        "compare", help="compare two JSON files saved with run --output"
+    )
+    compare_parser.set_defaults(func=_compare)
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", **threshold_kwargs)
+
+    list_parser = subparsers.add_parser("list", help="list benchmark cases")
+    list_parser.set_defaults(func=_list)
+    list_parser.add_argument("-k", **filter_kwargs)
+
+    args = parser.parse_args(argv)
+    result: int = args.func(args)
+    return result
+
+
+if __name__ == "__main__":
+    sys.exit(main())
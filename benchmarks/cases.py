@@ -0,0 +1,531 @@
+"""Benchmark cases.
+
+A case is a function that prepares its inputs and returns a list of
+zero-argument callables. Each callable is one operation: the runner times
+every call separately.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import gzip
+import io
+import json
+import pickle
+import subprocess
+import sys
+import threading
+from collections import deque
+from collections.abc import Awaitable, Callable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from multiprocessing import get_context
+from time import monotonic
+
+from lxml.html import HtmlElement, document_fromstring, fromstring, tostring
+
+from zyte_parsers import (
+    AggregateRating,
+    Breadcrumb,
+    Budget,
+    FragmentCache,
+    Gtin,
+    PageFields,
+    PriceCache,
+    SiteProfile,
+    aio,
+    extract_brand_name,
+    extract_breadcrumbs,
+    extract_gtin,
+    extract_page,
+    extract_price,
+    extract_rating,
+    extract_rating_stars,
+    extract_review_count,
+    text_cache,
+)
+from zyte_parsers.batch import run, run_threaded
+from zyte_parsers.fields import FIELD_EXTRACTORS
+from zyte_parsers.gtin import extract_gtin_many
+from zyte_parsers.incremental import IncrementalExtractor
+from zyte_parsers.readers import read_jsonl, read_warc
+from zyte_parsers.utils import extract_text
+
+from . import corpus
+
+Operation = Callable[[], object]
+Case = Callable[[], list[Operation]]
+
+CASES: dict[str, Case] = {}
+
+
+def case(name: str) -> Callable[[Case], Case]:
+    """Register a benchmark case under the given name."""
+
+    def decorator(func: Case) -> Case:
+        if name in CASES:
+            raise ValueError(f"Duplicate benchmark case: {name!r}")
+        CASES[name] = func
+        return func
+
+    return decorator
+
+
+def _register_parametrized(
+    template: str, values: list[int], factory: Callable[[int], list[Operation]]
+) -> None:
+    for value in values:
+        case(template.format(value))(partial(factory, value))
+
+
+@case("breadcrumbs/recorded")
+def _breadcrumbs_recorded() -> list[Operation]:
+    return [
+        partial(extract_breadcrumbs, node, base_url=base_url)
+        for node, base_url in corpus.recorded_breadcrumbs()
+    ]
+
+
+def _breadcrumbs_depth(depth: int) -> list[Operation]:
+    node = corpus.synthetic_breadcrumbs(depth)
+    return [partial(extract_breadcrumbs, node, base_url="http://example.com")]
+
+
+def _breadcrumbs_nested(depth: int) -> list[Operation]:
+    node = corpus.synthetic_breadcrumbs(depth, nested=True)
+    return [partial(extract_breadcrumbs, node, base_url="http://example.com")]
+
+
+def _breadcrumbs_menu(levels: int) -> list[Operation]:
+    node = corpus.synthetic_menu(levels, fanout=4)
+    return [partial(extract_breadcrumbs, node, base_url="http://example.com")]
+
+
+# With a cache that has the results of all the inputs (hits), and with one
+# that keeps none (misses, i.e. the overhead of computing the keys).
+def _breadcrumbs_recorded_cache(maxsize: int) -> list[Operation]:
+    cache = FragmentCache(maxsize=maxsize)
+    return [
+        partial(extract_breadcrumbs, node, base_url=base_url, cache=cache)
+        for node, base_url in corpus.recorded_breadcrumbs()
+    ]
+
+
+case("breadcrumbs/recorded-cache-hits")(partial(_breadcrumbs_recorded_cache, 10_000))
+case("breadcrumbs/recorded-cache-misses")(partial(_breadcrumbs_recorded_cache, 0))
+
+
+_register_parametrized("breadcrumbs/depth-{}", [5, 20, 100], _breadcrumbs_depth)
+_register_parametrized("breadcrumbs/nested-{}", [5, 20, 100], _breadcrumbs_nested)
+_register_parametrized("breadcrumbs/menu-levels-{}", [3, 5], _breadcrumbs_menu)
+
+
+@case("rating/recorded")
+def _rating_recorded() -> list[Operation]:
+    return [partial(extract_rating, node) for node in corpus.recorded_ratings()]
+
+
+@case("review_count/recorded")
+def _review_count_recorded() -> list[Operation]:
+    return [partial(extract_review_count, node) for node in corpus.recorded_ratings()]
+
+
+@case("rating_and_review_count/recorded")
+def _rating_and_review_count_recorded() -> list[Operation]:
+    """Both extractors on the same nodes, which share their text and
+    numbers."""
+
+    def extract(node: HtmlElement) -> tuple[object, object]:
+        with text_cache():
+            return extract_rating(node), extract_review_count(node)
+
+    return [partial(extract, node) for node in corpus.recorded_ratings()]
+
+
+@case("rating_stars/recorded")
+def _rating_stars_recorded() -> list[Operation]:
+    return [
+        partial(extract_rating_stars, node) for node in corpus.recorded_rating_parents()
+    ]
+
+
+def _rating_stars_elements(n_elements: int) -> list[Operation]:
+    return [partial(extract_rating_stars, corpus.synthetic_stars(n_elements))]
+
+
+_register_parametrized(
+    "rating_stars/elements-{}", [10, 100, 1000], _rating_stars_elements
+)
+
+
+# A product block with a star widget followed by the product description,
+# with and without a profile that already knows the strategy that works for
+# the website.
+def _rating_stars_product(n_paragraphs: int, profile: bool) -> list[Operation]:
+    stars = tostring(corpus.synthetic_stars(10), encoding="unicode")
+    node = fromstring(f"<div>{stars}{'<p>Description</p>' * n_paragraphs}</div>")
+    if not profile:
+        return [partial(extract_rating_stars, node)]
+    site_profile = SiteProfile()
+    extract_rating_stars(node, profile=site_profile)
+    return [partial(extract_rating_stars, node, profile=site_profile)]
+
+
+for _n_paragraphs in (10, 100, 1000):
+    for _profile in (False, True):
+        case(f"rating_stars/product-{_n_paragraphs}{'-profile' if _profile else ''}")(
+            partial(_rating_stars_product, _n_paragraphs, _profile)
+        )
+
+
+@case("brand/recorded")
+def _brand_recorded() -> list[Operation]:
+    return [partial(extract_brand_name, node) for node in corpus.recorded_brands()]
+
+
+def _text_size(size: int) -> list[Operation]:
+    return [partial(extract_text, corpus.synthetic_text(size))]
+
+
+_register_parametrized("text/size-{}", [100, 10_000, 1_000_000], _text_size)
+
+
+@case("price/synthetic")
+def _price_synthetic() -> list[Operation]:
+    return [partial(extract_price, text) for text in corpus.synthetic_prices(1000, 50)]
+
+
+@case("price/synthetic-cache")
+def _price_synthetic_cache() -> list[Operation]:
+    cache = PriceCache()
+    return [
+        partial(extract_price, text, cache=cache)
+        for text in corpus.synthetic_prices(1000, 50)
+    ]
+
+
+def _gtin_valid_percent(percent: int) -> list[Operation]:
+    return [
+        partial(extract_gtin, text)
+        for text in corpus.synthetic_gtins(1000, valid_ratio=percent / 100)
+    ]
+
+
+_register_parametrized("gtin/valid-{}pct", [0, 50, 100], _gtin_valid_percent)
+
+
+@case("gtin/many-10000")
+def _gtin_many() -> list[Operation]:
+    return [partial(extract_gtin_many, corpus.synthetic_gtins(10_000))]
+
+
+@case("batch/price-10000")
+def _batch_price() -> list[Operation]:
+    return [partial(run, extract_price, corpus.synthetic_prices(10_000, 500))]
+
+
+@case("batch/rating-recorded")
+def _batch_rating() -> list[Operation]:
+    return [partial(run, extract_rating, corpus.recorded_ratings())]
+
+
+# Scaling of run_threaded() with the number of threads. Threads only run
+# in parallel on free-threaded builds of Python.
+def _batch_threaded_rating(max_workers: int) -> list[Operation]:
+    nodes = [node for _ in range(10) for node in corpus.recorded_ratings()]
+    return [partial(run_threaded, extract_rating, nodes, max_workers=max_workers)]
+
+
+def _batch_threaded_pages(max_workers: int) -> list[Operation]:
+    pages = [
+        document_fromstring(corpus.synthetic_category_page(100)) for _ in range(32)
+    ]
+    return [
+        partial(
+            run_threaded, extract_page, pages, base_url=None, max_workers=max_workers
+        )
+    ]
+
+
+_register_parametrized("batch/threaded-rating-{}", [1, 2, 4, 8], _batch_threaded_rating)
+_register_parametrized("batch/threaded-pages-{}", [1, 2, 4, 8], _batch_threaded_pages)
+
+
+_PAGE_FIELDS = {
+    "breadcrumbs": "nav.breadcrumbs",
+    "price": ".price",
+    "aggregateRating": ".rating",
+}
+
+
+def _page_full(n_products: int) -> list[Operation]:
+    page = corpus.synthetic_category_page(n_products)
+
+    def extract() -> dict[str, object]:
+        root = document_fromstring(page)
+        return {
+            name: FIELD_EXTRACTORS[name](root.cssselect(selector)[0], None)
+            for name, selector in _PAGE_FIELDS.items()
+        }
+
+    return [extract]
+
+
+def _page_incremental(n_products: int) -> list[Operation]:
+    page = corpus.synthetic_category_page(n_products)
+    chunks = [page[i : i + 65536] for i in range(0, len(page), 65536)]
+
+    def extract() -> dict[str, object]:
+        extractor = IncrementalExtractor(_PAGE_FIELDS)
+        for chunk in chunks:
+            extractor.feed(chunk)
+        return extractor.close()
+
+    return [extract]
+
+
+def _page_extract_page(n_products: int) -> list[Operation]:
+    page = corpus.synthetic_category_page(n_products)
+
+    def extract() -> PageFields:
+        return extract_page(document_fromstring(page), None)
+
+    return [extract]
+
+
+# The fields of the synthetic category page, as JSON-LD.
+_PAGE_JSON_LD = json.dumps(
+    [
+        {
+            "@type": "BreadcrumbList",
+            "itemListElement": [
+                {"@type": "ListItem", "position": i + 1, "name": f"Level {i}"}
+                for i in range(5)
+            ],
+        },
+        {
+            "@type": "Product",
+            "aggregateRating": {"@type": "AggregateRating", "ratingValue": "4.0"},
+        },
+    ]
+)
+
+
+def _page_extract_page_json_ld(n_products: int) -> list[Operation]:
+    page = corpus.synthetic_category_page(n_products).replace(
+        b"</head>",
+        f'<script type="application/ld+json">{_PAGE_JSON_LD}</script></head>'.encode(),
+    )
+
+    def extract() -> PageFields:
+        return extract_page(document_fromstring(page), None)
+
+    return [extract]
+
+
+_register_parametrized("page/full-{}", [100, 10_000], _page_full)
+_register_parametrized("page/extract_page-{}", [100, 10_000], _page_extract_page)
+_register_parametrized(
+    "page/extract_page-json-ld-{}", [100, 10_000], _page_extract_page_json_ld
+)
+_register_parametrized("page/incremental-{}", [100, 10_000], _page_incremental)
+
+
+def _warc_record(url: str, page: bytes) -> bytes:
+    block = b"HTTP/1.1 200 OK\r\nContent-Type: text/html\r\n\r\n" + page
+    headers = (
+        f"WARC/1.1\r\nWARC-Type: response\r\nWARC-Target-URI: {url}\r\n"
+        "Content-Type: application/http; msgtype=response\r\n"
+        f"Content-Length: {len(block)}\r\n\r\n"
+    )
+    return gzip.compress(headers.encode() + block + b"\r\n\r\n")
+
+
+def _readers_warc(n_pages: int) -> list[Operation]:
+    """Read a .warc.gz file with a record per page, without extracting."""
+    page = corpus.synthetic_category_page(10)
+    data = b"".join(
+        _warc_record(f"https://example.com/c/{i}", page) for i in range(n_pages)
+    )
+    return [lambda: deque(read_warc(io.BytesIO(data)), maxlen=0)]
+
+
+def _readers_jsonl(n_pages: int) -> list[Operation]:
+    """Read a .jsonl.gz file with a record per page, without extracting."""
+    html = corpus.synthetic_category_page(10).decode()
+    data = gzip.compress(
+        "".join(
+            json.dumps({"url": f"https://example.com/c/{i}", "html": html}) + "\n"
+            for i in range(n_pages)
+        ).encode()
+    )
+    return [lambda: deque(read_jsonl(io.BytesIO(data)), maxlen=0)]
+
+
+_register_parametrized("readers/warc-gzip-{}", [100, 1000], _readers_warc)
+_register_parametrized("readers/jsonl-gzip-{}", [100, 1000], _readers_jsonl)
+
+
+class _LoopLatency:
+    """An event loop, in a background thread, that extracts pages while it
+    is being probed.
+
+    A probe waits until the loop runs a no-op callback, so the time of each
+    probe is the latency of the loop. Extraction stops shortly after the
+    last probe, so that it does not slow down the cases that run later.
+    """
+
+    def __init__(
+        self, extract: Callable[[bytes], Awaitable[object]], *, concurrency: int = 4
+    ) -> None:
+        self._extract = extract
+        self._concurrency = concurrency
+        self._page = corpus.synthetic_category_page(1000)
+        self._deadline = 0.0
+        self._loading = False
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, daemon=True).start()
+
+    async def _load(self) -> None:
+        async def worker() -> None:
+            while monotonic() < self._deadline:
+                await self._extract(self._page)
+                await asyncio.sleep(0)
+
+        try:
+            await asyncio.gather(*(worker() for _ in range(self._concurrency)))
+        finally:
+            self._loading = False
+
+    def probe(self) -> None:
+        self._deadline = monotonic() + 0.2
+        if not self._loading:
+            self._loading = True
+            asyncio.run_coroutine_threadsafe(self._load(), self._loop)
+        asyncio.run_coroutine_threadsafe(asyncio.sleep(0), self._loop).result()
+
+
+async def _extract_page_inline(page: bytes) -> object:
+    return extract_page(document_fromstring(page), None)
+
+
+def _loop_latency(
+    extract: Callable[[bytes], Awaitable[object]] | None = None,
+) -> list[Operation]:
+    if extract is None:  # idle loop, for reference
+        loop_latency = _LoopLatency(_extract_page_inline, concurrency=0)
+    else:
+        loop_latency = _LoopLatency(extract)
+    return [loop_latency.probe]
+
+
+def _extract_page_offloaded(
+    executor: Callable[[], Executor],
+) -> Callable[[bytes], Awaitable[object]]:
+    offloader = aio.Offloader(executor(), max_concurrency=4)
+
+    async def extract(page: bytes) -> object:
+        return await offloader.run(aio._parse_and_extract_page, page, None)
+
+    return extract
+
+
+# Event loop latency while pages of 1000 products are extracted in it,
+# directly or through zyte_parsers.aio.
+case("aio/loop-latency-idle")(_loop_latency)
+case("aio/loop-latency-inline")(partial(_loop_latency, _extract_page_inline))
+case("aio/loop-latency-threads")(
+    lambda: _loop_latency(
+        _extract_page_offloaded(partial(ThreadPoolExecutor, max_workers=4))
+    )
+)
+case("aio/loop-latency-processes")(
+    lambda: _loop_latency(
+        _extract_page_offloaded(
+            # Forking a process with threads, e.g. those of the other cases,
+            # can deadlock.
+            partial(ProcessPoolExecutor, max_workers=4, mp_context=get_context("spawn"))
+        )
+    )
+)
+
+# A container passed by mistake instead of the node of a field: the whole
+# category page. With a budget, the time per call has an upper limit.
+_BUDGET_EXTRACTORS: dict[str, Callable[..., object]] = {
+    "rating_stars": extract_rating_stars,
+    "breadcrumbs": partial(extract_breadcrumbs, base_url=None),
+    "brand": partial(extract_brand_name, search_depth=10),
+}
+
+
+def _budget_container(
+    extractor: Callable[..., object], max_nodes: int
+) -> list[Operation]:
+    root = document_fromstring(corpus.synthetic_category_page(1000))
+    if not max_nodes:
+        return [partial(extractor, root)]
+    return [lambda: extractor(root, budget=Budget(max_nodes=max_nodes))]
+
+
+for _name, _extractor in _BUDGET_EXTRACTORS.items():
+    for _max_nodes in (0, 1000):
+        case(f"budget/{_name}-container-{_max_nodes or 'unlimited'}")(
+            partial(_budget_container, _extractor, _max_nodes)
+        )
+
+
+# Results of a big batch, to measure their memory usage: divide the peak
+# memory by the number of results to get bytes per result. Strings are
+# built for each result, as extractors do, and breadcrumbs repeat the same
+# 100 categories.
+_RESULT_FACTORIES: dict[str, Callable[[int], object]] = {
+    "breadcrumb": lambda i: Breadcrumb(
+        name=f"Category {i % 100}", url=f"https://example.com/c/{i % 100}"
+    ),
+    "gtin": lambda i: Gtin(f"gtin{13}", str(4006381333931 + i)),
+    "rating": lambda i: AggregateRating(bestRating=5.0, ratingValue=i % 50 / 10),
+}
+
+
+def _results(factory: Callable[[int], object], n: int) -> list[Operation]:
+    return [lambda: [factory(i) for i in range(n)]]
+
+
+for _name, _factory in _RESULT_FACTORIES.items():
+    case(f"results/{_name}-1000000")(partial(_results, _factory, 1_000_000))
+
+
+@case("results/pickle-breadcrumb-100000")
+def _results_pickle() -> list[Operation]:
+    """Round trip through pickle, as when sending results between processes."""
+    factory = _RESULT_FACTORIES["breadcrumb"]
+    results = [factory(i) for i in range(100_000)]
+
+    def round_trip() -> object:
+        return pickle.loads(pickle.dumps(results, pickle.HIGHEST_PROTOCOL))  # noqa: S301
+
+    return [round_trip]
+
+
+def _import(statement: str) -> list[Operation]:
+    """Run the statement in a new interpreter, to measure import time.
+
+    Compare with ``import/python``, the time to start the interpreter.
+    """
+    return [
+        partial(
+            subprocess.run,
+            [sys.executable, "-c", statement],
+            check=True,
+        )
+    ]
+
+
+for _name, _statement in {
+    "python": "pass",
+    "package": "import zyte_parsers",
+    "extract_gtin": "from zyte_parsers import extract_gtin",
+    "extract_price": "from zyte_parsers import extract_price",
+    "all": "from zyte_parsers import *",
+}.items():
+    case(f"import/{_name}")(partial(_import, _statement))
@@ -0,0 +1,180 @@
+"""Benchmark inputs: synthetic generators and recorded HTML fragments.
+
+Recorded fragments are the ones used by the tests, in ``tests/data``.
+Synthetic inputs are generated from a fixed seed, so that they are the
+same on every run.
+"""
+
+from __future__ import annotations
+
+import json
+import random
+from functools import cache
+from pathlib import Path
+from typing import Any
+
+from lxml.html import HtmlElement, fromstring, tostring
+
+TEST_DATA_ROOT = Path(__file__).parent.parent / "tests" / "data"
+
+
+def _rng(seed: int) -> random.Random:
+    return random.Random(seed)  # noqa: S311
+
+
+@cache
+def _load_json(name: str) -> list[dict[str, Any]]:
+    data: list[dict[str, Any]] = json.loads(
+        (TEST_DATA_ROOT / name).read_text(encoding="utf8")
+    )
+    return data
+
+
+def recorded_breadcrumbs() -> list[tuple[HtmlElement, str]]:
+    """Breadcrumb components with the base URL of their page."""
+    snippets_dir = TEST_DATA_ROOT / "breadcrumb_items_snippets"
+    return [
+        (
+            fromstring((snippets_dir / item["snippet_path"]).read_text("utf8")),
+            item["base_url"],
+        )
+        for item in _load_json("breadcrumb_items_extract.json")
+    ]
+
+
+def recorded_ratings() -> list[HtmlElement]:
+    """Rating value elements."""
+    return [fromstring(item["html"]) for item in _load_json("rating_values.json")]
+
+
+def recorded_rating_parents() -> list[HtmlElement]:
+    """Parent elements of rating value elements, which may contain stars."""
+    return [
+        fromstring(item["parent_html"]) for item in _load_json("rating_values.json")
+    ]
+
+
+def recorded_brands() -> list[HtmlElement]:
+    return [fromstring(item["html"]) for item in _load_json("brand_values.json")]
+
+
+def synthetic_breadcrumbs(depth: int, nested: bool = False) -> HtmlElement:
+    """A breadcrumb component with ``depth`` items.
+
+    If ``nested`` is true, each item is a child of the previous one, which
+    also makes the HTML tree ``depth`` levels deep.
+    """
+    items = [f'<a href="/c{i}">Category {i}</a>' for i in range(depth)]
+    if nested:
+        html = "".join(f"<span>{item} &gt; " for item in items)
+        html += "</span>" * depth
+    else:
+        html = "<ol>" + "".join(f"<li>{item} / </li>" for item in items) + "</ol>"
+    return fromstring(f'<nav class="breadcrumbs">{html}</nav>')
+
+
+def synthetic_menu(levels: int, fanout: int) -> HtmlElement:
+    """A large navigation block with schema.org list item markup."""
+
+    def menu(level: int) -> str:
+        if level == 0:
+            return '<a href="/item">Item</a>'
+        children = "".join(f"<span>{menu(level - 1)}</span> " for _ in range(fanout))
+        return f'<div itemtype="http://schema.org/ListItem">{children}</div>'
+
+    return fromstring(f"<nav>{menu(levels)}</nav>")
+
+
+def synthetic_stars(n_elements: int, seed: int = 0) -> HtmlElement:
+    """A rating widget of about ``n_elements`` elements with a 4-star rating.
+
+    Besides the star icons, it has review entries with attributes that the
+    star heuristics check (title, alt, class and style).
+    """
+    rng = _rng(seed)
+    stars = "".join(
+        f'<i class="icon {"full" if i < 4 else "empty"}" ng-class="{{on: r>{i}}}"></i>'
+        for i in range(5)
+    )
+    reviews = [
+        f'<div class="review" style="width:{rng.randint(10, 400)}px">'
+        f'<img src="/avatars/user{i}.png" alt="User {i}">'
+        f'<p title="Review {i}">Text of the review {i}</p>'
+        f'<span class="date">2024-01-{i % 28 + 1:02}</span></div>'
+        for i in range(max(0, n_elements - 7) // 4)
+    ]
+    return fromstring(
+        f'<div class="rating"><span class="stars">{stars}</span>'
+        f"<div>{''.join(reviews)}</div></div>"
+    )
+
+
+def synthetic_text(size: int, seed: int = 0) -> HtmlElement:
+    """A paragraph with inline markup and about ``size`` characters of text."""
+    rng = _rng(seed)
+    words = ["price", "rating", "the", "product", "of", "5", "stars", "$19.99"]
+    parts = []
+    length = 0
+    while length < size:
+        word = rng.choice(words)
+        if rng.random() < 0.1:
+            word = f"<b>{word}</b>"
+        parts.append(word)
+        length += len(word) + 1
+    return fromstring(f"<p>{' '.join(parts)}</p>")
+
+
+def synthetic_gtins(n: int, valid_ratio: float = 0.5, seed: int = 0) -> list[str]:
+    """GTIN texts of all supported types, with and without labels.
+
+    About ``valid_ratio`` of them are real, valid codes, the rest are random
+    digits with a GTIN length.
+    """
+    rng = _rng(seed)
+    valid = [
+        "978-1-933624-34-1",
+        "ISBN: 0-545-01022-5",
+        "7350053850019",
+        "EAN13: 8808993650040",
+        "042100005264",
+        "0083-2421",
+        "979-0-65001-268-3",
+        "10614141543219",
+        "gtin8: 12345670",
+    ]
+    return [
+        rng.choice(valid)
+        if rng.random() < valid_ratio
+        else "".join(rng.choices("0123456789", k=rng.choice([8, 10, 12, 13, 14])))
+        for _ in range(n)
+    ]
+
+
+def synthetic_prices(n: int, distinct: int, seed: int = 0) -> list[str]:
+    """Price texts drawn from ``distinct`` different values."""
+    rng = _rng(seed)
+    currencies = ["$", "€", "From €", "£", "", "USD "]
+    values = [
+        f"{rng.choice(currencies)}{rng.randint(1, 999)}.{rng.randint(0, 99):02}"
+        for _ in range(distinct)
+    ]
+    return [rng.choice(values) for _ in range(n)]
+
+
+def synthetic_category_page(n_products: int) -> bytes:
+    """A category page with ``n_products`` product tiles, as bytes.
+
+    Breadcrumbs and the first product price come first, like in most real
+    category pages.
+    """
+    tiles = "".join(
+        f'<div class="product"><a href="/p/{i}"><img src="/i/{i}.jpg" alt="P{i}">'
+        f'<h2>Product {i}</h2></a><p class="price">${i % 500}.99</p>'
+        f'<span class="rating">4.{i % 10}</span> out of 5</div>'
+        for i in range(n_products)
+    )
+    return (
+        "<html><head><title>Category</title></head><body>"
+        f"{tostring(synthetic_breadcrumbs(5), encoding='unicode')}"
+        f"<main>{tiles}</main></body></html>"
+    ).encode()
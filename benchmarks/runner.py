@@ -0,0 +1,123 @@
+"""Timing, memory measurement and comparison of benchmark results."""
+
+from __future__ import annotations
+
+import gc
+import platform
+import sys
+import tracemalloc
+from time import perf_counter_ns
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .cases import Operation
+
+#: Metrics where a higher value is better. For the rest, lower is better.
+HIGHER_IS_BETTER = {"ops_per_sec"}
+
+
+def _percentile(sorted_values: list[int], percent: float) -> int:
+    index = round((len(sorted_values) - 1) * percent / 100)
+    return sorted_values[index]
+
+
+def measure(
+    operations: list[Operation], *, min_time: float = 0.5, min_rounds: int = 1
+) -> dict[str, float]:
+    """Measure the given operations.
+
+    All operations are run in order, repeatedly, until at least
+    ``min_time`` seconds and ``min_rounds`` rounds have passed. Every call
+    is timed separately.
+
+    Peak memory is measured in a separate round, with :mod:`tracemalloc`,
+    so that it does not affect timings. It only covers memory allocated
+    through Python, which excludes e.g. lxml trees built by libxml2.
+    """
+    for operation in operations:  # warm-up, e.g. for lazy imports and caches
+        operation()
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        for operation in operations:
+            operation()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    durations: list[int] = []
+    append = durations.append
+    budget = min_time * 1e9
+    elapsed = 0
+    rounds = 0
+    while elapsed < budget or rounds < min_rounds:
+        for operation in operations:
+            start = perf_counter_ns()
+            operation()
+            duration = perf_counter_ns() - start
+            append(duration)
+            elapsed += duration
+        rounds += 1
+
+    durations.sort()
+    return {
+        "calls": len(durations),
+        "ops_per_sec": len(durations) / (sum(durations) / 1e9),
+        "p50_us": _percentile(durations, 50) / 1e3,
+        "p99_us": _percentile(durations, 99) / 1e3,
+        "peak_memory_kib": peak / 1024,
+    }
+
+
+def environment() -> dict[str, str]:
+    return {
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "system": platform.system(),
+    }
+
+
+def compare(
+    baseline: dict[str, Any], current: dict[str, Any], *, threshold: float = 0.1
+) -> tuple[list[list[str]], list[str]]:
+    """Compare two saved benchmark results.
+
+    Returns a table of rows (case, metric, baseline, current, change) and
+    the names of the cases where a timing metric got worse by more than
+    ``threshold`` (a fraction, e.g. 0.1 for 10%).
+
+    Memory is reported but never counted as a regression, as it is
+    deterministic enough that changes are intentional.
+    """
+    rows = []
+    regressions = []
+    baseline_cases = baseline["cases"]
+    for name, metrics in current["cases"].items():
+        if name not in baseline_cases:
+            continue
+        regressed = False
+        for metric in ("ops_per_sec", "p50_us", "p99_us", "peak_memory_kib"):
+            old, new = baseline_cases[name][metric], metrics[metric]
+            change = (new - old) / old if old else 0.0
+            worse = -change if metric in HIGHER_IS_BETTER else change
+            if metric != "peak_memory_kib" and worse > threshold:
+                regressed = True
+            rows.append([name, metric, f"{old:.2f}", f"{new:.2f}", f"{change:+.1%}"])
+        if regressed:
+            regressions.append(name)
+    return rows, regressions
+
+
+def format_table(header: list[str], rows: list[list[str]]) -> str:
+    widths = [max(len(row[i]) for row in [header, *rows]) for i in range(len(header))]
+    lines = [
+        "  ".join(
+            cell.ljust(width) if i == 0 else cell.rjust(width)
+            for i, (cell, width) in enumerate(zip(row, widths, strict=True))
+        )
+        for row in [header, *rows]
+    ]
+    lines.insert(1, "  ".join("-" * width for width in widths))
+    return "\n".join(lines)
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import json
+import pickle
 from typing import Any
 
 import pytest
@@ -82,3 +83,9 @@ RATING_VALUE_CASES = [
 @pytest.mark.parametrize(("value", "expected"), RATING_VALUE_CASES)
 def test_get_rating_numbers(value: str, expected: list[float]) -> None:
     assert expected == _get_rating_numbers(value)
+
+
+def test_aggregate_rating_pickle() -> None:
+    rating = AggregateRating(bestRating=5.0, ratingValue=4.5)
+    assert pickle.loads(pickle.dumps(rating)) == rating  # noqa: S301
+    assert not hasattr(rating, "__dict__")
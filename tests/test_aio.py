@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import get_context
+from typing import TYPE_CHECKING, Any
+
+import pytest
+from lxml.html import fromstring
+
+from zyte_parsers import (
+    Budget,
+    Gtin,
+    aio,
+    extract_brand_name,
+    extract_breadcrumbs,
+    extract_page,
+    extract_price,
+    extract_rating,
+    extract_rating_stars,
+    extract_review_count,
+)
+
+from .test_page import PRODUCT_PAGE
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+
+
+@pytest.fixture
+def offloader() -> Iterator[aio.Offloader]:
+    offloader = aio.Offloader(max_concurrency=2)
+    aio.set_offloader(offloader)
+    yield offloader
+    aio.set_offloader(None)
+    offloader.close()
+
+
+@pytest.mark.parametrize(
+    ("async_extractor", "extractor", "html"),
+    [
+        (aio.extract_brand_name, extract_brand_name, "<p>Brand: Acme</p>"),
+        (aio.extract_price, extract_price, "<p>$10.99</p>"),
+        (aio.extract_rating, extract_rating, "<p>4.5 out of 5</p>"),
+        (aio.extract_rating_stars, extract_rating_stars, '<p class="stars-4">*</p>'),
+        (aio.extract_review_count, extract_review_count, "<p>(123 reviews)</p>"),
+    ],
+)
+def test_extractors(
+    offloader: aio.Offloader,
+    async_extractor: Callable[[Any], Any],
+    extractor: Callable[[Any], Any],
+    html: str,
+) -> None:
+    node = fromstring(html)
+    assert asyncio.run(async_extractor(node)) == extractor(node)
+
+
+def test_extract_breadcrumbs(offloader: aio.Offloader) -> None:
+    node = fromstring('<nav><a href="/">Home</a> / <a href="/c">Category</a></nav>')
+    assert asyncio.run(
+        aio.extract_breadcrumbs(node, base_url="http://example.com")
+    ) == extract_breadcrumbs(node, base_url="http://example.com")
+
+
+def test_extract_gtin(offloader: aio.Offloader) -> None:
+    assert asyncio.run(aio.extract_gtin("EAN: 7350053850019")) == Gtin(
+        "gtin13", "7350053850019"
+    )
+
+
+@pytest.mark.parametrize("as_html", [False, True])
+def test_extract_page(offloader: aio.Offloader, as_html: bool) -> None:
+    tree = PRODUCT_PAGE if as_html else fromstring(PRODUCT_PAGE)
+    expected = extract_page(fromstring(PRODUCT_PAGE), "http://example.com")
+    assert asyncio.run(aio.extract_page(tree, "http://example.com")) == expected
+
+
+def test_extract_page_budget(offloader: aio.Offloader) -> None:
+    budget = Budget(max_nodes=10)
+    asyncio.run(aio.extract_page(PRODUCT_PAGE, "http://example.com", budget=budget))
+    assert budget.exhausted
+
+
+def test_extract_structured_data(offloader: aio.Offloader) -> None:
+    data = asyncio.run(aio.extract_structured_data(PRODUCT_PAGE, "http://example.com"))
+    assert data.gtin == Gtin("gtin13", "7350053850019")
+
+
+def test_process_pool() -> None:
+    # Forking a process with threads, like the pytest process, can deadlock.
+    context = get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        offloader = aio.Offloader(executor, max_concurrency=1)
+        aio.set_offloader(offloader)
+        try:
+
+            async def extract() -> list[Any]:
+                results: list[Any] = await asyncio.gather(
+                    aio.extract_gtin("EAN: 7350053850019"),
+                    aio.extract_page(PRODUCT_PAGE, "http://example.com"),
+                )
+                return results
+
+            gtin, page = asyncio.run(extract())
+        finally:
+            aio.set_offloader(None)
+        offloader.close()
+        # An executor that was passed in is not shut down by the offloader.
+        assert executor.submit(int, "1").result() == 1
+    assert gtin == Gtin("gtin13", "7350053850019")
+    assert page == extract_page(fromstring(PRODUCT_PAGE), "http://example.com")
+
+
+class _CountingExecutor(ThreadPoolExecutor):
+    """Records the maximum number of submitted calls that did not finish."""
+
+    def __init__(self) -> None:
+        super().__init__(max_workers=8)
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.max_pending = 0
+
+    def submit(
+        self, fn: Callable[..., Any], /, *args: Any, **kwargs: Any
+    ) -> Future[Any]:
+        with self._lock:
+            self.pending += 1
+            self.max_pending = max(self.max_pending, self.pending)
+        future = super().submit(fn, *args, **kwargs)
+        future.add_done_callback(self._done)
+        return future
+
+    def _done(self, _: Future[Any]) -> None:
+        with self._lock:
+            self.pending -= 1
+
+
+def test_max_concurrency() -> None:
+    release = threading.Event()
+
+    def blocking(value: int) -> int:
+        release.wait()
+        return value
+
+    with _CountingExecutor() as executor:
+        offloader = aio.Offloader(executor, max_concurrency=3)
+
+        async def extract() -> list[int]:
+            tasks = [asyncio.create_task(offloader.run(blocking, i)) for i in range(20)]
+            await asyncio.sleep(0.05)
+            assert executor.pending == 3
+            release.set()
+            return await asyncio.gather(*tasks)
+
+        assert asyncio.run(extract()) == list(range(20))
+    assert executor.max_pending == 3
+
+
+def test_cancelled_call_keeps_slot_until_finished() -> None:
+    started = threading.Event()
+    release = threading.Event()
+
+    def blocking() -> None:
+        started.set()
+        release.wait()
+
+    with _CountingExecutor() as executor:
+        offloader = aio.Offloader(executor, max_concurrency=1)
+
+        async def extract() -> None:
+            task = asyncio.create_task(offloader.run(blocking))
+            await asyncio.to_thread(started.wait)
+            task.cancel()
+            waiting = asyncio.create_task(offloader.run(int, "1"))
+            await asyncio.sleep(0.05)
+            # The cancelled call is still running, so no other call starts.
+            assert not waiting.done()
+            assert executor.pending == 1
+            release.set()
+            assert await waiting == 1
+
+        asyncio.run(extract())
+    assert executor.max_pending == 1
+
+
+def test_several_event_loops(offloader: aio.Offloader) -> None:
+    async def extract() -> list[Any]:
+        results: list[Any] = await asyncio.gather(
+            *(aio.extract_price(f"${i}") for i in range(10))
+        )
+        return results
+
+    for _ in range(3):
+        assert len(asyncio.run(extract())) == 10
+
+
+def test_default_offloader() -> None:
+    aio.set_offloader(None)
+    offloader = aio.get_offloader()
+    assert aio.get_offloader() is offloader
+    assert offloader.max_concurrency >= 1
+
+
+def test_invalid_max_concurrency() -> None:
+    with pytest.raises(ValueError, match="max_concurrency"):
+        aio.Offloader(max_concurrency=0)
@@ -1,4 +1,5 @@
-from typing import get_type_hints
+from collections.abc import Callable
+from typing import Any, get_type_hints
 
 import pytest
 
@@ -14,3 +15,16 @@ EXPORTED_TYPES = [t for t in EXPORTED if isinstance(t, type)]
 def test_get_type_hints(t: type) -> None:
     """Test that get_type_hints() works for all exported types."""
     get_type_hints(t)
+
+
+EXPORTED_FUNCTIONS = [
+    f
+    for f in (getattr(zyte_parsers, name) for name in zyte_parsers.__all__)
+    if callable(f) and not isinstance(f, type)
+]
+
+
+@pytest.mark.parametrize("f", EXPORTED_FUNCTIONS)
+def test_get_type_hints_functions(f: Callable[..., Any]) -> None:
+    """Test that get_type_hints() works for all exported functions."""
+    get_type_hints(f)
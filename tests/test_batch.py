@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import json
+from decimal import Decimal
+from functools import partial
+from typing import TYPE_CHECKING, Any
+
+import pytest
+from lxml.html import HtmlElement, fromstring
+from parsel import Selector
+
+from tests.utils import TEST_DATA_ROOT
+from zyte_parsers import (
+    AggregateRating,
+    Breadcrumb,
+    Budget,
+    extract_breadcrumbs,
+    extract_price,
+    extract_rating,
+    extract_review_count,
+)
+from zyte_parsers.batch import run, run_threaded
+from zyte_parsers.fields import FIELD_EXTRACTORS
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from zyte_parsers import SelectorOrElement
+
+
+def test_run_nodes() -> None:
+    nodes: list[HtmlElement | Selector] = [
+        fromstring("<p>4.5 (23 reviews)</p>"),
+        Selector(text="<p>4 out of 5</p>"),
+        fromstring("<p>No reviews</p>"),
+    ]
+    assert run(extract_rating, nodes) == [
+        AggregateRating(ratingValue=4.5),
+        AggregateRating(ratingValue=4.0, bestRating=5.0),
+        AggregateRating(),
+    ]
+    assert run(extract_review_count, nodes) == [
+        extract_review_count(node) for node in nodes
+    ]
+
+
+def test_run_kwargs() -> None:
+    nodes = [fromstring('<div><a href="/a">A</a> / <a href="/b">B</a></div>')] * 2
+    expected = (
+        Breadcrumb(name="A", url="http://example.com/a"),
+        Breadcrumb(name="B", url="http://example.com/b"),
+    )
+    assert run(extract_breadcrumbs, nodes, base_url="http://example.com") == [
+        expected,
+        expected,
+    ]
+
+
+def test_run_strings() -> None:
+    results = run(extract_price, ["$1.5", "2", "$1.5"], currency_hint="EUR")
+    assert [(r.amount, r.currency) for r in results] == [
+        (Decimal("1.5"), "$"),
+        (Decimal(2), "EUR"),
+        (Decimal("1.5"), "$"),
+    ]
+    # Price objects are mutable, so equal strings do not share them.
+    results[0].amount = None
+    assert results[2].amount == Decimal("1.5")
+
+
+def test_run_strings_budget() -> None:
+    budget = Budget()
+    run(extract_price, ["$1.5", "$1.5", "$1.5"], budget=budget)
+    assert budget.text_length == 12
+
+
+def test_run_empty() -> None:
+    assert run(extract_price, []) == []
+
+
+def _rating_nodes(*, descendants: bool = True) -> list[HtmlElement]:
+    items = json.loads((TEST_DATA_ROOT / "rating_values.json").read_text("utf8"))
+    roots = [fromstring(item["parent_html"]) for item in items]
+    if not descendants:
+        return roots
+    return [node for root in roots for node in root.iter()]
+
+
+@pytest.mark.parametrize("max_workers", [1, 2, 8])
+def test_run_threaded(max_workers: int) -> None:
+    nodes = _rating_nodes()
+    assert run_threaded(extract_rating, nodes, max_workers=max_workers) == run(
+        extract_rating, nodes
+    )
+
+
+def test_run_threaded_kwargs_and_strings() -> None:
+    texts = ["$1.5", "2", "$1.5"] * 10
+    assert run_threaded(
+        extract_price, iter(texts), max_workers=4, currency_hint="EUR"
+    ) == run(extract_price, texts, currency_hint="EUR")
+
+
+def test_run_threaded_empty() -> None:
+    assert run_threaded(extract_price, [], max_workers=4) == []
+
+
+def _extract_field(
+    extractor: Callable[[SelectorOrElement, str | None], Any], node: HtmlElement
+) -> Any:
+    return extractor(node, "http://example.com")
+
+
+def test_run_threaded_shared_documents() -> None:
+    # All extractors at once on the same documents, from many threads, to
+    # catch shared state that is not thread-safe, e.g. on free-threaded
+    # builds of Python.
+    nodes = _rating_nodes(descendants=False)
+    for name, field_extractor in FIELD_EXTRACTORS.items():
+        extractor = partial(_extract_field, field_extractor)
+        expected = [extractor(node) for node in nodes]
+        results = run_threaded(extractor, nodes * 2, max_workers=8)
+        assert results == expected * 2, name
@@ -1,9 +1,13 @@
 from __future__ import annotations
 
+import gc
 import json
+import pickle
+import tracemalloc
 from typing import Any
 
 import pytest
+from lxml.etree import SubElement
 from lxml.html import fromstring
 
 from tests.utils import TEST_DATA_ROOT
@@ -79,3 +83,61 @@ def test_extract_breadcrumbs(item: dict[str, Any]) -> None:
     print("Result:")
     print_breadcrumbs(result)
     assert expected == result
+
+
+def test_extract_breadcrumbs_deep() -> None:
+    # deeper than the recursion limit, the HTML parser caps nesting at 256
+    depth = 5000
+    root = parent = fromstring("<div></div>")
+    for _ in range(depth):
+        parent = SubElement(parent, "span")
+    parent.extend(fromstring('<p><a href="/a">A</a> &gt; <a href="/b">B</a></p>'))
+    result = extract_breadcrumbs(
+        root, base_url="http://example.com", max_search_depth=depth + 1
+    )
+    assert result == (
+        Breadcrumb(name="A", url="http://example.com/a"),
+        Breadcrumb(name="B", url="http://example.com/b"),
+    )
+
+
+def test_extract_breadcrumbs_max_nodes() -> None:
+    node = fromstring(
+        "<ol>"
+        '<li><a href="/a">A</a></li>'
+        '<li><a href="/b">B</a></li>'
+        '<li><a href="/c">C</a></li>'
+        "</ol>"
+    )
+    base_url = "http://example.com"
+    assert extract_breadcrumbs(node, base_url=base_url, max_nodes=5) == (
+        Breadcrumb(name="A", url="http://example.com/a"),
+        Breadcrumb(name="B", url="http://example.com/b"),
+    )
+    assert extract_breadcrumbs(node, base_url=base_url, max_nodes=1) is None
+    assert len(extract_breadcrumbs(node, base_url=base_url) or ()) == 3
+
+
+def test_breadcrumb_pickle() -> None:
+    breadcrumb = Breadcrumb(name="A", url="http://example.com/a")
+    assert pickle.loads(pickle.dumps(breadcrumb)) == breadcrumb  # noqa: S301
+    assert not hasattr(breadcrumb, "__dict__")
+
+
+def test_breadcrumb_strings_collectable() -> None:
+    # Names and URLs are not interned, as interned strings are never freed
+    # on Python 3.12+.
+    for name in [f"Category {i}" for i in (1, 1)]:
+        assert Breadcrumb(name=name).name is name
+    tracemalloc.start()
+    try:
+        breadcrumbs = [
+            Breadcrumb(name=f"Category {i}", url=f"http://example.com/c/{i}")
+            for i in range(10_000)
+        ]
+        del breadcrumbs
+        gc.collect()
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert current < 100_000
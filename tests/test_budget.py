@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+from decimal import Decimal
+from typing import TYPE_CHECKING, Any
+
+import pytest
+from lxml.html import fromstring
+
+from zyte_parsers import (
+    AggregateRating,
+    Breadcrumb,
+    Budget,
+    Gtin,
+    extract_brand_name,
+    extract_breadcrumbs,
+    extract_gtin,
+    extract_page,
+    extract_price,
+    extract_rating,
+    extract_rating_stars,
+    extract_review_count,
+    utils,
+)
+from zyte_parsers.batch import run
+from zyte_parsers.utils import extract_text
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+HUGE = f"<div>{'<p>Unrelated text</p>' * 1000}</div>"
+
+
+def test_visit() -> None:
+    budget = Budget(max_nodes=3)
+    assert budget.visit(2)
+    assert not budget.visit(2)
+    assert budget.exhausted
+    assert budget.nodes == 2
+    # Once exhausted, nothing fits anymore.
+    assert not budget.visit()
+
+
+def test_visit_subtree() -> None:
+    budget = Budget(max_nodes=10)
+    assert budget.visit_subtree(fromstring("<p>a<b>b</b></p>"))
+    assert budget.nodes == 2
+    assert not budget.visit_subtree(fromstring(HUGE))
+    assert budget.nodes == 2
+    assert budget.exhausted
+
+
+def test_read_text() -> None:
+    budget = Budget(max_text_length=5)
+    assert budget.read_text("abc")
+    assert not budget.read_text("abc")
+    assert budget.text_length == 3
+    assert budget.exhausted
+
+
+def test_unlimited() -> None:
+    budget = Budget()
+    assert budget.visit(10**9)
+    assert budget.visit_subtree(fromstring(HUGE))
+    assert budget.read_text("a" * 10**6)
+    assert not budget.exhausted
+    assert repr(budget) == (
+        "Budget(max_nodes=None, max_text_length=None, nodes=1000000000, "
+        "text_length=1000000, exhausted=False)"
+    )
+
+
+def test_extract_text() -> None:
+    node = fromstring("<p>foo <b>bar</b></p>")
+    assert extract_text(node, budget=Budget(max_nodes=2)) == "foo bar"
+    assert extract_text(node, budget=Budget(max_nodes=1)) is None
+    assert extract_text(node, budget=Budget(max_text_length=7)) == "foo bar"
+    assert extract_text(node, budget=Budget(max_text_length=6)) is None
+
+
+def test_extract_text_huge(monkeypatch: pytest.MonkeyPatch) -> None:
+    # Text that cannot fit is not extracted at all.
+    def fail(*args: Any) -> None:
+        raise AssertionError
+
+    monkeypatch.setattr(utils, "_extract_text", fail)
+    node = fromstring(f"<div>{'<p>Unrelated text</p>' * 100_000}</div>")
+    budget = Budget(max_text_length=100)
+    assert extract_text(node, budget=budget) is None
+    assert budget.exhausted
+    assert budget.text_length == 0
+    assert extract_price(node, budget=Budget(max_text_length=100)).amount is None
+    # Removed elements and comments do not count.
+    monkeypatch.undo()
+    node = fromstring(
+        "<div>a <script>var x = 1;</script>b<!-- comment --><style>p {}</style></div>"
+    )
+    assert extract_text(node, budget=Budget(max_text_length=3)) == "a b"
+
+
+@pytest.mark.parametrize(
+    ("extractor", "html", "expected", "empty"),
+    [
+        (
+            extract_rating,
+            "<p>4.5 out of 5</p>",
+            AggregateRating(bestRating=5.0, ratingValue=4.5),
+            AggregateRating(),
+        ),
+        (extract_review_count, "<p>(123 reviews)</p>", 123, None),
+        (
+            extract_gtin,
+            "<p>EAN: 7350053850019</p>",
+            Gtin("gtin13", "7350053850019"),
+            None,
+        ),
+        (extract_brand_name, "<p>Acme</p>", "Acme", None),
+        (extract_rating_stars, '<p class="stars-4">*</p>', 4.0, None),
+    ],
+)
+def test_extractors(
+    extractor: Callable[..., Any], html: str, expected: Any, empty: Any
+) -> None:
+    node = fromstring(html)
+    budget = Budget(max_nodes=100, max_text_length=100)
+    assert extractor(node, budget=budget) == expected
+    assert not budget.exhausted
+    budget = Budget(max_nodes=0)
+    assert extractor(node, budget=budget) == empty
+    assert budget.exhausted
+
+
+def test_extract_price() -> None:
+    assert extract_price("$10", budget=Budget(max_text_length=3)).amount == Decimal(10)
+    budget = Budget(max_text_length=2)
+    assert extract_price("$10", budget=budget).amount is None
+    assert budget.exhausted
+    budget = Budget(max_nodes=0)
+    assert extract_price(fromstring("<p>$10</p>"), budget=budget).amount is None
+
+
+def test_extract_rating_stars_huge() -> None:
+    # The stars are found before the budget runs out.
+    html = f'<div><span class="stars-4">*</span>{HUGE}</div>'
+    budget = Budget(max_nodes=100)
+    assert extract_rating_stars(fromstring(html), budget=budget) == 4.0
+    assert budget.exhausted
+    assert budget.nodes == 100
+
+
+def test_extract_rating_huge_next() -> None:
+    # The text of the next element, which can hold the best rating, is
+    # counted too.
+    root = fromstring(f"<div><span>4.5</span>{HUGE}</div>")
+    budget = Budget(max_nodes=10, max_text_length=100)
+    assert extract_rating(root[0], budget=budget) == AggregateRating(ratingValue=4.5)
+    assert budget.exhausted
+    assert budget.nodes <= 10
+
+
+def test_extract_brand_name_images() -> None:
+    html = '<div><img alt="Acme"><img alt="Other"></div>'
+    # The text of the div (3 elements) is empty, so images are searched.
+    assert extract_brand_name(fromstring(html), 1, budget=Budget(max_nodes=5)) == (
+        "Acme"
+    )
+    budget = Budget(max_nodes=4)
+    assert extract_brand_name(fromstring(html), 1, budget=budget) is None
+    assert budget.exhausted
+
+
+def test_extract_breadcrumbs() -> None:
+    html = '<div><a href="/a">A</a> / <a href="/b">B</a> / <a href="/c">C</a></div>'
+    node = fromstring(html)
+    assert extract_breadcrumbs(node, base_url=None, budget=Budget()) == (
+        Breadcrumb(name="A", url="/a"),
+        Breadcrumb(name="B", url="/b"),
+        Breadcrumb(name="C", url="/c"),
+    )
+    # The div, then each anchor and its text.
+    budget = Budget(max_nodes=5)
+    assert extract_breadcrumbs(node, base_url=None, budget=budget) == (
+        Breadcrumb(name="A", url="/a"),
+        Breadcrumb(name="B", url="/b"),
+    )
+    assert budget.exhausted
+
+
+def test_shared_budget() -> None:
+    budget = Budget(max_nodes=1500)
+    assert extract_rating(fromstring(HUGE), budget=budget) == AggregateRating()
+    assert extract_review_count(fromstring(HUGE), budget=budget) is None
+    assert budget.exhausted
+    # Other calls stop right away.
+    assert extract_review_count(fromstring("<p>3 reviews</p>"), budget=budget) is None
+
+
+def test_extract_page() -> None:
+    html = f'<html><body><p class="price">$10</p>{HUGE}</body></html>'
+    page = extract_page(fromstring(html), None, budget=Budget(max_nodes=2000))
+    assert page.price is not None
+    assert page.price.amount == Decimal(10)
+    # The walk of the page runs out of budget, so no field is extracted.
+    budget = Budget(max_nodes=100)
+    assert extract_page(fromstring(html), None, budget=budget).price is None
+    assert budget.exhausted
+
+
+def test_batch_run() -> None:
+    # extract_gtin is run on each input when a budget is given.
+    budget = Budget(max_text_length=30)
+    assert run(
+        extract_gtin, ["EAN: 7350053850019", "7350053850019 "], budget=budget
+    ) == [
+        Gtin("gtin13", "7350053850019"),
+        None,
+    ]
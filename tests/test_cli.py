@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import gzip
+import json
+from typing import TYPE_CHECKING, Any
+
+import pytest
+
+from zyte_parsers.cli import main, process_lines, process_record
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+HTML = (
+    '<p class="price">$10.50</p>'
+    '<nav><a href="/a">A</a> / <a href="/b">B</a></nav>'
+    "<div>4.5 out of 5</div><span>23 reviews</span>"
+)
+
+
+def _record(**kwargs: Any) -> str:
+    return json.dumps({"url": "http://example.com/p", "html": HTML, **kwargs})
+
+
+def test_process_record() -> None:
+    record = json.loads(
+        _record(
+            fields={
+                "price": ".price",
+                "breadcrumbs": {"xpath": "//nav"},
+                "aggregateRating": {"css": "div"},
+                "gtin": "table",
+            }
+        )
+    )
+    assert process_record(record, {"reviewCount": {"css": "span"}}) == {
+        "reviewCount": 23,
+        "price": {"amount": "10.50", "currency": "$", "amount_text": "10.50"},
+        "breadcrumbs": [
+            {"name": "A", "url": "http://example.com/a"},
+            {"name": "B", "url": "http://example.com/b"},
+        ],
+        "aggregateRating": {"bestRating": 5.0, "ratingValue": 4.5},
+        "gtin": None,
+    }
+
+
+def test_process_record_errors() -> None:
+    with pytest.raises(ValueError, match="Unknown fields: foo"):
+        process_record({"html": HTML, "fields": {"foo": "p"}}, {})
+    with pytest.raises(ValueError, match="Expected a 'css' or an 'xpath' key"):
+        process_record({"html": HTML, "fields": {"price": {"foo": "p"}}}, {})
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+@pytest.mark.parametrize("ordered", [True, False])
+def test_process_lines(jobs: int, ordered: bool) -> None:
+    lines = [_record(fields={"price": ".price"}), "", "{"] * 10
+    output = [
+        json.loads(line)
+        for line in process_lines(lines, {}, jobs=jobs, chunksize=3, ordered=ordered)
+    ]
+    if not ordered:
+        output.sort(key=lambda record: record["line"])
+    assert [record["line"] for record in output] == [
+        n for n in range(1, 31) if n % 3 != 2
+    ]
+    assert output[0]["fields"]["price"]["amount"] == "10.50"
+    assert output[1]["error"].startswith("JSONDecodeError: ")
+
+
+def test_main(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    input_path = tmp_path / "input.jsonl"
+    input_path.write_text(_record() + "\n", encoding="utf8")
+    output_path = tmp_path / "output.jsonl"
+    args = ["--css", "price=.price", "--xpath", "breadcrumbs=//nav", "-j", "1"]
+    assert main([*args, str(input_path), "-o", str(output_path)]) == 0
+    (line,) = output_path.read_text(encoding="utf8").splitlines()
+    assert json.loads(line)["fields"]["breadcrumbs"][1]["name"] == "B"
+
+    assert main([*args, str(input_path)]) == 0
+    assert capsys.readouterr().out == line + "\n"
+
+
+def test_main_unknown_field(capsys: pytest.CaptureFixture[str]) -> None:
+    with pytest.raises(SystemExit):
+        main(["--css", "foo=p"])
+    assert "unknown fields: foo" in capsys.readouterr().err
+
+
+def test_main_archives(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    jsonl_path = tmp_path / "input.jsonl.gz"
+    jsonl_path.write_bytes(gzip.compress((_record() + "\n").encode()))
+    body = HTML.encode()
+    block = b"HTTP/1.1 200 OK\r\nContent-Type: text/html\r\n\r\n" + body
+    warc_path = tmp_path / "input.warc.gz"
+    warc_path.write_bytes(
+        gzip.compress(
+            b"WARC/1.1\r\nWARC-Type: response\r\n"
+            b"WARC-Target-URI: http://example.com/p\r\n"
+            b"Content-Type: application/http; msgtype=response\r\n"
+            + f"Content-Length: {len(block)}\r\n\r\n".encode()
+            + block
+            + b"\r\n\r\n"
+        )
+    )
+    args = ["--css", "price=.price", "-j", "1", str(jsonl_path), str(warc_path)]
+    assert main(args) == 0
+    output = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [record["url"] for record in output] == ["http://example.com/p"] * 2
+    assert [record["fields"]["price"]["amount"] for record in output] == ["10.50"] * 2
+
+
+def test_main_invalid_utf8(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    input_path = tmp_path / "input.jsonl"
+    input_path.write_bytes(
+        b"\xff\xfe\n"
+        + _record(html='<p class="price">$1</p>').encode()[:-2]
+        + b'\xe9"}\n'
+        + _record().encode()
+        + b"\n"
+    )
+    assert main(["--css", "price=.price", "-j", "1", str(input_path)]) == 0
+    output = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [record["line"] for record in output] == [1, 2, 3]
+    assert output[0]["error"].startswith("JSONDecodeError")
+    assert output[1]["fields"]["price"]["amount"] == "1"
+    assert output[2]["fields"]["price"]["amount"] == "10.50"
@@ -0,0 +1,256 @@
+from __future__ import annotations
+
+import json
+import threading
+from typing import TYPE_CHECKING
+
+import pytest
+from lxml.html import fromstring
+
+from tests.utils import TEST_DATA_ROOT
+from zyte_parsers import (
+    Breadcrumb,
+    Budget,
+    FragmentCache,
+    SiteProfile,
+    extract_breadcrumbs,
+    extract_rating_stars,
+    instrumentation,
+)
+from zyte_parsers.fragment_cache import CacheInfo, _base_url_part
+from zyte_parsers.utils import extract_link
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+STARS = '<p class="stars-4">*</p>'
+BREADCRUMBS = '<nav><a href="/">Home</a> / <a href="c">Category</a></nav>'
+ROOT_RELATIVE_BREADCRUMBS = (
+    '<nav><a href="/">Home</a> / <a href="/c">Category</a></nav>'
+)
+BREADCRUMB_ITEMS = (
+    Breadcrumb("Home", "http://example.com/"),
+    Breadcrumb("Category", "http://example.com/c"),
+)
+
+
+def test_cache() -> None:
+    cache = FragmentCache(maxsize=2)
+    assert extract_rating_stars(fromstring(STARS), cache=cache) == 4.0
+    assert extract_rating_stars(fromstring(STARS), cache=cache) == 4.0
+    # None results are cached too.
+    assert extract_rating_stars(fromstring("<p>a</p>"), cache=cache) is None
+    assert extract_rating_stars(fromstring("<p>a</p>"), cache=cache) is None
+    assert cache.info() == CacheInfo(hits=2, misses=2, maxsize=2, currsize=2)
+    cache.clear()
+    assert cache.info() == CacheInfo(hits=0, misses=0, maxsize=2, currsize=0)
+
+
+def test_lru() -> None:
+    cache = FragmentCache(maxsize=2)
+    for html in (STARS, "<p>a</p>", STARS, "<p>b</p>", STARS, "<p>a</p>"):
+        extract_rating_stars(fromstring(html), cache=cache)
+    # "<p>a</p>" was evicted by "<p>b</p>", STARS was used more recently.
+    assert cache.info() == CacheInfo(hits=2, misses=4, maxsize=2, currsize=2)
+
+
+def test_key() -> None:
+    cache = FragmentCache()
+    node = fromstring(BREADCRUMBS)
+    key = cache.key("extract_breadcrumbs", node, 10)
+    assert cache.key("extract_breadcrumbs", fromstring(BREADCRUMBS), 10) == key
+    assert cache.key("extract_breadcrumbs", node, 5) != key
+    assert cache.key("extract_rating_stars", node, 10) != key
+    assert cache.key("extract_breadcrumbs", fromstring(STARS), 10) != key
+    # Only the part of the base URL that the links depend on is part of the
+    # key.
+    node = fromstring(ROOT_RELATIVE_BREADCRUMBS)
+    key = cache.key("extract_breadcrumbs", node, base_url="http://example.com/a/")
+    assert key == cache.key(
+        "extract_breadcrumbs", node, base_url="http://example.com/b/1.html"
+    )
+    assert key != cache.key("extract_breadcrumbs", node, base_url="https://example.com")
+    assert key != cache.key(
+        "extract_breadcrumbs", node, base_url="http://other.example"
+    )
+
+
+@pytest.mark.parametrize(
+    ("link", "base_url_part"),
+    [
+        ("http://example.com/c", "http"),
+        (" //example.com/c", "http"),
+        ("/c", "http://example.com"),
+        ("javascript:void(0)", ""),
+        ("", ""),
+        ("c", "http://example.com/a/b?c"),
+        ("?page=2", "http://example.com/a/b?c"),
+        (" ", "http://example.com/a/b?c"),
+        ("http:c", "http://example.com/a/b?c"),
+        ("http:///c", "http://example.com/a/b?c"),
+        ("///c", "http://example.com/a/b?c"),
+        ("/c\n/d", "http://example.com/a/b?c"),
+    ],
+)
+def test_base_url_part(link: str, base_url_part: str) -> None:
+    base_url = "http://example.com/a/b?c"
+    assert _base_url_part(base_url, [link]) == base_url_part
+    # Other base URLs with the same part give the same URL.
+    other_base_url = {
+        "": "https://other.example/x",
+        "http": "http://other.example/x/y?z",
+        "http://example.com": "http://example.com/x/y?z",
+    }.get(base_url_part)
+    if other_base_url is not None:
+        assert extract_link(fromstring(f"<a href='{link}'></a>"), base_url) == (
+            extract_link(fromstring(f"<a href='{link}'></a>"), other_base_url)
+        )
+
+
+def test_extract_breadcrumbs_base_url() -> None:
+    cache = FragmentCache()
+    for base_url in ("http://example.com/a/1", "http://example.com/b/2"):
+        assert (
+            extract_breadcrumbs(
+                fromstring(ROOT_RELATIVE_BREADCRUMBS), base_url=base_url, cache=cache
+            )
+            == BREADCRUMB_ITEMS
+        )
+    assert cache.info().hits == 1
+    # Relative links depend on the path of the page.
+    for base_url, category_url in (
+        ("http://example.com/a/1", "http://example.com/a/c"),
+        ("http://example.com/a/2", "http://example.com/a/c"),
+        ("http://example.com/b/1", "http://example.com/b/c"),
+    ):
+        assert extract_breadcrumbs(
+            fromstring(BREADCRUMBS), base_url=base_url, cache=cache
+        ) == (
+            Breadcrumb("Home", "http://example.com/"),
+            Breadcrumb("Category", category_url),
+        )
+    assert cache.info().hits == 1
+
+
+def test_extract_breadcrumbs_tail() -> None:
+    cache = FragmentCache()
+    root = fromstring("<div><span>Home</span>Category</div>")
+    expected = extract_breadcrumbs(root[0], base_url=None)
+    assert extract_breadcrumbs(root[0], base_url=None, cache=cache) == expected
+    root[0].tail = None
+    assert extract_breadcrumbs(root[0], base_url=None, cache=cache) == (
+        Breadcrumb("Home"),
+    )
+
+
+def test_extract_breadcrumbs_same_results() -> None:
+    items = json.loads(
+        (TEST_DATA_ROOT / "breadcrumb_items_extract.json").read_text(encoding="utf8")
+    )
+    snippets_dir = TEST_DATA_ROOT / "breadcrumb_items_snippets"
+    cache = FragmentCache()
+    for item in items:
+        html = (snippets_dir / item["snippet_path"]).read_text("utf8")
+        for base_url in (item["base_url"], "https://example.com/other/page"):
+            expected = extract_breadcrumbs(fromstring(html), base_url=base_url)
+            for _ in range(2):
+                result = extract_breadcrumbs(
+                    fromstring(html), base_url=base_url, cache=cache
+                )
+                assert result == expected
+    assert cache.info().hits >= len(items) * 2
+
+
+def test_budget() -> None:
+    cache = FragmentCache()
+    html = f"<div>{'<p>a</p>' * 100}{STARS}</div>"
+    budget = Budget(max_nodes=10)
+    assert extract_rating_stars(fromstring(html), budget=budget, cache=cache) is None
+    # The result was cut short, so it is not stored.
+    assert cache.info().currsize == 0
+    assert extract_rating_stars(fromstring(html), budget=Budget(), cache=cache) == 4.0
+    assert cache.info().currsize == 1
+
+
+def test_instrumentation() -> None:
+    cache = FragmentCache()
+    with instrumentation.recording():
+        extract_rating_stars(fromstring(STARS), cache=cache)
+        extract_rating_stars(fromstring(STARS), cache=cache)
+    assert instrumentation.snapshot()["extract_rating_stars"]["calls"] == 2
+    assert instrumentation.snapshot()["extract_rating_stars.class"]["calls"] == 1
+
+
+def test_sqlite(tmp_path: Path) -> None:
+    path = tmp_path / "cache.sqlite"
+    cache = FragmentCache(path=path)
+    assert (
+        extract_breadcrumbs(
+            fromstring(BREADCRUMBS), base_url="http://example.com", cache=cache
+        )
+        == BREADCRUMB_ITEMS
+    )
+    assert extract_rating_stars(fromstring("<p>a</p>"), cache=cache) is None
+    cache.close()
+
+    cache = FragmentCache(maxsize=1, path=path)
+    assert (
+        extract_breadcrumbs(
+            fromstring(BREADCRUMBS), base_url="http://example.com", cache=cache
+        )
+        == BREADCRUMB_ITEMS
+    )
+    assert extract_rating_stars(fromstring("<p>a</p>"), cache=cache) is None
+    # Results evicted from memory are still in the database.
+    assert (
+        extract_breadcrumbs(
+            fromstring(BREADCRUMBS), base_url="http://example.com", cache=cache
+        )
+        is not None
+    )
+    assert cache.info() == CacheInfo(hits=3, misses=0, maxsize=1, currsize=1)
+
+    cache.clear()
+    cache.close()
+    cache = FragmentCache(path=path)
+    extract_rating_stars(fromstring("<p>a</p>"), cache=cache)
+    assert cache.info().misses == 1
+    cache.close()
+
+
+def test_threads(tmp_path: Path) -> None:
+    cache = FragmentCache(maxsize=10, path=tmp_path / "cache.sqlite")
+    cases = [(f'<p class="stars-{i % 5 + 1}">*</p>', i % 5 + 1.0) for i in range(50)]
+    errors = []
+
+    def extract() -> None:
+        for html, expected in cases:
+            value = extract_rating_stars(fromstring(html), cache=cache)
+            if value != expected:
+                errors.append(value)
+
+    threads = [threading.Thread(target=extract) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    cache.close()
+    assert not errors
+    info = cache.info()
+    assert info.hits + info.misses == 200
+
+
+def test_profile() -> None:
+    # Calls with a profile neither use nor store results.
+    cache = FragmentCache()
+    profile = SiteProfile()
+    extract_rating_stars(fromstring(STARS), cache=cache)
+    extract_breadcrumbs(fromstring(BREADCRUMBS), base_url=None, cache=cache)
+    for _ in range(2):
+        assert extract_rating_stars(fromstring(STARS), profile=profile, cache=cache)
+        assert extract_breadcrumbs(
+            fromstring(BREADCRUMBS), base_url=None, profile=profile, cache=cache
+        )
+    assert cache.info() == CacheInfo(hits=0, misses=2, maxsize=4096, currsize=2)
+    assert profile.info()["extract_rating_stars"].misses == 2
+    assert profile.info()["extract_breadcrumbs"].misses == 2
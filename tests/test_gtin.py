@@ -1,10 +1,23 @@
 from __future__ import annotations
 
+import pickle
+import random
+import sys
+from contextlib import suppress
+
 import pytest
-from lxml.html import fromstring
+from gtin.validator import is_valid_GTIN
+from lxml.html import HtmlElement, fromstring
 from parsel import Selector
+from stdnum import ean, isbn, ismn, issn
 
-from zyte_parsers.gtin import Gtin, extract_gtin, extract_gtin_id, gtin_classification
+from zyte_parsers.gtin import (
+    Gtin,
+    extract_gtin,
+    extract_gtin_id,
+    extract_gtin_many,
+    gtin_classification,
+)
 
 GTIN_CLASSIFICATION_CASES = [
     ("978-1-933624-34-1", "isbn13"),
@@ -103,6 +116,48 @@ def test_gtin_classification(value: str, expected: str | None) -> None:
     assert expected == gtin_classification(value)
 
 
+def _reference_gtin_classification(gtin: str) -> str | None:
+    """The validation-library-based implementation that the native
+    classification must match."""
+    with suppress(Exception):
+        if ismn.validate(gtin):
+            return "ismn"
+    with suppress(Exception):
+        if isbn.validate(gtin):
+            if len(gtin) == 10:
+                return "isbn10"
+            if len(gtin) == 13:
+                return "isbn13"
+    with suppress(Exception):
+        if issn.validate(gtin):
+            return "issn"
+    if is_valid_GTIN(gtin):
+        return {8: "gtin8", 14: "gtin14", 13: "gtin13", 12: "upc"}.get(len(gtin))
+    return None
+
+
+def _random_gtin_ids() -> list[str]:
+    rng = random.Random(0)  # noqa: S311
+    prefixes = ["", "0", "977", "978", "979", "9790", "9791"]
+    ids = []
+    for _ in range(5000):
+        length = rng.randint(7, 19)
+        prefix = rng.choice(prefixes)[:length]
+        body = prefix + "".join(rng.choices("0123456789", k=length - len(prefix)))
+        ids.append(body)
+        # make check digits valid for some of the schemes
+        ids.append(body[:-1] + ean.calc_check_digit(body[:-1]))
+        ids.append(body[:-1] + issn.calc_check_digit(body[:-1]))
+        ids.append(body[:-1] + isbn._calc_isbn10_check_digit(body[:-1]))
+    return [i for i in ids if i.isdigit()]
+
+
+def test_gtin_classification_reference() -> None:
+    for gtin_id in _random_gtin_ids():
+        expected = _reference_gtin_classification(gtin_id)
+        assert gtin_classification(gtin_id) == expected, gtin_id
+
+
 GTIN_IDS = [
     # Simple cases
     ("978-1-933624-34-1", "9781933624341"),
@@ -182,3 +237,32 @@ def test_extract_gtin_types() -> None:
     assert expected == extract_gtin(value)
     assert expected == extract_gtin(fromstring(f"<p>{value}</p>"))
     assert expected == extract_gtin(Selector(text=f"<p>{value}</p>"))
+
+
+@pytest.mark.parametrize("numpy", [True, False])
+def test_extract_gtin_many(numpy: bool, monkeypatch: pytest.MonkeyPatch) -> None:
+    if numpy:
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setitem(sys.modules, "numpy", None)
+    values: list[str | None] = [value for value, _ in GTIN_CLASSIFICATION_CASES]
+    values += [value for value, _ in GTIN_IDS]
+    values += _random_gtin_ids()
+    values += ["", None, "１２３４５６７０", "9790035236338"]
+    expected = [None if value is None else extract_gtin(value) for value in values]
+    assert extract_gtin_many(values) == expected
+
+
+def test_extract_gtin_many_nodes() -> None:
+    nodes: list[HtmlElement | Selector] = [
+        fromstring("<p>EAN: 7350053850019</p>"),
+        Selector(text="<p>foo</p>"),
+    ]
+    assert extract_gtin_many(nodes) == [Gtin("gtin13", "7350053850019"), None]
+
+
+def test_gtin_pickle() -> None:
+    gtin = Gtin(f"gtin{13}", "7350053850019")
+    assert gtin.type is Gtin("gtin13", "7350053850019").type
+    assert pickle.loads(pickle.dumps(gtin)) == gtin  # noqa: S301
+    assert not hasattr(gtin, "__dict__")
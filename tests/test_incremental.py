@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING, Any
+
+import pytest
+from lxml.html import document_fromstring
+
+from tests.utils import TEST_DATA_ROOT
+from zyte_parsers.fields import FIELD_EXTRACTORS
+from zyte_parsers.incremental import IncrementalExtractor
+
+if TYPE_CHECKING:
+    from lxml.html import HtmlElement
+
+BASE_URL = "http://example.com/page"
+
+
+def _feed(extractor: IncrementalExtractor, data: bytes, size: int) -> dict[str, Any]:
+    results = {}
+    for start in range(0, len(data), size):
+        results.update(extractor.feed(data[start : start + size]))
+    results.update(extractor.close())
+    return results
+
+
+def _page(html: str) -> bytes:
+    return (
+        "<html><head><title>Page</title></head><body>"
+        "<header><a href='/'>Home</a></header>"
+        f"<div id='target'>{html}</div>"
+        "<footer><p>After</p></footer></body></html>"
+    ).encode()
+
+
+def _breadcrumb_snippets() -> list[str]:
+    items = json.loads(
+        (TEST_DATA_ROOT / "breadcrumb_items_extract.json").read_text(encoding="utf8")
+    )
+    return [
+        (TEST_DATA_ROOT / "breadcrumb_items_snippets" / item["snippet_path"])
+        .read_text(encoding="utf8")
+        .strip()
+        for item in items[::10]
+    ]
+
+
+def _rating_snippets() -> list[str]:
+    items = json.loads(
+        (TEST_DATA_ROOT / "rating_values.json").read_text(encoding="utf8")
+    )
+    return [item["parent_html"] for item in items[::5]]
+
+
+@pytest.mark.parametrize(
+    ("field", "selector"),
+    [
+        ("breadcrumbs", "#target > *"),
+        ("brand", "#target > *"),
+        ("ratingStars", "#target > *"),
+    ],
+)
+@pytest.mark.parametrize("html", _breadcrumb_snippets())
+def test_same_as_full_parse_breadcrumbs(field: str, selector: str, html: str) -> None:
+    _assert_same_as_full_parse(field, selector, html)
+
+
+@pytest.mark.parametrize(
+    "field", ["aggregateRating", "reviewCount", "price", "ratingStars"]
+)
+@pytest.mark.parametrize("html", _rating_snippets())
+def test_same_as_full_parse_ratings(field: str, html: str) -> None:
+    _assert_same_as_full_parse(field, "[xd-target-node]", html)
+
+
+def _assert_same_as_full_parse(field: str, selector: str, html: str) -> None:
+    page = _page(html)
+    matches = document_fromstring(page).cssselect(selector)
+    expected = FIELD_EXTRACTORS[field](matches[0], BASE_URL) if matches else None
+    for size in [7, 100, len(page)]:
+        extractor = IncrementalExtractor({field: selector}, base_url=BASE_URL)
+        assert _feed(extractor, page, size) == {field: expected}
+        assert extractor.results == {field: expected}
+
+
+def test_extract_early() -> None:
+    extractor = IncrementalExtractor(
+        {
+            "aggregateRating": "span.rating",
+            "breadcrumbs": {"xpath": "//nav"},
+            "gtin": "#gtin",
+        }
+    )
+    assert extractor.feed(b"<html><body><nav><a>A</a> / <a>B</a></nav>") == {}
+    assert extractor.feed(b"<div><span class=rating>4</span> out of ") == {
+        "breadcrumbs": FIELD_EXTRACTORS["breadcrumbs"](
+            document_fromstring("<nav><a>A</a> / <a>B</a></nav>"), None
+        )
+    }
+    results = extractor.feed(b"<b>5</b></div>")
+    assert results["aggregateRating"].bestRating == 5.0
+    assert extractor.close() == {"gtin": None}
+
+
+def test_release_memory(monkeypatch: pytest.MonkeyPatch) -> None:
+    nodes: list[HtmlElement] = []
+
+    def extract(node: HtmlElement, base_url: str | None) -> None:
+        nodes.append(node)
+
+    monkeypatch.setitem(FIELD_EXTRACTORS, "price", extract)
+    extractor = IncrementalExtractor({"price": ".price"})
+    extractor.feed(b"<html><body>")
+    for _ in range(1000):
+        extractor.feed(b"<div><p>Text</p><p>Text</p></div>")
+    extractor.feed(b"<p class=price>$1</p>")
+    (node,) = nodes
+    assert sum(1 for _ in node.getroottree().iter()) < 10
+
+
+def test_close_incomplete() -> None:
+    extractor = IncrementalExtractor({"price": ".price"})
+    assert extractor.feed(b"<html><body><p class=price>$1") == {}
+    assert extractor.close()["price"].amount == 1
+
+
+def test_errors() -> None:
+    with pytest.raises(ValueError, match="Unknown fields: foo"):
+        IncrementalExtractor({"foo": "p"})
+    with pytest.raises(ValueError, match="Expected a 'css' or an 'xpath' key"):
+        IncrementalExtractor({"price": {"foo": "p"}})
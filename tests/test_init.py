@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+
+import pytest
+
+import zyte_parsers
+from zyte_parsers.price import extract_price
+
+HEAVY_MODULES = {"attr", "html_text", "lxml", "parsel", "price_parser", "w3lib"}
+
+
+@pytest.mark.parametrize(
+    ("code", "expected"),
+    [
+        ("import zyte_parsers", set()),
+        (
+            "from zyte_parsers import extract_gtin\nextract_gtin('7350053850019')",
+            {"attr", "lxml"},
+        ),
+        (
+            "from zyte_parsers import extract_price\nextract_price('$10')",
+            {"attr", "lxml", "price_parser"},
+        ),
+        ("from zyte_parsers import *", HEAVY_MODULES - {"html_text"}),
+    ],
+)
+def test_lazy_imports(code: str, expected: set[str]) -> None:
+    code += "\nimport json, sys\nprint(json.dumps(list(sys.modules)))"
+    output = subprocess.run(  # noqa: S603
+        [sys.executable, "-c", code], capture_output=True, check=True, text=True
+    ).stdout
+    modules = {name.split(".")[0] for name in json.loads(output)}
+    assert modules & HEAVY_MODULES == expected
+
+
+def test_getattr() -> None:
+    assert zyte_parsers.extract_price is extract_price
+    assert set(zyte_parsers.__all__) <= set(dir(zyte_parsers))
+    for name in zyte_parsers.__all__:
+        getattr(zyte_parsers, name)
+    with pytest.raises(AttributeError, match="has no attribute 'foo'"):
+        zyte_parsers.foo  # noqa: B018
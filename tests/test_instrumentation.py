@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import json
+import threading
+
+import pytest
+from lxml.html import fromstring
+from parsel import Selector
+
+from tests.utils import TEST_DATA_ROOT
+from zyte_parsers import (
+    extract_breadcrumbs,
+    extract_gtin,
+    extract_price,
+    extract_rating_stars,
+    instrumentation,
+)
+from zyte_parsers.gtin import extract_gtin_many
+
+
+def test_disabled() -> None:
+    instrumentation.reset()
+    assert not instrumentation.is_enabled()
+    extract_price("$10")
+    assert instrumentation.snapshot() == {}
+
+
+def test_extractors() -> None:
+    with instrumentation.recording():
+        extract_price("$10")
+        extract_price(fromstring("<p><b>$</b>10</p>"))
+        extract_gtin(Selector(text="<p>EAN 7350053850019</p>"))
+        extract_gtin_many(["7350053850019", "foo", None])
+    stats = instrumentation.snapshot()
+    assert not instrumentation.is_enabled()
+    assert stats.keys() == {"extract_price", "extract_gtin", "extract_gtin_many"}
+    assert stats["extract_price"]["calls"] == 2
+    assert stats["extract_price"]["total_size"] == 3 + 2
+    assert stats["extract_gtin"]["total_size"] == 3  # html, body, p
+    assert stats["extract_gtin_many"]["total_size"] == 3
+    price_stats = stats["extract_price"]
+    assert 0 < price_stats["max_time"] <= price_stats["total_time"]
+    json.dumps(stats)
+
+
+def test_rating_stars_heuristics() -> None:
+    items = json.loads(
+        (TEST_DATA_ROOT / "rating_values.json").read_text(encoding="utf8")
+    )
+    nodes = [fromstring(item["parent_html"]) for item in items[::10]]
+    expected = [extract_rating_stars(node) for node in nodes]
+    with instrumentation.recording():
+        assert [extract_rating_stars(node) for node in nodes] == expected
+    stats = instrumentation.snapshot()
+    subnodes = sum(len(list(node.iter())) for node in nodes)
+    for name in ["attrib", "img", "class", "nodes", "style_width"]:
+        assert stats[f"extract_rating_stars.{name}"]["calls"] == len(nodes)
+        assert stats[f"extract_rating_stars.{name}"]["total_size"] == subnodes
+    assert stats["extract_rating_stars"]["calls"] == len(nodes)
+
+
+def test_breadcrumbs_heuristics() -> None:
+    with instrumentation.recording():
+        extract_breadcrumbs(
+            fromstring("<div><a href='/a'>A</a> / <a href='/b'>B</a></div>"),
+            base_url=None,
+        )
+        extract_breadcrumbs(
+            fromstring(
+                "<ol><li itemtype='http://schema.org/ListItem'><a>A</a></li>"
+                "<li itemtype='http://schema.org/ListItem'><a>B</a></li></ol>"
+            ),
+            base_url=None,
+        )
+    stats = instrumentation.snapshot()
+    assert stats["extract_breadcrumbs"]["calls"] == 2
+    assert stats["extract_breadcrumbs.postprocess_separators"]["calls"] == 1
+    assert stats["extract_breadcrumbs.postprocess_separators"]["total_size"] == 2
+    assert stats["extract_breadcrumbs.postprocess_markup"]["calls"] == 1
+
+
+def test_recording_nested() -> None:
+    with instrumentation.recording():
+        extract_price("1")
+        with instrumentation.recording(reset_stats=False):
+            extract_price("2")
+        assert instrumentation.is_enabled()
+        extract_price("3")
+    assert not instrumentation.is_enabled()
+    assert instrumentation.snapshot()["extract_price"]["calls"] == 3
+
+
+def test_exception() -> None:
+    with instrumentation.recording(), pytest.raises(AttributeError):
+        extract_price(123)  # type: ignore[arg-type]
+    assert instrumentation.snapshot()["extract_price"]["calls"] == 1
+
+
+def test_threads() -> None:
+    instrumentation.reset()
+
+    def record() -> None:
+        for _ in range(1000):
+            instrumentation.record("test", 10, 2)
+
+    threads = [threading.Thread(target=record) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert instrumentation.snapshot() == {
+        "test": {
+            "calls": 8000,
+            "total_time": 8000 * 10 / 1e9,
+            "max_time": 10 / 1e9,
+            "total_size": 16000,
+        }
+    }
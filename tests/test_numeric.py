@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import json
+import random
+import re
+
+import pytest
+
+from tests.utils import TEST_DATA_ROOT
+from zyte_parsers.numeric import (
+    MAX_CACHED_LENGTH,
+    rating_numbers,
+    review_numbers,
+    star_numbers,
+)
+
+# The regular expressions the extractors used before the tokenizer.
+RATING_REGEX = re.compile(r"\d*,\d+|\d*\.\d+|\d+")
+REVIEW_REGEX = re.compile(r"\d+?,\d+|\d+? \d+|\d+")
+STAR_REGEX = re.compile(r"\d+[.\-_,]?\d*")
+BRACKETS_REGEX = re.compile(r"\((.*?)\)")
+
+
+def _check(text: str) -> None:
+    assert rating_numbers(text) == RATING_REGEX.findall(text)
+    assert review_numbers(text) == REVIEW_REGEX.findall(text)
+    assert star_numbers(text) == STAR_REGEX.findall(text)
+    brackets = BRACKETS_REGEX.search(text)
+    expected = REVIEW_REGEX.findall(brackets.group(1)) if brackets else []
+    assert review_numbers(text, in_brackets=True) == expected
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "",
+        "4.5 out of 5 stars (1,234 reviews)",
+        "1,2,3.4.5",
+        ".5 ,5 5. 5,",
+        "1 234 567",
+        "(1\n2) (3)",
+        "(1 2",
+        "() 1 2",
+        "star-4-5 star_4_5 star4,5",
+        "٣.٥ من ٥",
+        "1" * (MAX_CACHED_LENGTH + 1) + ",2",
+    ],
+)
+def test_tokenizer(text: str) -> None:
+    _check(text)
+
+
+def test_tokenizer_fixtures() -> None:
+    for name in ("rating_values.json", "brand_values.json"):
+        for item in json.loads((TEST_DATA_ROOT / name).read_text("utf8")):
+            for value in item.values():
+                if isinstance(value, str):
+                    _check(value)
+
+
+def test_tokenizer_random() -> None:
+    rng = random.Random(0)  # noqa: S311
+    alphabet = "0123456789,. -_()x\n٣"
+    for _ in range(20_000):
+        _check("".join(rng.choice(alphabet) for _ in range(rng.randint(0, 16))))
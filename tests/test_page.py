@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+from decimal import Decimal
+
+from lxml.html import fromstring
+from parsel import Selector
+
+from zyte_parsers import (
+    AggregateRating,
+    Breadcrumb,
+    Budget,
+    Gtin,
+    PageFields,
+    extract_page,
+)
+from zyte_parsers.page import _score_page
+
+PRODUCT_PAGE = """
+<html><head><title>Product</title>
+<script>var price = "$1.00";</script></head>
+<body>
+<header><a href="/cart">Cart: $0.00</a></header>
+<ol itemscope itemtype="https://schema.org/BreadcrumbList">
+  <li itemprop="itemListElement" itemscope itemtype="https://schema.org/ListItem">
+    <a itemprop="item" href="/"><span itemprop="name">Home</span></a> /
+  </li>
+  <li itemprop="itemListElement" itemscope itemtype="https://schema.org/ListItem">
+    <a itemprop="item" href="/shoes"><span itemprop="name">Shoes</span></a>
+  </li>
+</ol>
+<div itemscope itemtype="https://schema.org/Product">
+  <h1 itemprop="name">Running shoe</h1>
+  <div class="product-price">
+    <del class="old-price">$29.99</del>
+    <span itemprop="price" content="19.99">$19.99</span>
+  </div>
+  <div class="rating"><span itemprop="ratingValue">4.5</span> out of 5</div>
+  <meta itemprop="gtin13" content="7350053850019">
+</div>
+<section class="related">
+  <div class="product-tile"><span class="price">$5.00</span></div>
+  <div class="product-tile"><span class="price">$7.00</span></div>
+</section>
+</body></html>
+"""
+
+
+def test_extract_page() -> None:
+    page = extract_page(fromstring(PRODUCT_PAGE), "http://example.com")
+    assert page.breadcrumbs == (
+        Breadcrumb(name="Home", url="http://example.com/"),
+        Breadcrumb(name="Shoes", url="http://example.com/shoes"),
+    )
+    assert page.aggregateRating == AggregateRating(bestRating=5.0, ratingValue=4.5)
+    assert page.price is not None
+    assert page.price.amount == Decimal("19.99")
+    assert page.gtin == Gtin("gtin13", "7350053850019")
+
+
+def test_extract_page_selector() -> None:
+    page = extract_page(Selector(text=PRODUCT_PAGE), None)
+    assert page.gtin == Gtin("gtin13", "7350053850019")
+
+
+def test_extract_page_empty() -> None:
+    assert extract_page(fromstring("<p>Nothing to see here</p>"), None) == PageFields()
+
+
+def test_extract_page_fallback() -> None:
+    # The best candidate has no price, so the next one is used.
+    root = fromstring('<div><p class="price">Call us</p><p>Now $10</p></div>')
+    page = extract_page(root, None)
+    assert page.price is not None
+    assert page.price.amount == Decimal(10)
+    assert extract_page(root, None, max_candidates=1).price is None
+
+
+def test_score_page_missing_fields() -> None:
+    # Fields found in structured data are not scored.
+    root = fromstring(PRODUCT_PAGE)
+    scores = _score_page(root, ["price"])
+    assert scores.by_field["price"]
+    assert not scores.by_field["breadcrumbs"]
+    assert not scores.by_field["aggregateRating"]
+    assert not scores.by_field["gtin"]
+    budget = Budget()
+    assert not any(_score_page(root, [], budget).by_field.values())
+    assert budget.nodes == 0
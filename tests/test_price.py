@@ -7,7 +7,7 @@ from lxml.html import fromstring
 from parsel import Selector
 from price_parser import Price
 
-from zyte_parsers.price import extract_price
+from zyte_parsers.price import PriceCache, extract_price
 
 
 @pytest.mark.parametrize(
@@ -38,3 +38,23 @@ def test_extract_price_types() -> None:
     assert expected == extract_price(value)
     assert expected == extract_price(fromstring(f"<p>{value}</p>"))
     assert expected == extract_price(Selector(text=f"<p>{value}</p>"))
+
+
+def test_extract_price_cache() -> None:
+    cache = PriceCache(maxsize=2)
+    result = extract_price("$23.5", cache=cache)
+    assert result == Price(Decimal("23.5"), "$", "23.5")
+    assert cache.info().misses == 1
+
+    cached = extract_price(fromstring("<p>$23.5</p>"), cache=cache)
+    assert cached == result
+    assert cached is not result
+    assert cache.info().hits == 1
+
+    assert extract_price("23.5", currency_hint="USD", cache=cache).currency == "USD"
+    assert extract_price("23.5", currency_hint="EUR", cache=cache).currency == "EUR"
+    assert cache.info().misses == 3
+    assert cache.info().currsize == 2
+
+    cache.clear()
+    assert cache.info().currsize == cache.info().hits == cache.info().misses == 0
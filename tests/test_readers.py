@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import gzip
+import io
+import json
+import zlib
+from typing import TYPE_CHECKING, cast
+
+import pytest
+
+from zyte_parsers import extract_breadcrumbs
+from zyte_parsers.readers import open_archive, read_jsonl, read_warc, read_warc_html
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+HTML = '<nav><a href="/">Home</a> / <a href="c">Category</a></nav>'
+
+
+def _warc_record(record_type: str, url: str, content_type: str, block: bytes) -> bytes:
+    headers = (
+        "WARC/1.1\r\n"
+        f"WARC-Type: {record_type}\r\n"
+        f"WARC-Target-URI: {url}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {len(block)}\r\n"
+        "\r\n"
+    )
+    return headers.encode() + block + b"\r\n\r\n"
+
+
+def _response(
+    url: str,
+    body: bytes,
+    *,
+    status: str = "200 OK",
+    headers: str = "Content-Type: text/html; charset=utf-8\r\n",
+) -> bytes:
+    block = f"HTTP/1.1 {status}\r\n{headers}\r\n".encode("latin-1") + body
+    return _warc_record("response", url, "application/http; msgtype=response", block)
+
+
+def _zstd_compress(data: bytes) -> bytes:
+    try:
+        from compression import zstd  # noqa: PLC0415
+    except ImportError:
+        zstd = pytest.importorskip("zstandard")
+    return cast("bytes", zstd.compress(data))
+
+
+def _urls(source: io.BytesIO) -> list[str]:
+    return [url for url, _ in read_warc(source)]
+
+
+def test_read_warc() -> None:
+    data = b"".join(
+        [
+            _warc_record("warcinfo", "", "application/warc-fields", b"software: x\r\n"),
+            _warc_record(
+                "request",
+                "http://example.com/a",
+                "application/http; msgtype=request",
+                b"GET /a HTTP/1.1\r\n\r\n",
+            ),
+            _response("http://example.com/a/1", HTML.encode()),
+            _response(
+                "http://example.com/image.png",
+                b"\x89PNG",
+                headers="Content-Type: image/png\r\n",
+            ),
+            _response("http://example.com/missing", b"<p>Not found</p>", status="404"),
+            _response("http://example.com/moved", b"", status="301 Moved"),
+            _warc_record(
+                "revisit",
+                "http://example.com/a/1",
+                "application/http; msgtype=response",
+                b"HTTP/1.1 200 OK\r\nContent-Type: text/html\r\n\r\n",
+            ),
+            _warc_record(
+                "resource", "<http://example.com/b/2>", "text/html", HTML.encode()
+            ),
+        ]
+    )
+    results = list(read_warc(io.BytesIO(data)))
+    assert [url for url, _ in results] == [
+        "http://example.com/a/1",
+        "http://example.com/b/2",
+    ]
+    breadcrumbs = [extract_breadcrumbs(tree, base_url=url) for url, tree in results]
+    assert [b[1].url if b else None for b in breadcrumbs] == [
+        "http://example.com/a/c",
+        "http://example.com/b/c",
+    ]
+
+
+def test_read_warc_gzip(tmp_path: Path) -> None:
+    # .warc.gz files have a gzip member per record.
+    records = [_response(f"http://example.com/{i}", HTML.encode()) for i in range(3)]
+    path = tmp_path / "crawl.warc.gz"
+    path.write_bytes(b"".join(gzip.compress(record) for record in records))
+    assert [url for url, _ in read_warc(path)] == [
+        f"http://example.com/{i}" for i in range(3)
+    ]
+
+
+def test_read_warc_zstd() -> None:
+    data = _zstd_compress(_response("http://example.com", HTML.encode()))
+    assert _urls(io.BytesIO(data)) == ["http://example.com"]
+
+
+def test_read_warc_encodings() -> None:
+    html = "<p>Café</p>"
+    chunked = b"5\r\n<p>Ca\r\n6;ext=1\r\nf\xe9</p>\r\n0\r\n\r\n"
+    data = b"".join(
+        [
+            _response(
+                "http://example.com/latin-1",
+                html.encode("latin-1"),
+                headers="Content-Type: text/html; charset=iso-8859-1\r\n",
+            ),
+            _response(
+                "http://example.com/meta",
+                b'<meta charset="latin-1">' + html.encode("latin-1"),
+                headers="Content-Type: text/html\r\n",
+            ),
+            _response(
+                "http://example.com/gzip",
+                gzip.compress(html.encode()),
+                headers="Content-Type: text/html; charset=utf-8\r\n"
+                "Content-Encoding: gzip\r\n",
+            ),
+            _response(
+                "http://example.com/deflate",
+                zlib.compress(html.encode()),
+                headers="Content-Type: text/html; charset=utf-8\r\n"
+                "Content-Encoding: deflate\r\n",
+            ),
+            _response(
+                "http://example.com/chunked",
+                chunked,
+                headers="Content-Type: text/html; charset=iso-8859-1\r\n"
+                "Transfer-Encoding: chunked\r\n",
+            ),
+            _response(
+                "http://example.com/dechunked",
+                html.encode(),
+                headers="Content-Type: text/html; charset=utf-8\r\n"
+                "Transfer-Encoding: chunked\r\n",
+            ),
+            _response(
+                "http://example.com/brotli",
+                b"\x0b\x02\x80<p>Caf\xc3\xa9</p>\x03",
+                headers="Content-Type: text/html\r\nContent-Encoding: br\r\n",
+            ),
+            _response(
+                "http://example.com/invalid-gzip",
+                b"<p>Caf\xc3\xa9</p>",
+                headers="Content-Type: text/html\r\nContent-Encoding: gzip\r\n",
+            ),
+        ]
+    )
+    results = {url: tree.text_content() for url, tree in read_warc(io.BytesIO(data))}
+    assert results == {
+        f"http://example.com/{name}": "Café"
+        for name in ("latin-1", "meta", "gzip", "deflate", "chunked", "dechunked")
+    }
+
+
+def test_read_warc_xml_declaration() -> None:
+    body = b'<?xml version="1.0" encoding="utf-8"?><html><p>Hello</p></html>'
+    data = _response("http://example.com", body)
+    ((_, tree),) = read_warc(io.BytesIO(data))
+    assert tree.text_content() == "Hello"
+
+
+def test_read_warc_html(tmp_path: Path) -> None:
+    path = tmp_path / "crawl.warc.gz"
+    path.write_bytes(gzip.compress(_response("http://example.com", HTML.encode())))
+    assert list(read_warc_html(path)) == [("http://example.com", HTML)]
+
+
+def test_read_warc_invalid() -> None:
+    with pytest.raises(ValueError, match="Expected the start of a WARC record"):
+        list(read_warc(io.BytesIO(b"<html></html>")))
+    with pytest.raises(ValueError, match="Invalid Content-Length"):
+        list(read_warc(io.BytesIO(b"WARC/1.1\r\nWARC-Type: response\r\n\r\n")))
+
+
+def test_read_warc_lazy() -> None:
+    data = b"".join(
+        _response(f"http://example.com/{i}", HTML.encode()) for i in range(100)
+    )
+    source = io.BytesIO(data)
+    results = read_warc(source)
+    next(results)
+    assert source.tell() < len(data) / 10
+
+
+def test_read_jsonl(tmp_path: Path) -> None:
+    lines = [
+        {"url": "http://example.com/a/1", "html": HTML},
+        {"url": "http://example.com/image.png", "body": "..."},
+        {"url": "http://example.com/empty", "html": ""},
+        {"html": "<p>No URL</p>"},
+    ]
+    data = "".join(json.dumps(line) + "\n\n" for line in lines).encode()
+    for name, content in (
+        ("pages.jsonl", data),
+        ("pages.jsonl.gz", gzip.compress(data)),
+    ):
+        path = tmp_path / name
+        path.write_bytes(content)
+        results = list(read_jsonl(path))
+        assert [url for url, _ in results] == ["http://example.com/a/1", None]
+        assert results[0][1].base_url == "http://example.com/a/1"
+
+
+def test_read_jsonl_keys() -> None:
+    data = b'{"link": "http://example.com", "body": "<p>Hello</p>"}'
+    ((url, tree),) = read_jsonl(io.BytesIO(data), url_key="link", html_key="body")
+    assert url == "http://example.com"
+    assert tree.text_content() == "Hello"
+
+
+def test_read_jsonl_zstd() -> None:
+    data = _zstd_compress(b'{"url": "http://example.com", "html": "<p>a</p>"}\n' * 3)
+    assert [url for url, _ in read_jsonl(io.BytesIO(data))] == [
+        "http://example.com"
+    ] * 3
+
+
+def test_open_archive(tmp_path: Path) -> None:
+    path = tmp_path / "data"
+    for content in (b"", b"a", b"\x1f", b"plain text\n"):
+        path.write_bytes(content)
+        with open_archive(path) as f:
+            assert f.read() == content
+        with path.open("rb") as raw, open_archive(raw) as f:
+            assert f.read() == content
+    path.write_bytes(gzip.compress(b"plain text\n"))
+    with path.open("rb") as raw:
+        with open_archive(raw) as f:
+            assert f.read() == b"plain text\n"
+        # File objects are not closed.
+        assert not raw.closed
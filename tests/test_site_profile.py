@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import json
+from typing import Any
+
+import pytest
+from lxml.html import fromstring
+
+from tests.utils import TEST_DATA_ROOT
+from zyte_parsers import (
+    Breadcrumb,
+    Budget,
+    SiteProfile,
+    extract_breadcrumbs,
+    extract_rating_stars,
+    instrumentation,
+)
+from zyte_parsers.site_profile import ProfileInfo
+
+from .test_star_rating import RATING_STARS_TEST_CASES
+
+MARKUP_BREADCRUMBS = (
+    '<div><ol itemscope itemtype="https://schema.org/BreadcrumbList">'
+    '<li itemprop="itemListElement" itemscope itemtype="https://schema.org/ListItem">'
+    '<a itemprop="item" href="/"><span itemprop="name">Home</span></a></li>'
+    '<li itemprop="itemListElement" itemscope itemtype="https://schema.org/ListItem">'
+    '<a itemprop="item" href="/c"><span itemprop="name">Category</span></a></li>'
+    "<li><span>Product</span></li></ol>"
+    f"<p>{'<a href=/other>Unrelated</a>' * 100}</p></div>"
+)
+SEPARATOR_BREADCRUMBS = '<nav><a href="/">Home</a> / <a href="/c">Category</a></nav>'
+
+
+def test_info() -> None:
+    profile = SiteProfile()
+    assert profile.info() == {}
+    assert profile.strategy("extract_rating_stars") is None
+    profile.record("extract_rating_stars", "class", hit=False)
+    profile.record("extract_rating_stars", "class", hit=True)
+    profile.record("extract_rating_stars", None, hit=False)
+    profile.record("extract_rating_stars", "class", hit=True)
+    assert profile.strategy("extract_rating_stars") == "class"
+    info = profile.info()["extract_rating_stars"]
+    assert info == ProfileInfo(strategy="class", hits=2, misses=2)
+    assert info.hit_rate == 0.5
+    profile.clear()
+    assert profile.info() == {}
+    assert profile.strategy("extract_rating_stars") is None
+
+
+def test_hit_rate_without_calls() -> None:
+    assert ProfileInfo(strategy=None, hits=0, misses=0).hit_rate == 0.0
+
+
+def test_extract_rating_stars() -> None:
+    profile = SiteProfile()
+    four, three = (
+        fromstring('<p class="stars-4" title="4 stars">*</p>'),
+        fromstring('<p class="stars-3" title="3 stars">*</p>'),
+    )
+    assert extract_rating_stars(four, profile=profile) == 4.0
+    assert profile.strategy("extract_rating_stars") == "attrib"
+    assert extract_rating_stars(three, profile=profile) == 3.0
+    assert profile.info()["extract_rating_stars"] == ProfileInfo("attrib", 1, 1)
+
+    # The strategy tried first finds nothing, so all of them are run, and the
+    # one that worked is tried first next time.
+    html = '<div><span style="width: 60%"></span></div>'
+    assert extract_rating_stars(fromstring(html), profile=profile) == 3.0
+    assert profile.info()["extract_rating_stars"] == ProfileInfo("style_width", 1, 2)
+
+    # Without a result, the strategy is kept.
+    assert extract_rating_stars(fromstring("<p>No stars</p>"), profile=profile) is None
+    assert profile.info()["extract_rating_stars"] == ProfileInfo("style_width", 1, 3)
+
+
+def test_extract_rating_stars_unconfirmed() -> None:
+    # Values that no other strategy confirms are decided by all strategies.
+    profile = SiteProfile()
+    profile.record("extract_rating_stars", "class", hit=False)
+    html = '<div><p class="stars-4">*</p><p title="3 stars">*</p></div>'
+    assert extract_rating_stars(fromstring(html)) is None
+    assert extract_rating_stars(fromstring(html), profile=profile) is None
+    html = '<p class="stars-4" title="3 stars">*</p>'
+    assert extract_rating_stars(fromstring(html), profile=profile) is None
+    node = fromstring('<p class="stars-4">*</p>')
+    assert extract_rating_stars(node, profile=profile) == 4.0
+    assert profile.info()["extract_rating_stars"] == ProfileInfo("class", 0, 4)
+
+
+def test_extract_rating_stars_best_rating() -> None:
+    # The value found by the strategy tried first is the best rating, which
+    # the other strategies can contradict, so all of them are run.
+    profile = SiteProfile()
+    learn = f"<span>{'<i class=on></i>' * 3}{'<i class=off></i>' * 2}</span>"
+    assert extract_rating_stars(fromstring(learn), profile=profile) == 3.0
+    assert profile.strategy("extract_rating_stars") == "nodes"
+    html = (
+        f'<div><div class=bg>{"<i></i>" * 5}</div><div style="width:60%"></div></div>'
+    )
+    assert extract_rating_stars(fromstring(html)) == 3.0
+    assert extract_rating_stars(fromstring(html), profile=profile) == 3.0
+    assert profile.info()["extract_rating_stars"] == ProfileInfo("style_width", 0, 2)
+
+
+def test_extract_rating_stars_stops_early() -> None:
+    html = (
+        f'<div><p class="stars-4" title="4 stars">*</p>{"<p>Unrelated</p>" * 100}</div>'
+    )
+    profile = SiteProfile()
+    profile.record("extract_rating_stars", "class", hit=False)
+    budget = Budget(max_nodes=1000)
+    assert extract_rating_stars(fromstring(html), profile=profile, budget=budget) == 4.0
+    assert budget.nodes == 2
+
+
+def test_extract_rating_stars_instrumented() -> None:
+    profile = SiteProfile()
+    with instrumentation.recording():
+        extract_rating_stars(fromstring('<p class="stars-4">*</p>'), profile=profile)
+    stats = instrumentation.snapshot()
+    assert stats["extract_rating_stars.class"]["calls"] == 1
+    assert profile.strategy("extract_rating_stars") == "class"
+
+
+@pytest.mark.parametrize("case", RATING_STARS_TEST_CASES)
+def test_extract_rating_stars_same_results(case: dict[str, Any]) -> None:
+    if case.get("xfail"):
+        pytest.skip()
+    node = fromstring(case["html"])
+    profile = SiteProfile()
+    assert extract_rating_stars(node, profile=profile) == case["expected"]
+    assert extract_rating_stars(node, profile=profile) == case["expected"]
+
+
+def test_extract_breadcrumbs_markup() -> None:
+    profile = SiteProfile()
+    expected = (
+        Breadcrumb("Home", "http://example.com/"),
+        Breadcrumb("Category", "http://example.com/c"),
+        Breadcrumb("Product"),
+    )
+    budgets = []
+    for _ in range(2):
+        budget = Budget(max_nodes=10_000)
+        result = extract_breadcrumbs(
+            fromstring(MARKUP_BREADCRUMBS),
+            base_url="http://example.com",
+            profile=profile,
+            budget=budget,
+        )
+        assert result == expected
+        budgets.append(budget)
+    assert profile.info()["extract_breadcrumbs"] == ProfileInfo("markup", 1, 1)
+    # The unrelated links after the breadcrumbs are not visited.
+    assert budgets[1].nodes < budgets[0].nodes / 10
+
+
+def test_extract_breadcrumbs_separators() -> None:
+    profile = SiteProfile()
+    for _ in range(2):
+        extract_breadcrumbs(
+            fromstring(SEPARATOR_BREADCRUMBS),
+            base_url="http://example.com",
+            profile=profile,
+        )
+    assert profile.info()["extract_breadcrumbs"] == ProfileInfo("separators", 0, 2)
+
+    # After markup was used, pages without markup are still supported.
+    profile.record("extract_breadcrumbs", "markup", hit=False)
+    assert extract_breadcrumbs(
+        fromstring(SEPARATOR_BREADCRUMBS), base_url=None, profile=profile
+    ) == (Breadcrumb("Home", "/"), Breadcrumb("Category", "/c"))
+    assert profile.strategy("extract_breadcrumbs") == "separators"
+
+
+def test_extract_breadcrumbs_same_results() -> None:
+    items = json.loads(
+        (TEST_DATA_ROOT / "breadcrumb_items_extract.json").read_text(encoding="utf8")
+    )
+    snippets_dir = TEST_DATA_ROOT / "breadcrumb_items_snippets"
+    for item in items:
+        node = fromstring((snippets_dir / item["snippet_path"]).read_text("utf8"))
+        profile = SiteProfile()
+        profile.record("extract_breadcrumbs", "markup", hit=False)
+        assert extract_breadcrumbs(
+            node, base_url=item["base_url"], profile=profile
+        ) == extract_breadcrumbs(node, base_url=item["base_url"])
+
+
+def test_extract_breadcrumbs_markup_not_contiguous() -> None:
+    def item(name: str) -> str:
+        return (
+            '<li itemprop="itemListElement" itemscope '
+            'itemtype="https://schema.org/ListItem">'
+            f'<a itemprop="item" href="/{name}"><span itemprop="name">{name}</span>'
+            "</a></li>"
+        )
+
+    profile = SiteProfile()
+    learn = f"<ol><li><a href='/'>Home</a></li>{item('A')}{item('B')}</ol>"
+    extract_breadcrumbs(fromstring(learn), base_url=None, profile=profile)
+    assert profile.strategy("extract_breadcrumbs") == "markup"
+    html = (
+        f"<ol><li><a href='/'>Home</a></li>{item('A')}<li><a href='/X'>X</a></li>"
+        f"{item('B')}{item('C')}<li>Product</li></ol>"
+    )
+    expected = extract_breadcrumbs(fromstring(html), base_url=None)
+    assert expected is not None
+    assert [b.name for b in expected] == ["Home", "A", "B", "C", "Product"]
+    assert (
+        extract_breadcrumbs(fromstring(html), base_url=None, profile=profile)
+        == expected
+    )
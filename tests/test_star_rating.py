@@ -3,9 +3,13 @@ from __future__ import annotations
 from typing import Any
 
 import pytest
-from lxml.html import fromstring
+from lxml.html import fromstring, tostring
 
-from zyte_parsers.star_rating import extract_rating_stars
+from zyte_parsers.star_rating import (
+    _extract_rating_stars_attrib,
+    _extract_rating_stars_nodes,
+    extract_rating_stars,
+)
 
 RATING_STARS_TEST_CASES = [
     {
@@ -378,3 +382,56 @@ def test_extract_rating_stars(case: dict[str, Any]) -> None:
     node = fromstring(case["html"])
     value = extract_rating_stars(node)
     assert value == case["expected"]
+
+
+@pytest.mark.parametrize(
+    ("attribs", "expected"),
+    [
+        ({}, None),
+        ({"title": ""}, None),
+        ({"title": "4  stars"}, 4.0),
+        ({"title": "Rated 4.5 out\nof 5"}, 4.5),
+        ({"aria-label": "customer rated this 3 out of 5"}, 3.0),
+        # the pattern order takes precedence over the attribute order
+        ({"title": "customer rated this 3 out of 5", "alt": "4 stars"}, 4.0),
+        ({"title": "2", "aria-label": "rated 3 of 5"}, 3.0),
+        ({"title": "2", "alt": "3"}, 2.0),
+    ],
+)
+def test_extract_rating_stars_attrib(
+    attribs: dict[str, str], expected: float | None
+) -> None:
+    node = fromstring("<span></span>")
+    node.attrib.update(attribs)
+    assert _extract_rating_stars_attrib(node) == expected
+
+
+@pytest.mark.parametrize(
+    ("html", "expected"),
+    [
+        ("<i></i><i></i><i></i><i></i><i></i>", 5.0),
+        ("<i>a</i> <i>a</i> <i>a</i> <i>b</i> <i>b</i> ", 3.0),
+        # trailing whitespace after the last star is ignored, other text is not
+        ("<i></i> <i></i> <i></i> <i></i> <i></i>x", 4.0),
+        (
+            "".join(
+                f'<i class="{cls}" ng-class="{{on:r>{i}}}"></i>'
+                for i, cls in enumerate(["on", "on", "off", "off", "off"])
+            ),
+            2.0,
+        ),
+        (
+            '<i><b ng-class="x">*</b> </i>' * 2
+            + '<i><b ng-class="y">*</b> <!-- empty --></i>' * 3,
+            2.0,
+        ),
+        ('<i><b class="a"></b></i><i><b class="b"></b></i>' * 2 + "<i></i>", None),
+        ("<i></i><i></i><i></i><i></i>", None),
+        ("<i></i><i></i><i></i><i></i><b></b>", None),
+    ],
+)
+def test_extract_rating_stars_nodes(html: str, expected: float | None) -> None:
+    node = fromstring(f"<div>{html}</div>")
+    markup = tostring(node)
+    assert _extract_rating_stars_nodes(node) == expected
+    assert tostring(node) == markup
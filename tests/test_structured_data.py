@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import json
+import pickle
+from typing import Any
+
+import pytest
+from lxml.html import fromstring
+from parsel import Selector
+
+from zyte_parsers import (
+    AggregateRating,
+    Breadcrumb,
+    Gtin,
+    StructuredData,
+    extract_page,
+    extract_structured_data,
+)
+from zyte_parsers import structured_data as structured_data_module
+
+
+def _json_ld_page(*data: Any) -> str:
+    scripts = "".join(
+        f'<script type="application/ld+json">{json.dumps(item)}</script>'
+        for item in data
+    )
+    return f"<html><head>{scripts}</head><body><p>Product</p></body></html>"
+
+
+PRODUCT = {
+    "@context": "https://schema.org",
+    "@type": "Product",
+    "name": "Running shoe",
+    "gtin13": "7350053850019",
+    "aggregateRating": {
+        "@type": "AggregateRating",
+        "ratingValue": "4.5",
+        "bestRating": "5",
+        "reviewCount": "89",
+    },
+}
+
+BREADCRUMB_LIST = {
+    "@context": "https://schema.org",
+    "@type": "BreadcrumbList",
+    "itemListElement": [
+        {
+            "@type": "ListItem",
+            "position": 2,
+            "name": "Shoes",
+            "item": "https://example.com/shoes",
+        },
+        {"@type": "ListItem", "position": 1, "item": {"@id": "/", "name": "Home"}},
+        {"@type": "ListItem", "position": 3, "name": "Running shoe"},
+    ],
+}
+
+MICRODATA_PAGE = """
+<html><body>
+<ol itemscope itemtype="https://schema.org/BreadcrumbList">
+  <li itemprop="itemListElement" itemscope itemtype="https://schema.org/ListItem">
+    <a itemprop="item" href="/"><span itemprop="name">Home</span></a>
+    <meta itemprop="position" content="1">
+  </li>
+  <li itemprop="itemListElement" itemscope itemtype="https://schema.org/ListItem">
+    <a itemprop="item" href="/shoes"><span itemprop="name">Shoes</span></a>
+    <meta itemprop="position" content="2">
+  </li>
+</ol>
+<div itemscope itemtype="https://schema.org/Product">
+  <div itemprop="aggregateRating" itemscope
+       itemtype="https://schema.org/AggregateRating">
+    <span itemprop="ratingValue">8</span>/<span itemprop="bestRating">10</span>
+  </div>
+  <span itemprop="gtin8">96385074</span>
+</div>
+</body></html>
+"""
+
+
+def test_json_ld() -> None:
+    data = extract_structured_data(
+        fromstring(_json_ld_page(PRODUCT, BREADCRUMB_LIST)), "https://example.com/p"
+    )
+    assert data == StructuredData(
+        breadcrumbs=(
+            Breadcrumb(name="Home", url="https://example.com/"),
+            Breadcrumb(name="Shoes", url="https://example.com/shoes"),
+            Breadcrumb(name="Running shoe", url=None),
+        ),
+        aggregateRating=AggregateRating(bestRating=5.0, ratingValue=4.5),
+        gtin=Gtin("gtin13", "7350053850019"),
+    )
+
+
+def test_json_ld_graph() -> None:
+    page = _json_ld_page(
+        {"@graph": [BREADCRUMB_LIST, {**PRODUCT, "@type": ["Product"]}]}
+    )
+    data = extract_structured_data(fromstring(page))
+    assert data.breadcrumbs is not None
+    assert [breadcrumb.url for breadcrumb in data.breadcrumbs] == [
+        "/",
+        "https://example.com/shoes",
+        None,
+    ]
+    assert data.aggregateRating == AggregateRating(bestRating=5.0, ratingValue=4.5)
+    assert data.gtin == Gtin("gtin13", "7350053850019")
+
+
+def test_json_ld_invalid() -> None:
+    page = _json_ld_page(PRODUCT).replace(
+        "<script", "<script>{not json</script><script", 1
+    )
+    data = extract_structured_data(fromstring(page))
+    assert data.gtin == Gtin("gtin13", "7350053850019")
+
+
+@pytest.mark.parametrize(
+    "product",
+    [
+        {"@type": "Product", "aggregateRating": {"@type": "AggregateRating"}},
+        {"@type": "Product", "gtin13": ""},
+        {"@type": "Product", "gtin13": "not a gtin"},
+        {"@type": "BreadcrumbList", "itemListElement": [{"position": 1}]},
+    ],
+)
+def test_json_ld_missing(product: dict[str, Any]) -> None:
+    assert extract_structured_data(fromstring(_json_ld_page(product))) == (
+        StructuredData()
+    )
+
+
+def test_microdata() -> None:
+    data = extract_structured_data(fromstring(MICRODATA_PAGE), "https://example.com")
+    assert data == StructuredData(
+        breadcrumbs=(
+            Breadcrumb(name="Home", url="https://example.com/"),
+            Breadcrumb(name="Shoes", url="https://example.com/shoes"),
+        ),
+        aggregateRating=AggregateRating(bestRating=10.0, ratingValue=8.0),
+        gtin=Gtin("gtin8", "96385074"),
+    )
+
+
+def test_json_ld_over_microdata() -> None:
+    script = f'<script type="application/ld+json">{json.dumps(PRODUCT)}</script>'
+    page = MICRODATA_PAGE.replace("<body>", f"<body>{script}", 1)
+    data = extract_structured_data(fromstring(page))
+    assert data.gtin == Gtin("gtin13", "7350053850019")
+    assert data.breadcrumbs is not None
+    assert data.breadcrumbs[0] == Breadcrumb(name="Home", url="/")
+
+
+def test_selector_and_subtree() -> None:
+    selector = Selector(text=_json_ld_page(PRODUCT))
+    assert extract_structured_data(selector).gtin == Gtin("gtin13", "7350053850019")
+    # Structured data is read from the whole page.
+    paragraph = selector.css("p")[0]
+    assert extract_structured_data(paragraph).gtin == Gtin("gtin13", "7350053850019")
+
+
+def test_cache(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls = []
+    parse = structured_data_module._parse
+
+    def counting_parse(root: Any) -> StructuredData:
+        calls.append(root)
+        return parse(root)
+
+    monkeypatch.setattr(structured_data_module, "_parse", counting_parse)
+    root = fromstring(_json_ld_page(PRODUCT, BREADCRUMB_LIST))
+    first = extract_structured_data(root, "https://example.com")
+    second = extract_structured_data(root[1], "https://example.org")
+    assert len(calls) == 1
+    # Breadcrumb URLs are resolved with the base URL of each call.
+    assert first.breadcrumbs is not None
+    assert second.breadcrumbs is not None
+    assert first.breadcrumbs[0].url == "https://example.com/"
+    assert second.breadcrumbs[0].url == "https://example.org/"
+    extract_structured_data(fromstring(_json_ld_page(PRODUCT)))
+    assert len(calls) == 2
+
+
+def test_pickle() -> None:
+    data = extract_structured_data(fromstring(_json_ld_page(PRODUCT)))
+    assert pickle.loads(pickle.dumps(data)) == data  # noqa: S301
+
+
+def test_extract_page_prefers_structured_data() -> None:
+    page = _json_ld_page(PRODUCT).replace(
+        "<p>Product</p>",
+        '<p class="rating">2 out of 5</p><p>EAN: 96385074</p><p class="price">$10</p>',
+    )
+    fields = extract_page(fromstring(page), None)
+    assert fields.aggregateRating == AggregateRating(bestRating=5.0, ratingValue=4.5)
+    assert fields.gtin == Gtin("gtin13", "7350053850019")
+    # Not in the structured data, so found with the heuristics.
+    assert fields.breadcrumbs is None
+    assert fields.price is not None
+    assert fields.price.currency == "$"
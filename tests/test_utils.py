@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import contextvars
+import json
+import threading
+from typing import TYPE_CHECKING
+
+import html_text
+import pytest
+from lxml.html import HtmlElement, fromstring
+
+from zyte_parsers import extract_rating, extract_review_count, text_cache, utils
+from zyte_parsers.utils import extract_text
+
+from .utils import TEST_DATA_ROOT
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+
+def _count_extract_calls(monkeypatch: pytest.MonkeyPatch) -> list[object]:
+    calls: list[object] = []
+    original = utils._extract_text
+
+    def extract(node: HtmlElement, guess_layout: bool) -> str | None:
+        calls.append(node)
+        return original(node, guess_layout)
+
+    monkeypatch.setattr(utils, "_extract_text", extract)
+    return calls
+
+
+def test_text_cache(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls = _count_extract_calls(monkeypatch)
+    node = fromstring("<p>4.5 (23 reviews)</p>")
+
+    with text_cache():
+        assert extract_rating(node).ratingValue == 4.5
+        assert extract_review_count(node) == 23
+        assert extract_text(node, guess_layout=True) == "4.5 (23 reviews)"
+    assert calls.count(node) == 2  # once per guess_layout value
+
+    extract_text(node)
+    assert calls.count(node) == 3
+
+
+def test_text_cache_empty(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls = _count_extract_calls(monkeypatch)
+    node = fromstring("<p> </p>")
+    with text_cache():
+        assert extract_text(node) is None
+        assert extract_text(node) is None
+    assert len(calls) == 1
+
+
+def test_text_cache_maxsize(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls = _count_extract_calls(monkeypatch)
+    a, b, c = fromstring("<div><p>a</p><p>b</p><p>c</p></div>")
+    with text_cache(maxsize=2):
+        for node in (a, b, a, c, a, b):
+            extract_text(node)
+    # b is evicted when c is added, as a was used more recently
+    assert calls == [a, b, c, b]
+
+
+def test_text_cache_nested(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls = _count_extract_calls(monkeypatch)
+    node = fromstring("<p>a</p>")
+    with text_cache():
+        extract_text(node)
+        with text_cache():
+            extract_text(node)
+        extract_text(node)
+    assert len(calls) == 1
+
+
+def test_text_cache_inherited_context(monkeypatch: pytest.MonkeyPatch) -> None:
+    # Threads can inherit the context of the thread that starts them, e.g.
+    # by default on free-threaded builds, but not its text cache.
+    calls = _count_extract_calls(monkeypatch)
+    node = fromstring("<p>a</p>")
+    caches = []
+
+    def extract() -> None:
+        extract_text(node)
+        with text_cache():
+            caches.append(utils._TEXT_CACHE.get())
+            extract_text(node)
+            extract_text(node)
+
+    with text_cache():
+        extract_text(node)
+        thread = threading.Thread(
+            target=contextvars.copy_context().run, args=(extract,)
+        )
+        thread.start()
+        thread.join()
+        assert caches[0] is not utils._TEXT_CACHE.get()
+    assert len(calls) == 3
+
+
+def _corpus_nodes() -> Iterator[HtmlElement]:
+    for name in ("rating_values.json", "brand_values.json"):
+        for item in json.loads((TEST_DATA_ROOT / name).read_text("utf8")):
+            for key in ("html", "parent_html"):
+                if key in item:
+                    yield from fromstring(item[key]).iter()
+    for path in sorted((TEST_DATA_ROOT / "breadcrumb_items_snippets").rglob("*.html")):
+        yield from fromstring(path.read_text("utf8")).iter()
+
+
+EDGE_CASES = [
+    "<span>a<b>,</b>b<i>.</i> c<u>)</u>d</span>",
+    "<p>(<b>a</b>) a(<i>b</i>)<i> (</i>c</p>",
+    "<span>a <b> </b> b<b>\n</b>c\xa0<i>d</i></span>",
+    "<p>a<br>b<br/> c <wbr>d</p>",
+    "<div>a<span>b<!-- c -->d</span>e</div>",
+    "<div>a<span>b<script>c</script>d</span>e</div>",
+    "<div>a<p>b</p>c</div>",
+    "<td>a<img alt=b>c</td>",
+    "<span>  </span>",
+]
+
+
+@pytest.mark.parametrize("guess_layout", [False, True])
+def test_extract_text_fast_path(guess_layout: bool) -> None:
+    nodes = [*_corpus_nodes()]
+    for html in EDGE_CASES:
+        nodes.extend(fromstring(html).iter())
+    simple = 0
+    for node in nodes:
+        if not isinstance(node, HtmlElement):
+            continue
+        expected = html_text.extract_text(node, guess_layout=guess_layout) or None
+        assert extract_text(node, guess_layout=guess_layout) == expected
+        simple += utils._is_simple(node, guess_layout)
+    # Both paths are exercised.
+    assert 0 < simple < len(nodes)
+
+
+def test_thread_local_xpath() -> None:
+    xpath = utils.ThreadLocalXPath("string(//b)")
+    root = fromstring("<p>a <b>b</b></p>")
+    compiled = []
+
+    def evaluate() -> None:
+        assert xpath(root) == "b"
+        compiled.append(xpath._local.xpath)
+
+    threads = [threading.Thread(target=evaluate) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    evaluate()
+    assert len({id(compiled_xpath) for compiled_xpath in compiled}) == 4
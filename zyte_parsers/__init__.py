@@ -1,24 +1,89 @@
+from __future__ import annotations
+
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
+
 __version__ = "0.6.0"
 
-from .aggregate_rating import AggregateRating, extract_rating
-from .api import SelectorOrElement
-from .brand import extract_brand_name
-from .breadcrumbs import Breadcrumb, extract_breadcrumbs
-from .gtin import Gtin, extract_gtin
-from .price import extract_price
-from .review import extract_review_count
-from .star_rating import extract_rating_stars
+if TYPE_CHECKING:
+    from . import instrumentation
+    from .aggregate_rating import AggregateRating, extract_rating
+    from .api import SelectorOrElement
+    from .brand import extract_brand_name
+    from .breadcrumbs import Breadcrumb, extract_breadcrumbs
+    from .budget import Budget
+    from .fragment_cache import FragmentCache
+    from .gtin import Gtin, extract_gtin
+    from .page import PageFields, extract_page
+    from .price import PriceCache, extract_price
+    from .review import extract_review_count
+    from .site_profile import SiteProfile
+    from .star_rating import extract_rating_stars
+    from .structured_data import StructuredData, extract_structured_data
+    from .utils import text_cache
 
 __all__ = [
     "AggregateRating",
     "Breadcrumb",
+    "Budget",
+    "FragmentCache",
     "Gtin",
+    "PageFields",
+    "PriceCache",
     "SelectorOrElement",
+    "SiteProfile",
+    "StructuredData",
     "extract_brand_name",
     "extract_breadcrumbs",
     "extract_gtin",
+    "extract_page",
     "extract_price",
     "extract_rating",
     "extract_rating_stars",
     "extract_review_count",
+    "extract_structured_data",
+    "instrumentation",
+    "text_cache",
 ]
+
+# Submodules that define the public names. They are only imported when one
+# of their names is first used, so that e.g. using only extract_price does
+# not import the dependencies of the other extractors.
+_SUBMODULES = {
+    "AggregateRating": "aggregate_rating",
+    "Breadcrumb": "breadcrumbs",
+    "Budget": "budget",
+    "FragmentCache": "fragment_cache",
+    "Gtin": "gtin",
+    "PageFields": "page",
+    "PriceCache": "price",
+    "SelectorOrElement": "api",
+    "SiteProfile": "site_profile",
+    "StructuredData": "structured_data",
+    "extract_brand_name": "brand",
+    "extract_breadcrumbs": "breadcrumbs",
+    "extract_gtin": "gtin",
+    "extract_page": "page",
+    "extract_price": "price",
+    "extract_rating": "aggregate_rating",
+    "extract_rating_stars": "star_rating",
+    "extract_review_count": "review",
+    "extract_structured_data": "structured_data",
+    "instrumentation": "instrumentation",
+    "text_cache": "utils",
+}
+
+
+def __getattr__(name: str) -> Any:
+    try:
+        submodule = _SUBMODULES[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    module = import_module(f".{submodule}", __name__)
+    value = module if name == submodule else getattr(module, name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted({*globals(), *__all__})
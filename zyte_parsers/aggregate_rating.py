@@ -1,31 +1,48 @@
-import re
 from math import isnan
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 import attr
 from lxml.html import HtmlElement
 
-from .api import SelectorOrElement, input_to_element
+from .api import input_to_element
+from .budget import Budget
+from .instrumentation import instrumented
+from .numeric import rating_numbers
 from .utils import extract_text
 
+if TYPE_CHECKING:
+    from .api import SelectorOrElement
+else:
+    from .api import _RuntimeSelectorOrElement as SelectorOrElement
 
-@attr.s(frozen=True, auto_attribs=True)
+
+@attr.s(frozen=True, auto_attribs=True, slots=True)
 class AggregateRating:
     bestRating: float | None = None
     ratingValue: float | None = None
 
+    def __reduce__(
+        self,
+    ) -> "tuple[type[AggregateRating], tuple[float | None, float | None]]":
+        return type(self), (self.bestRating, self.ratingValue)
+
 
-POSSIBLE_BEST_RATINGS = {4.0, 5.0, 6.0, 10.0, 20.0, 100.0}
+POSSIBLE_BEST_RATINGS = frozenset({4.0, 5.0, 6.0, 10.0, 20.0, 100.0})
 
 
-def extract_rating(node: SelectorOrElement) -> AggregateRating:
+@instrumented("extract_rating")
+def extract_rating(
+    node: "SelectorOrElement", *, budget: "Budget | None" = None
+) -> AggregateRating:
     """Extract rating data from a node.
 
     :param node: Node that includes the rating data.
+    :param budget: A :class:`~zyte_parsers.Budget` to count the work
+        against.
     :return: AggregateRating item.
     """
     node = input_to_element(node)
-    node_text = extract_text(node)
+    node_text = extract_text(node, budget=budget)
     rating_value = None
     best_rating = None
     if node_text is None:
@@ -37,7 +54,7 @@ def extract_rating(node: SelectorOrElement) -> AggregateRating:
     elif len(node_nums) == 1:
         rating_value = node_nums[0]
         assert isinstance(rating_value, float)
-        best_rating = _extract_best_rating_tail_or_next(node, rating_value)
+        best_rating = _extract_best_rating_tail_or_next(node, rating_value, budget)
     elif len(node_nums) > 2:
         rating_value = node_nums[0]
     return AggregateRating(ratingValue=rating_value, bestRating=best_rating)
@@ -62,19 +79,21 @@ def _check_best_rating(value: float, rating_value: float) -> float | None:
 def _get_rating_numbers(node_text: str | None) -> list[float]:
     rating_nums: list[float] = []
     if node_text:
-        node_nums = re.findall(r"\d*,\d+|\d*\.\d+|\d+", node_text)
         rating_nums = [
             n_rating
-            for n_rating in map(_normalize_rating, node_nums)
+            for n_rating in map(_normalize_rating, rating_numbers(node_text))
             if n_rating is not None
         ]
     return rating_nums
 
 
 def _extract_best_rating_tail_or_next(
-    node: HtmlElement, rating_value: float
+    node: HtmlElement, rating_value: float, budget: "Budget | None" = None
 ) -> float | None:
-    best_rating_text_candidates = [node.tail, extract_text(node.getnext())]
+    best_rating_text_candidates = [
+        node.tail,
+        extract_text(node.getnext(), budget=budget),
+    ]
     for best_rating_text in best_rating_text_candidates:
         rating_nums = _get_rating_numbers(best_rating_text)
         if len(rating_nums) > 0:
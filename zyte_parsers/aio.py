@@ -0,0 +1,244 @@
+"""Async versions of the extractors, for use in :mod:`asyncio` code.
+
+Extraction is CPU-bound and can take tens of milliseconds for large pages,
+during which an event loop calling the extractors directly can do nothing
+else. The functions in this module run the extractors in an executor
+instead, through an :class:`Offloader`:
+
+>>> import asyncio
+>>> from zyte_parsers import aio
+>>> asyncio.run(aio.extract_price("$10"))
+Price(amount=Decimal('10'), currency='$')
+
+By default a thread pool is used. With a process pool, inputs must be
+picklable, which lxml elements and parsel selectors are not, so pass
+strings to the extractors that accept them, and the HTML of the page to
+:func:`extract_page` and :func:`extract_structured_data`, which parse it in
+the worker.
+
+The results of :func:`~zyte_parsers.text_cache` are not shared with the
+workers.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial, wraps
+from typing import TYPE_CHECKING, Any, ParamSpec, TypeVar
+from weakref import WeakKeyDictionary
+
+from lxml.html import document_fromstring
+
+from .aggregate_rating import extract_rating as _extract_rating
+from .brand import extract_brand_name as _extract_brand_name
+from .breadcrumbs import extract_breadcrumbs as _extract_breadcrumbs
+from .gtin import extract_gtin as _extract_gtin
+from .page import extract_page as _extract_page
+from .price import extract_price as _extract_price
+from .review import extract_review_count as _extract_review_count
+from .star_rating import extract_rating_stars as _extract_rating_stars
+from .structured_data import extract_structured_data as _extract_structured_data
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Coroutine
+    from concurrent.futures import Executor, Future
+
+    from .api import SelectorOrElement
+    from .budget import Budget
+    from .page import PageFields
+    from .structured_data import StructuredData
+
+_P = ParamSpec("_P")
+_T = TypeVar("_T")
+
+
+class Offloader:
+    """Runs extractors in an executor from async code.
+
+    At most ``max_concurrency`` calls per event loop are submitted to the
+    executor at a time. Further calls wait for a slot before submitting
+    anything, so the executor queue does not grow without bounds when
+    pages arrive faster than they can be processed.
+
+    If a call is cancelled after it started running, its slot is only
+    freed when it finishes, as the worker cannot be interrupted.
+
+    >>> import asyncio
+    >>> from zyte_parsers import extract_gtin
+    >>> offloader = Offloader(max_concurrency=2)
+    >>> asyncio.run(offloader.run(extract_gtin, "EAN: 7350053850019"))
+    Gtin(type='gtin13', value='7350053850019')
+    >>> offloader.close()
+
+    :param executor: Executor to run extractors in. By default, a
+        :class:`~concurrent.futures.ThreadPoolExecutor` with
+        ``max_concurrency`` workers is created when first needed, and shut
+        down by :meth:`close`.
+    :param max_concurrency: Maximum number of calls submitted to the
+        executor at a time, per event loop. Defaults to the number of CPUs.
+    """
+
+    def __init__(
+        self, executor: Executor | None = None, *, max_concurrency: int | None = None
+    ) -> None:
+        if max_concurrency is None:
+            max_concurrency = os.cpu_count() or 1
+        if max_concurrency < 1:
+            raise ValueError(f"max_concurrency must be positive, got {max_concurrency}")
+        self.max_concurrency = max_concurrency
+        self._executor = executor
+        self._owns_executor = executor is None
+        self._lock = threading.Lock()
+        # asyncio semaphores can only be used from one event loop.
+        self._semaphores: WeakKeyDictionary[
+            asyncio.AbstractEventLoop, asyncio.Semaphore
+        ] = WeakKeyDictionary()
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_concurrency,
+                    thread_name_prefix="zyte-parsers",
+                )
+            return self._executor
+
+    def _get_semaphore(self, loop: asyncio.AbstractEventLoop) -> asyncio.Semaphore:
+        with self._lock:
+            semaphore = self._semaphores.get(loop)
+            if semaphore is None:
+                semaphore = self._semaphores[loop] = asyncio.Semaphore(
+                    self.max_concurrency
+                )
+            return semaphore
+
+    async def run(
+        self, extractor: Callable[_P, _T], /, *args: _P.args, **kwargs: _P.kwargs
+    ) -> _T:
+        """Return ``extractor(*args, **kwargs)``, run in the executor."""
+        loop = asyncio.get_running_loop()
+        semaphore = self._get_semaphore(loop)
+        await semaphore.acquire()
+        try:
+            future = self._get_executor().submit(partial(extractor, *args, **kwargs))
+        except BaseException:
+            semaphore.release()
+            raise
+
+        def release(_: Future[_T]) -> None:
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(semaphore.release)
+
+        future.add_done_callback(release)
+        return await asyncio.wrap_future(future)
+
+    def close(self, *, wait: bool = True) -> None:
+        """Shut down the executor, if it was created by the offloader."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None and self._owns_executor:
+            executor.shutdown(wait=wait)
+
+
+_DEFAULT_OFFLOADER: Offloader | None = None
+_DEFAULT_OFFLOADER_LOCK = threading.Lock()
+
+
+def get_offloader() -> Offloader:
+    """Return the offloader used by the functions of this module."""
+    global _DEFAULT_OFFLOADER  # noqa: PLW0603
+    with _DEFAULT_OFFLOADER_LOCK:
+        if _DEFAULT_OFFLOADER is None:
+            _DEFAULT_OFFLOADER = Offloader()
+        return _DEFAULT_OFFLOADER
+
+
+def set_offloader(offloader: Offloader | None) -> None:
+    """Set the offloader used by the functions of this module.
+
+    The previous offloader is not closed. If ``offloader`` is ``None``, a
+    default one is created when next needed.
+    """
+    global _DEFAULT_OFFLOADER  # noqa: PLW0603
+    with _DEFAULT_OFFLOADER_LOCK:
+        _DEFAULT_OFFLOADER = offloader
+
+
+def _offloaded(
+    extractor: Callable[_P, _T],
+) -> Callable[_P, Coroutine[Any, Any, _T]]:
+    @wraps(extractor)
+    async def wrapper(*args: _P.args, **kwargs: _P.kwargs) -> _T:
+        return await get_offloader().run(extractor, *args, **kwargs)
+
+    # The docstring of the extractor has examples that would fail here.
+    wrapper.__doc__ = (
+        f"Async version of :func:`~zyte_parsers.{extractor.__name__}`, run "
+        f"with :func:`get_offloader`."
+    )
+    return wrapper
+
+
+extract_brand_name = _offloaded(_extract_brand_name)
+extract_breadcrumbs = _offloaded(_extract_breadcrumbs)
+extract_gtin = _offloaded(_extract_gtin)
+extract_price = _offloaded(_extract_price)
+extract_rating = _offloaded(_extract_rating)
+extract_rating_stars = _offloaded(_extract_rating_stars)
+extract_review_count = _offloaded(_extract_review_count)
+
+
+def _parse(tree: SelectorOrElement | str | bytes) -> SelectorOrElement:
+    if isinstance(tree, (str, bytes)):
+        return document_fromstring(tree)
+    return tree
+
+
+def _parse_and_extract_page(
+    tree: SelectorOrElement | str | bytes, base_url: str | None, **kwargs: Any
+) -> PageFields:
+    return _extract_page(_parse(tree), base_url, **kwargs)
+
+
+def _parse_and_extract_structured_data(
+    tree: SelectorOrElement | str | bytes, base_url: str | None
+) -> StructuredData:
+    return _extract_structured_data(_parse(tree), base_url)
+
+
+async def extract_page(
+    tree: SelectorOrElement | str | bytes,
+    base_url: str | None,
+    *,
+    max_candidates: int = 3,
+    budget: Budget | None = None,
+) -> PageFields:
+    """Async version of :func:`~zyte_parsers.extract_page`, run with
+    :func:`get_offloader`.
+
+    ``tree`` can also be the HTML of the page, which is then parsed in the
+    worker. With a process pool, the work counted against ``budget`` is not
+    reflected in it afterwards, as the worker gets a copy.
+    """
+    return await get_offloader().run(
+        _parse_and_extract_page,
+        tree,
+        base_url,
+        max_candidates=max_candidates,
+        budget=budget,
+    )
+
+
+async def extract_structured_data(
+    tree: SelectorOrElement | str | bytes, base_url: str | None = None
+) -> StructuredData:
+    """Async version of :func:`~zyte_parsers.extract_structured_data`, run
+    with :func:`get_offloader`.
+
+    ``tree`` can also be the HTML of the page, which is then parsed in the
+    worker.
+    """
+    return await get_offloader().run(_parse_and_extract_structured_data, tree, base_url)
@@ -1,15 +1,38 @@
 from __future__ import annotations
 
-from typing import TypeAlias, cast
+from typing import TYPE_CHECKING, Any, ForwardRef, TypeAlias, Union, cast
 
 from lxml.html import HtmlComment, HtmlElement
-from parsel import Selector
 
-SelectorOrElement: TypeAlias = Selector | HtmlElement | HtmlComment
+if TYPE_CHECKING:
+    from parsel import Selector
+
+    SelectorOrElement: TypeAlias = Selector | HtmlElement | HtmlComment
+else:
+    # SelectorOrElement for the annotations of the extractors, which
+    # typing.get_type_hints() can evaluate without parsel being imported
+    # first.
+    _RuntimeSelectorOrElement = Union[  # noqa: UP007
+        ForwardRef("__import__('parsel').Selector"), HtmlElement, HtmlComment
+    ]
+
+
+def __getattr__(name: str) -> Any:
+    # parsel is only imported when needed, as importing it takes longer than
+    # importing the rest of the package.
+    if name == "SelectorOrElement":
+        from parsel import Selector  # noqa: PLC0415
+
+        value = Selector | HtmlElement | HtmlComment
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def input_to_selector(node: SelectorOrElement) -> Selector:
     """Convert a supported input object to a Selector."""
+    from parsel import Selector  # noqa: PLC0415
+
     if isinstance(node, Selector):
         return node
     return Selector(root=node)
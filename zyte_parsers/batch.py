@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import Context
+from itertools import chain
+from typing import TYPE_CHECKING, Any, TypeVar, cast
+
+from price_parser import Price
+
+from .gtin import extract_gtin, extract_gtin_many
+from .utils import text_cache
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+
+
+_T = TypeVar("_T")
+
+# Number of chunks of inputs per thread in run_threaded(). More chunks
+# balance the load better when some inputs take longer than others.
+_CHUNKS_PER_WORKER = 4
+
+# Extractors with an implementation that processes all inputs at once.
+_BULK_EXTRACTORS: dict[Callable[..., Any], Callable[..., list[Any]]] = {
+    extract_gtin: extract_gtin_many,
+}
+
+
+def _copy(result: _T) -> _T:
+    # Price objects are mutable, so every input gets its own copy.
+    if isinstance(result, Price):
+        return cast("_T", Price(result.amount, result.currency, result.amount_text))
+    return result
+
+
+def run(
+    extractor: Callable[..., _T], nodes: Iterable[Any], /, **kwargs: Any
+) -> list[_T]:
+    """Run an extractor on each of the given inputs.
+
+    This is equivalent to calling ``extractor(node, **kwargs)`` for every
+    item of ``nodes``, but it avoids some per-item overhead. String inputs,
+    which are accepted by some extractors, are only processed once per
+    distinct value, unless a ``budget`` is passed, in which case every input
+    is counted against it. Equal strings get equal results, and mutable
+    results, like ``price_parser.Price`` objects, are copied for each. Text
+    extraction results are cached for the duration of the call (see
+    :func:`~zyte_parsers.text_cache`). Some extractors have a faster
+    implementation for many inputs, which is used instead, e.g.
+    :func:`~zyte_parsers.gtin.extract_gtin_many`.
+
+    >>> from zyte_parsers import extract_gtin
+    >>> run(extract_gtin, ["EAN: 7350053850019", "foo", "EAN: 7350053850019"])
+    [Gtin(type='gtin13', value='7350053850019'), None, Gtin(type='gtin13', value='7350053850019')]
+
+    :param extractor: One of the extraction functions, e.g.
+        :func:`~zyte_parsers.extract_price`.
+    :param nodes: Inputs to pass to the extractor, one at a time.
+    :param kwargs: Keyword arguments to pass to every extractor call.
+    :return: A list with the extractor result for each input, in the input
+        order.
+    """
+    bulk_extractor = _BULK_EXTRACTORS.get(extractor)
+    if bulk_extractor is not None and not kwargs:
+        with text_cache():
+            return bulk_extractor(nodes)
+
+    results: list[_T] = []
+    append = results.append
+    text_results: dict[str, _T] = {}
+    dedup = "budget" not in kwargs
+    with text_cache():
+        for node in nodes:
+            if dedup and isinstance(node, str):
+                try:
+                    result = _copy(text_results[node])
+                except KeyError:
+                    result = text_results[node] = extractor(node, **kwargs)
+            else:
+                result = extractor(node, **kwargs)
+            append(result)
+    return results
+
+
+def run_threaded(
+    extractor: Callable[..., _T],
+    nodes: Iterable[Any],
+    /,
+    *,
+    max_workers: int | None = None,
+    **kwargs: Any,
+) -> list[_T]:
+    """Like :func:`run`, but spread the inputs over a pool of threads.
+
+    Inputs are split into consecutive chunks, a few per thread, and each
+    chunk is processed with :func:`run`, so inputs from the same document
+    usually end up in the same thread and share its text cache.
+
+    Threads only run extraction in parallel on free-threaded builds of
+    Python; on other builds, most of the extraction work holds the GIL.
+    Inputs must not be modified while this runs. Each chunk runs in a new
+    :class:`contextvars.Context`, so it does not share the text cache of
+    the calling thread.
+
+    >>> from zyte_parsers import extract_price
+    >>> run_threaded(extract_price, ["$10", "20 €"], max_workers=2)
+    [Price(amount=Decimal('10'), currency='$'), Price(amount=Decimal('20'), currency='€')]
+
+    :param extractor: One of the extraction functions, e.g.
+        :func:`~zyte_parsers.extract_price`.
+    :param nodes: Inputs to pass to the extractor, one at a time.
+    :param max_workers: Number of threads. Defaults to the number of CPUs.
+    :param kwargs: Keyword arguments to pass to every extractor call. They
+        are shared by all threads, so do not pass a ``budget``, as
+        :class:`~zyte_parsers.Budget` objects are not thread-safe.
+    :return: A list with the extractor result for each input, in the input
+        order.
+    """
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    nodes = list(nodes)
+    n_chunks = min(len(nodes), max_workers * _CHUNKS_PER_WORKER)
+    if max_workers <= 1 or n_chunks <= 1:
+        return run(extractor, nodes, **kwargs)
+    chunk_size = -(-len(nodes) // n_chunks)
+    chunks = [nodes[i : i + chunk_size] for i in range(0, len(nodes), chunk_size)]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(
+            lambda chunk: Context().run(run, extractor, chunk, **kwargs), chunks
+        )
+        return list(chain.from_iterable(results))
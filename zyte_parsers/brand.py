@@ -4,6 +4,8 @@ import itertools
 from typing import TYPE_CHECKING
 
 from .api import input_to_element
+from .budget import Budget
+from .instrumentation import instrumented
 from .utils import extract_text, iterwalk_limited, take
 
 if TYPE_CHECKING:
@@ -11,43 +13,56 @@ if TYPE_CHECKING:
 
     from lxml.html import HtmlElement
 
-    from . import SelectorOrElement
+    from .api import SelectorOrElement
+else:
+    from .api import _RuntimeSelectorOrElement as SelectorOrElement
 
 
-def extract_brand_name(node: SelectorOrElement, search_depth: int = 0) -> str | None:
+@instrumented("extract_brand_name")
+def extract_brand_name(
+    node: SelectorOrElement, search_depth: int = 0, *, budget: Budget | None = None
+) -> str | None:
     """Extract a brand name from a node that contains it.
 
     It tries element text and image alt and title attributes.
 
     :param node: Node including the brand name.
     :param search_depth: Max depth for searching images.
+    :param budget: A :class:`~zyte_parsers.Budget` to count the work
+        against.
     :return: The brand name or None.
     """
     _BRAND_LENGHT_LIMIT = 50
 
     node = input_to_element(node)
-    extracted = _extract_brand(node, search_depth)
+    extracted = _extract_brand(node, search_depth, budget)
     short = (b for b in extracted if b and len(b) < _BRAND_LENGHT_LIMIT)
     results = take(short, 1)
 
     return results[0] if results else None
 
 
-def _extract_brand(node: HtmlElement, search_depth: int = 0) -> Iterable[str | None]:
+def _extract_brand(
+    node: HtmlElement, search_depth: int = 0, budget: Budget | None = None
+) -> Iterable[str | None]:
     if node.tag == "img":
-        return extract_image_text(node, 0)
-    value = extract_text(node)
+        return extract_image_text(node, 0, budget=budget)
+    value = extract_text(node, budget=budget)
     if value:
         return [value]
-    return extract_image_text(node, search_depth)
+    return extract_image_text(node, search_depth, budget=budget)
 
 
-def extract_image_text(node: HtmlElement, search_depth: int = 0) -> Iterable[str]:
+def extract_image_text(
+    node: HtmlElement, search_depth: int = 0, *, budget: Budget | None = None
+) -> Iterable[str]:
     def extract_text_from_image(node: HtmlElement) -> Iterable[str | None]:
         for attrib in ["alt", "title"]:
             yield (node.attrib.get(attrib) or "").strip()
 
     nodes = iterwalk_limited(node, search_depth)
+    if budget is not None:
+        nodes = itertools.takewhile(lambda _: budget.visit(), nodes)
     images = filter(lambda n: n.tag == "img", nodes)
     attribs = map(extract_text_from_image, images)
     flat_attribs = itertools.chain.from_iterable(attribs)
@@ -1,20 +1,32 @@
 import re
 import string
 from collections import Counter
-from typing import Literal, cast
+from typing import TYPE_CHECKING, Literal, cast
 
 import attr
 from lxml.html import HtmlComment, HtmlElement
 
-from .api import SelectorOrElement, input_to_element
-from .utils import extract_link, extract_text, first_satisfying
+from .api import input_to_element
+from .budget import Budget
+from .fragment_cache import FragmentCache
+from .instrumentation import instrumented
+from .site_profile import SiteProfile
+from .utils import ThreadLocalXPath, extract_link, extract_text
 
+if TYPE_CHECKING:
+    from .api import SelectorOrElement
+else:
+    from .api import _RuntimeSelectorOrElement as SelectorOrElement
 
-@attr.s(frozen=True, auto_attribs=True)
+
+@attr.s(frozen=True, auto_attribs=True, slots=True)
 class Breadcrumb:
     name: str | None = None
     url: str | None = None
 
+    def __reduce__(self) -> "tuple[type[Breadcrumb], tuple[str | None, str | None]]":
+        return type(self), (self.name, self.url)
+
 
 _PUNCTUATION_TRANS = str.maketrans("", "", string.punctuation)
 _BREADCRUMBS_SEP = (
@@ -30,8 +42,16 @@ LSTRIP_SEP_REG = re.compile(rf"^{SEP_REG_STR}\s+")
 RSTRIP_SEP_REG = re.compile(rf"\s+{SEP_REG_STR}$")
 
 
+@instrumented("extract_breadcrumbs")
 def extract_breadcrumbs(
-    node: SelectorOrElement, *, base_url: str | None, max_search_depth: int = 10
+    node: "SelectorOrElement",
+    *,
+    base_url: str | None,
+    max_search_depth: int = 10,
+    max_nodes: int | None = None,
+    budget: "Budget | None" = None,
+    profile: "SiteProfile | None" = None,
+    cache: "FragmentCache | None" = None,
 ) -> tuple[Breadcrumb, ...] | None:
     """Extract breadcrumb items from node that represents breadcrumb component.
 
@@ -47,107 +67,200 @@ def extract_breadcrumbs(
     :param node: Node representing and including breadcrumb component.
     :param base_url: Base URL of site.
     :param max_search_depth: Max depth for searching anchors.
+    :param max_nodes: Max number of nodes to visit. If it is reached, the
+        breadcrumb items found so far are post-processed and returned.
+    :param budget: A :class:`~zyte_parsers.Budget` to count the work
+        against. Like with ``max_nodes``, if it runs out, the breadcrumb
+        items found so far are post-processed and returned. Unlike
+        ``max_nodes``, it also limits text extraction, and it can be shared
+        with other extractor calls.
+    :param profile: A :class:`~zyte_parsers.SiteProfile` of the website of
+        the node. If markup was used for the previous pages of the website,
+        the search stops after the breadcrumb items with markup when no
+        markup is left.
+    :param cache: A :class:`~zyte_parsers.FragmentCache` of results for
+        fragments seen before. It is not used if ``profile`` is given.
     :return: Tuple with breadcrumb items.
     """
+    node = input_to_element(node)
+    if cache is not None and profile is None:
+        # The tail of the node can also be a breadcrumb item.
+        key = cache.key(
+            "extract_breadcrumbs",
+            node,
+            node.tail,
+            max_search_depth,
+            max_nodes,
+            base_url=base_url,
+        )
+        return cache.get_or_compute(
+            key,
+            lambda: _extract_breadcrumbs(
+                node, base_url, max_search_depth, max_nodes, budget, profile
+            ),
+            budget=budget,
+        )
+    return _extract_breadcrumbs(
+        node, base_url, max_search_depth, max_nodes, budget, profile
+    )
+
+
+def _extract_breadcrumbs(
+    node: HtmlElement | HtmlComment,
+    base_url: str | None,
+    max_search_depth: int,
+    max_nodes: int | None,
+    budget: "Budget | None",
+    profile: "SiteProfile | None",
+) -> tuple[Breadcrumb, ...] | None:
+    stop_after_markup = (
+        profile is not None and profile.strategy("extract_breadcrumbs") == "markup"
+    )
+    breadcrumbs, markup_hier, separators = _collect_breadcrumbs(
+        node, base_url, max_search_depth, max_nodes, budget, stop_after_markup
+    )
+    result = _postprocess_breadcrumbs(breadcrumbs, markup_hier, separators)
+    if profile is not None:
+        strategy = "markup" if any(markup_hier) else "separators"
+        profile.record(
+            "extract_breadcrumbs",
+            strategy if result else None,
+            hit=stop_after_markup and strategy == "markup",
+        )
+    return result
+
+
+_MARKUP_ELEMENTS = ThreadLocalXPath("descendant-or-self::*[@itemtype or @typeof]")
+
+# An entry of the traversal stack: node, its depth, whether it is inside an
+# HTML list, its markup hierarchy and whether the node is being entered (as
+# opposed to left, after all its children were processed).
+_StackEntry = tuple[HtmlElement | HtmlComment, int, bool, tuple[str, ...], bool]
+
+
+def _collect_breadcrumbs(
+    root: HtmlElement | HtmlComment,
+    base_url: str | None,
+    max_search_depth: int,
+    max_nodes: int | None,
+    budget: "Budget | None" = None,
+    stop_after_markup: bool = False,
+) -> tuple[list[Breadcrumb], list[tuple[str, ...]], list[str | None]]:
+    """
+    Traverse html tree and search for elements that represent breadcrumb
+    items with maximal depth of searching equal to `max_search_depth`.
+    It also extracts breadcrumb items from element's tails since it often
+    happens that non-anchor items are placed without any surrounding
+    element.
+    Because breadcrumb elements may contain dropdowns, the function
+    filters them out by doing the following:
+    * does not go into nested HTML list elements (<ol> and <ul>).
+    * does not go into any HTML list elements with classes that relate
+    to drop down, like "dropdown", "drop-down", "DropDown", etc.
+    For every found element it does the following clean-up:
+    * extracts name of breadcrumb from element's text or `title` attribute.
+    * name cannot be a single character with punctuation like "»" or "|".
+    * is able to parse name and split it from separators.
+    * breadcrumb item has to contain name or url.
+    * relative URLs are joined with base URL.
+    If `stop_after_markup` is true, the traversal stops after an item
+    without markup that follows an item with markup if no markup remains to
+    be visited, since post-processing using markup keeps no later item.
+    The traversal uses an explicit stack, and the markup hierarchy of every
+    item is a tuple shared by all items below the same markup element.
+    """
+    breadcrumbs: list[Breadcrumb] = []
+    markup_hier: list[tuple[str, ...]] = []
+    separators: list[str | None] = []
+    complete = False
 
-    def extract_breadcrumbs_rec(
-        node: HtmlElement | HtmlComment,
-        search_depth: int,
-        breadcrumbs_accum: list[Breadcrumb],
-        markup_hier_accum: list[list[str]],
-        separators_accum: list[str | None],
-        list_tag_occured: bool,
-        curr_markup_hier: list[str],
+    def add_item(
+        name: str | None, url: str | None, curr_markup_hier: tuple[str, ...]
     ) -> None:
-        """
-        Traverse html tree and search for elements that represent breadcrumb
-        items with maximal depth of searching equal to `max_search_depth`.
-        It also extracts breadcrumb items from element's tails since it often
-        happens that non-anchor items are placed without any surrounding
-        element.
-        Because breadcrumb elements may contain dropdowns, the function
-        filters them out by doing the following:
-        * does not go into nested HTML list elements (<ol> and <ul>).
-        * does not go into any HTML list elements with classes that relate
-        to drop down, like "dropdown", "drop-down", "DropDown", etc.
-        For every found element it does the following clean-up:
-        * extracts name of breadcrumb from element's text or `title` attribute.
-        * name cannot be a single character with punctuation like "»" or "|".
-        * is able to parse name and split it from separators.
-        * breadcrumb item has to contain name or url.
-        * relative URLs are joined with base URL.
-        """
+        nonlocal complete
+        left_sep, parsed_name, right_sep = _parse_breadcrumb_name(name)
+        if left_sep and separators and not separators[-1]:
+            separators[-1] = left_sep
+        if parsed_name or url:
+            if (
+                stop_after_markup
+                and not curr_markup_hier
+                and any(markup_hier[-1:])
+                and not _markup_may_follow(stack)
+            ):
+                complete = True
+            breadcrumbs.append(Breadcrumb(parsed_name, url))
+            markup_hier.append(curr_markup_hier)
+            separators.append(right_sep)
+
+    stack: list[_StackEntry] = [(root, 0, False, (), True)]
+    visited = 0
+    while stack and not complete:
+        node, search_depth, list_tag_occured, curr_markup_hier, entering = stack.pop()
+
+        if not entering:
+            if node.tail is not None:
+                add_item(node.tail, None, curr_markup_hier)
+            continue
+
+        if max_nodes is not None and visited >= max_nodes:
+            break
+        if budget is not None and not budget.visit():
+            break
+        visited += 1
+
         if node.tag == "button":
-            return
+            continue
 
         if node.tag == "a" or len(node) == 0:
-            name = first_satisfying(
-                [
-                    extract_text(node),
-                    cast("str", node.get("title")).strip()
-                    if node.get("title")
-                    else None,
-                ]
+            name = (
+                extract_text(node, budget=budget)
+                or (node.get("title") or "").strip()
+                or None
             )
-            url = extract_link(node, base_url)
-
-            left_sep, parsed_name, right_sep = _parse_breadcrumb_name(name)
-            if left_sep and separators_accum and not separators_accum[-1]:
-                separators_accum[-1] = left_sep
-            if parsed_name or url:
-                breadcrumbs_accum.append(Breadcrumb(parsed_name, url))
-                markup_hier_accum.append(curr_markup_hier)
-                separators_accum.append(right_sep)
-        else:
-            is_list_tag = node.tag in {"ul", "ol"}
-            skip_list_tag = is_list_tag and (
-                _has_special_class(cast("str", node.get("class"))) or list_tag_occured
+            add_item(name, extract_link(node, base_url), curr_markup_hier)
+            if node.tail is not None:
+                add_item(node.tail, None, curr_markup_hier)
+            continue
+
+        if node.tail is not None:
+            # the tail is processed once all the children have been
+            stack.append(
+                (node, search_depth, list_tag_occured, curr_markup_hier, False)
             )
 
-            item_type = _extract_markup_type(node)
+        is_list_tag = node.tag in {"ul", "ol"}
+        skip_list_tag = is_list_tag and (
+            _has_special_class(cast("str", node.get("class"))) or list_tag_occured
+        )
+        if search_depth >= max_search_depth or skip_list_tag:
+            continue
 
-            if search_depth < max_search_depth and not skip_list_tag:
-                for child in node:
-                    new_hierarchy = list(curr_markup_hier)
-                    if item_type:
-                        new_hierarchy.append(item_type)
+        item_type = _extract_markup_type(node)
+        child_markup_hier = (
+            (*curr_markup_hier, item_type) if item_type else curr_markup_hier
+        )
+        child_entry = (
+            search_depth + 1,
+            list_tag_occured or is_list_tag,
+            child_markup_hier,
+            True,
+        )
+        stack.extend((child, *child_entry) for child in reversed(node))
 
-                    extract_breadcrumbs_rec(
-                        child,
-                        search_depth + 1,
-                        breadcrumbs_accum,
-                        markup_hier_accum,
-                        separators_accum,
-                        list_tag_occured=list_tag_occured or is_list_tag,
-                        curr_markup_hier=new_hierarchy,
-                    )
+    return breadcrumbs, markup_hier, separators
 
-        if node.tail is not None:
-            left_sep, parsed_name, right_sep = _parse_breadcrumb_name(node.tail)
-            if left_sep and separators_accum and not separators_accum[-1]:
-                separators_accum[-1] = left_sep
-            if parsed_name:
-                breadcrumbs_accum.append(Breadcrumb(name=parsed_name))
-                markup_hier_accum.append(curr_markup_hier)
-                separators_accum.append(right_sep)
 
-    node = input_to_element(node)
+def _markup_may_follow(stack: list[_StackEntry]) -> bool:
+    """Return whether the traversal could still find items with markup.
 
-    breadcrumbs: list[Breadcrumb] = []
-    markup_hier: list[list[str]] = []
-    separators: list[str | None] = []
-    extract_breadcrumbs_rec(
-        node,
-        0,
-        breadcrumbs,
-        markup_hier,
-        separators,
-        list_tag_occured=False,
-        curr_markup_hier=[],
+    Any element with an ``itemtype`` or ``typeof`` attribute counts, even
+    one that is too deep or in a skipped list to be visited.
+    """
+    return any(
+        curr_markup_hier or (entering and _MARKUP_ELEMENTS(node))
+        for node, _, _, curr_markup_hier, entering in stack
     )
-    assert len(breadcrumbs) == len(markup_hier) == len(separators)
-
-    return _postprocess_breadcrumbs(breadcrumbs, markup_hier, separators)
 
 
 def _parse_breadcrumb_name(
@@ -180,7 +293,7 @@ def _parse_breadcrumb_name(
 
 def _postprocess_breadcrumbs(
     breadcrumbs: list[Breadcrumb],
-    markup_hier: list[list[str]],
+    markup_hier: list[tuple[str, ...]],
     separators: list[str | None],
 ) -> tuple[Breadcrumb, ...] | None:
     """
@@ -209,8 +322,9 @@ def _postprocess_breadcrumbs(
     return tuple(_remove_duplicated_first_and_last_items(breadcrumbs))
 
 
+@instrumented("extract_breadcrumbs.postprocess_markup")
 def _postprocess_using_markup(
-    breadcrumbs: list[Breadcrumb], markup_hier: list[list[str]]
+    breadcrumbs: list[Breadcrumb], markup_hier: list[tuple[str, ...]]
 ) -> list[Breadcrumb]:
     breadcrumb_indices_with_markup = [
         idx for idx, h in enumerate(markup_hier) if len(h) > 0
@@ -229,6 +343,7 @@ def _postprocess_using_markup(
     ]
 
 
+@instrumented("extract_breadcrumbs.postprocess_separators")
 def _postprocess_using_separators(
     breadcrumbs: list[Breadcrumb], separators: list[str | None]
 ) -> list[Breadcrumb]:
@@ -251,11 +366,16 @@ def _postprocess_using_separators(
 def _extract_markup_type(
     node: HtmlElement | HtmlComment,
 ) -> Literal["data-vocabulary", "schema"] | None:
+    schemas = [
+        value.lower()
+        for value in (node.get("itemtype"), node.get("typeof"))
+        if value is not None
+    ]
+    if not schemas:
+        return None
+
     def check_schema(name: str) -> bool:
-        for schema_attr in ("itemtype", "typeof"):
-            if name in cast("str", node.get(schema_attr, "")).lower():
-                return True
-        return False
+        return any(name in schema for schema in schemas)
 
     if check_schema("data-vocabulary.org/breadcrumb"):
         return "data-vocabulary"
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+from itertools import islice
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from lxml.html import HtmlElement
+
+
+class Budget:
+    """A limit on the work done by extractors, to bound their run time.
+
+    Extractors that accept a ``budget`` count the elements they visit and
+    the length of the text they extract against it. When a limit would be
+    exceeded, they stop and return what they found so far, or an empty
+    result if they cannot return a partial one, and :attr:`exhausted` is
+    set, so that callers can tell a result that was cut short from a
+    normal one. Once a limit is reached, the budget stays exhausted, and
+    extractors that get it stop right away.
+
+    The same budget can be passed to several extractor calls, e.g. for all
+    the fields of a page, to bound their total work. A budget must not be
+    used from several threads at once.
+
+    >>> from lxml.html import fromstring
+    >>> from zyte_parsers import extract_rating_stars
+    >>> stars = fromstring('<div>' + '<p>Unrelated</p>' * 1000 + '</div>')
+    >>> budget = Budget(max_nodes=100)
+    >>> extract_rating_stars(stars, budget=budget)
+    >>> budget.exhausted, budget.nodes
+    (True, 100)
+
+    :param max_nodes: Maximum number of element visits. Elements processed
+        more than once, e.g. visited and then their text extracted, count
+        each time.
+    :param max_text_length: Maximum number of characters of extracted
+        text.
+    """
+
+    __slots__ = ("exhausted", "max_nodes", "max_text_length", "nodes", "text_length")
+
+    def __init__(
+        self, *, max_nodes: int | None = None, max_text_length: int | None = None
+    ) -> None:
+        self.max_nodes = max_nodes
+        self.max_text_length = max_text_length
+        #: Number of element visits so far. Subtrees are only counted if
+        #: ``max_nodes`` is set.
+        self.nodes = 0
+        #: Number of characters of text extracted so far.
+        self.text_length = 0
+        #: Whether a limit was reached.
+        self.exhausted = False
+
+    def __repr__(self) -> str:
+        return (
+            f"{type(self).__name__}(max_nodes={self.max_nodes!r}, "
+            f"max_text_length={self.max_text_length!r}, nodes={self.nodes!r}, "
+            f"text_length={self.text_length!r}, exhausted={self.exhausted!r})"
+        )
+
+    def visit(self, count: int = 1) -> bool:
+        """Count ``count`` element visits.
+
+        :return: ``False``, without counting them, if they do not fit in
+            the budget.
+        """
+        if self.exhausted:
+            return False
+        if self.max_nodes is not None and self.nodes + count > self.max_nodes:
+            self.exhausted = True
+            return False
+        self.nodes += count
+        return True
+
+    def visit_subtree(self, node: HtmlElement) -> bool:
+        """Count a visit of every element of a subtree, e.g. before
+        extracting its text.
+
+        Only as many elements as fit in the budget are iterated over, so
+        this is cheap for huge subtrees.
+
+        :return: ``False``, without counting them, if they do not fit in
+            the budget.
+        """
+        if self.exhausted:
+            return False
+        if self.max_nodes is None:
+            return True
+        remaining = self.max_nodes - self.nodes
+        return self.visit(sum(1 for _ in islice(node.iter(), remaining + 1)))
+
+    def read_text(self, text: str) -> bool:
+        """Count the length of an extracted text.
+
+        :return: ``False``, without counting it, if it does not fit in the
+            budget.
+        """
+        if self.exhausted:
+            return False
+        length = len(text)
+        if (
+            self.max_text_length is not None
+            and self.text_length + length > self.max_text_length
+        ):
+            self.exhausted = True
+            return False
+        self.text_length += length
+        return True
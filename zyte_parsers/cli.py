@@ -0,0 +1,262 @@
+"""Command-line batch extraction: ``python -m zyte_parsers``.
+
+Input is JSONL, one record per line, optionally compressed with gzip or
+Zstandard::
+
+    {"url": "https://example.com/p/1", "html": "<html>...</html>",
+     "fields": {"price": ".price", "breadcrumbs": {"xpath": "//nav"}}}
+
+``fields`` maps field names (see
+:data:`~zyte_parsers.fields.FIELD_EXTRACTORS`) to the selector of the
+element to extract them from: a CSS selector string, or an object with a
+``css`` or an ``xpath`` key. Selectors given on the command line apply to
+every record, and records can override them.
+
+Output is JSONL too, one record per input record::
+
+    {"line": 1, "url": "https://example.com/p/1",
+     "fields": {"price": {...}, "breadcrumbs": [...]}}
+
+Input files can also be WARC files, see
+:func:`~zyte_parsers.readers.read_warc_html`, if their name ends with
+``.warc``, ``.warc.gz`` or ``.warc.zst``. Their HTML pages are processed as
+records with ``url`` and ``html`` keys.
+
+Fields whose selector matches nothing are ``null``. If a record cannot be
+processed, e.g. because its line is not valid JSON, its output record has an
+``error`` key instead of ``fields``. Invalid UTF-8 in input lines is replaced
+with U+FFFD.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import nullcontext
+from itertools import islice
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, TextIO
+
+from parsel import Selector
+
+from .fields import FIELD_EXTRACTORS, to_json
+from .readers import open_archive, read_warc_html
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator, Sequence
+    from concurrent.futures import Future
+    from contextlib import AbstractContextManager
+
+_Chunk = list[tuple[int, str]]
+_WARC_SUFFIXES = (".warc", ".warc.gz", ".warc.zst")
+
+
+def _select(selector: Selector, query: str | dict[str, str]) -> Selector | None:
+    if isinstance(query, str):
+        matches = selector.css(query)
+    elif "xpath" in query:
+        matches = selector.xpath(query["xpath"])
+    elif "css" in query:
+        matches = selector.css(query["css"])
+    else:
+        raise ValueError(f"Expected a 'css' or an 'xpath' key in {query!r}")
+    return matches[0] if matches else None
+
+
+def process_record(
+    record: dict[str, Any], default_fields: dict[str, str | dict[str, str]]
+) -> dict[str, Any]:
+    """Extract the requested fields from an input record.
+
+    :param record: An input record, as described in the module docs.
+    :param default_fields: Selectors for fields to extract from every
+        record.
+    :return: The extracted fields, converted with
+        :func:`~zyte_parsers.fields.to_json`.
+    """
+    url = record.get("url")
+    fields = {**default_fields, **record.get("fields", {})}
+    unknown = fields.keys() - FIELD_EXTRACTORS.keys()
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    selector = Selector(text=record["html"])
+    results = {}
+    for name, query in fields.items():
+        node = _select(selector, query)
+        results[name] = (
+            None if node is None else to_json(FIELD_EXTRACTORS[name](node, url))
+        )
+    return results
+
+
+def _process_line(
+    line_number: int, line: str, default_fields: dict[str, str | dict[str, str]]
+) -> str:
+    output: dict[str, Any] = {"line": line_number}
+    try:
+        record = json.loads(line)
+        output["url"] = record.get("url")
+        output["fields"] = process_record(record, default_fields)
+    except Exception as e:  # noqa: BLE001
+        output["error"] = f"{type(e).__name__}: {e}"
+    return json.dumps(output, ensure_ascii=False)
+
+
+def _process_chunk(
+    chunk: _Chunk, default_fields: dict[str, str | dict[str, str]]
+) -> list[str]:
+    return [_process_line(number, line, default_fields) for number, line in chunk]
+
+
+def _read_chunks(lines: Iterable[str], chunksize: int) -> Iterator[_Chunk]:
+    numbered = ((n, line) for n, line in enumerate(lines, start=1) if line.strip())
+    while chunk := list(islice(numbered, chunksize)):
+        yield chunk
+
+
+def process_lines(
+    lines: Iterable[str],
+    default_fields: dict[str, str | dict[str, str]],
+    *,
+    jobs: int | None = None,
+    chunksize: int = 16,
+    ordered: bool = True,
+) -> Iterator[str]:
+    """Process JSONL input lines, yielding JSONL output lines.
+
+    Input is read lazily and at most ``2 * jobs`` chunks of ``chunksize``
+    records are in flight at a time, so memory usage does not depend on the
+    input size.
+
+    :param lines: Input lines.
+    :param default_fields: Selectors for fields to extract from every
+        record.
+    :param jobs: Number of worker processes, by default the number of CPUs.
+        With ``1``, records are processed in the current process.
+    :param chunksize: Number of records to send to a worker at a time.
+    :param ordered: If false, output records are yielded as soon as they
+        are ready, instead of in the input order.
+    """
+    chunks = _read_chunks(lines, chunksize)
+    if jobs == 1:
+        for chunk in chunks:
+            yield from _process_chunk(chunk, default_fields)
+        return
+
+    max_pending = 2 * (jobs or os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        pending: deque[Future[list[str]]] = deque()
+
+        def submit(n: int) -> None:
+            for chunk in islice(chunks, n):
+                pending.append(executor.submit(_process_chunk, chunk, default_fields))
+
+        submit(max_pending)
+        while pending:
+            if ordered:
+                done = [pending.popleft()]
+            else:
+                done_set, _ = wait(pending, return_when=FIRST_COMPLETED)
+                done = [future for future in pending if future in done_set]
+                for future in done:
+                    pending.remove(future)
+            for future in done:
+                yield from future.result()
+            submit(max_pending - len(pending))
+
+
+def _parse_field(value: str, key: str) -> tuple[str, dict[str, str]]:
+    name, sep, query = value.partition("=")
+    if not sep or not name or not query:
+        raise argparse.ArgumentTypeError(f"expected NAME=SELECTOR, got {value!r}")
+    return name, {key: query}
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m zyte_parsers",
+        description=(
+            "Extract fields from HTML in JSONL records. See the "
+            "zyte_parsers.cli module documentation for the record format. "
+            f"Supported fields: {', '.join(FIELD_EXTRACTORS)}."
+        ),
+    )
+    parser.add_argument(
+        "input",
+        nargs="*",
+        default=["-"],
+        help="JSONL or WARC input files, by default the standard input",
+    )
+    parser.add_argument("-o", "--output", help="output file, by default stdout")
+    parser.add_argument(
+        "--css",
+        action="append",
+        default=[],
+        metavar="NAME=SELECTOR",
+        type=lambda value: _parse_field(value, "css"),
+        help="extract field NAME from every record using a CSS selector",
+    )
+    parser.add_argument(
+        "--xpath",
+        action="append",
+        default=[],
+        metavar="NAME=SELECTOR",
+        type=lambda value: _parse_field(value, "xpath"),
+        help="extract field NAME from every record using an XPath selector",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count(),
+        help="number of worker processes (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=16,
+        help="records sent to a worker at a time (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--unordered",
+        action="store_true",
+        help="write each record as soon as it is ready, not in input order",
+    )
+    args = parser.parse_args(argv)
+    if args.jobs < 1 or args.chunksize < 1:
+        parser.error("--jobs and --chunksize must be positive")
+    default_fields = dict(args.css + args.xpath)
+    unknown = default_fields.keys() - FIELD_EXTRACTORS.keys()
+    if unknown:
+        parser.error(f"unknown fields: {', '.join(sorted(unknown))}")
+
+    def read_lines() -> Iterator[str]:
+        for path in args.input:
+            source = sys.stdin.buffer if path == "-" else path
+            if path.endswith(_WARC_SUFFIXES):
+                for url, html in read_warc_html(source):
+                    yield json.dumps({"url": url, "html": html})
+                continue
+            with open_archive(source) as f:
+                for line in f:
+                    yield line.decode("utf8", errors="replace")
+
+    output: AbstractContextManager[TextIO] = (
+        Path(args.output).open("w", encoding="utf8")  # noqa: SIM115
+        if args.output
+        else nullcontext(sys.stdout)
+    )
+    with output as f:
+        for line in process_lines(
+            read_lines(),
+            default_fields,
+            jobs=args.jobs,
+            chunksize=args.chunksize,
+            ordered=not args.unordered,
+        ):
+            f.write(line + "\n")
+    return 0
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+from decimal import Decimal
+from typing import TYPE_CHECKING, Any
+
+import attr
+
+from .aggregate_rating import extract_rating
+from .brand import extract_brand_name
+from .breadcrumbs import extract_breadcrumbs
+from .gtin import extract_gtin
+from .price import extract_price
+from .review import extract_review_count
+from .star_rating import extract_rating_stars
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from .api import SelectorOrElement
+
+
+def _extract_breadcrumbs(node: SelectorOrElement, base_url: str | None) -> Any:
+    return extract_breadcrumbs(node, base_url=base_url)
+
+
+#: Extraction functions by field name. Each of them gets a node and the URL
+#: of its page.
+FIELD_EXTRACTORS: dict[str, Callable[[SelectorOrElement, str | None], Any]] = {
+    "aggregateRating": lambda node, _: extract_rating(node),
+    "brand": lambda node, _: extract_brand_name(node),
+    "breadcrumbs": _extract_breadcrumbs,
+    "gtin": lambda node, _: extract_gtin(node),
+    "price": lambda node, _: extract_price(node),
+    "ratingStars": lambda node, _: extract_rating_stars(node),
+    "reviewCount": lambda node, _: extract_review_count(node),
+}
+
+
+def to_json(value: Any) -> Any:
+    """Convert an extraction result to a JSON-serializable value.
+
+    Result objects become dicts, sequences become lists and decimal numbers
+    become strings, to keep their precision.
+
+    >>> from zyte_parsers import Breadcrumb, extract_price
+    >>> to_json(extract_price("$10.50"))
+    {'amount': '10.50', 'currency': '$', 'amount_text': '10.50'}
+    >>> to_json((Breadcrumb(name="A", url="http://example.com/a"),))
+    [{'name': 'A', 'url': 'http://example.com/a'}]
+    """
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (list, tuple)):
+        return [to_json(item) for item in value]
+    if attr.has(type(value)):
+        return {
+            key: to_json(item)
+            for key, item in attr.asdict(value, recurse=False).items()
+        }
+    return value
@@ -0,0 +1,258 @@
+from __future__ import annotations
+
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, NamedTuple, TypeVar, cast
+from urllib.parse import urlsplit
+
+from lxml.html import tostring
+from w3lib.html import strip_html5_whitespace
+
+from . import __version__
+from .utils import ThreadLocalXPath, is_js_url
+
+if TYPE_CHECKING:
+    import os
+    import sqlite3
+    from collections.abc import Callable, Hashable
+
+    from lxml.html import HtmlComment, HtmlElement
+
+    from .budget import Budget
+
+_T = TypeVar("_T")
+
+# Stands for results that are not in the cache, as None is a valid result.
+_MISSING = object()
+
+_LINKS = ThreadLocalXPath(
+    "descendant-or-self::*/@href | descendant-or-self::*/@data-url"
+)
+# Links whose join with a base URL only depends on its scheme, e.g.
+# "http://example.com/a" or "//example.com/a", and links whose join only
+# depends on its scheme and host, e.g. "/a". The join of any other link,
+# e.g. "a" or "?page=2", can depend on the whole base URL. Tabs and line
+# breaks are removed by urlsplit(), so links with them are not matched.
+_NETLOC_LINK = re.compile(r"(?:[A-Za-z][A-Za-z0-9+.-]*:)?//[^/?#\t\r\n][^\t\r\n]*\Z")
+_ROOT_LINK = re.compile(r"/(?!/)[^\t\r\n]*\Z")
+
+
+class CacheInfo(NamedTuple):
+    """Statistics of a :class:`FragmentCache`."""
+
+    hits: int
+    misses: int
+    maxsize: int
+    #: Number of results in memory.
+    currsize: int
+
+
+class FragmentCache:
+    """Cache of extraction results for HTML fragments, to pass to extractors.
+
+    The same fragments, e.g. the breadcrumbs of a category or the rating
+    widget of a product, appear in many pages of a website, and with this
+    cache each distinct fragment is only processed once per extractor and
+    arguments. Fragments are identified by a hash of their serialized HTML,
+    so equal fragments of different pages share their results. The least
+    recently used results are discarded from memory once there are
+    ``maxsize`` of them.
+
+    The base URL is not part of the key as is, only the part of it that the
+    links of the fragment depend on, e.g. only its scheme and host for
+    root-relative links like ``/category``, so that fragments with absolute
+    or root-relative links, the most common ones, share results across all
+    the pages of a website.
+
+    If ``path`` is given, results are also stored in an SQLite database at
+    that path, which is created if needed, so that later runs, e.g. a new
+    crawl of the same website, can reuse them. Results are kept in the
+    database until :meth:`clear` is called, and results of other versions
+    of zyte-parsers are not used. The database is read with :mod:`pickle`,
+    so only use databases you created.
+
+    >>> from lxml.html import fromstring
+    >>> from zyte_parsers import extract_rating_stars
+    >>> cache = FragmentCache(maxsize=100)
+    >>> for _ in range(2):
+    ...     extract_rating_stars(fromstring('<p class="stars-4">*</p>'), cache=cache)
+    4.0
+    4.0
+    >>> cache.info()
+    CacheInfo(hits=1, misses=1, maxsize=100, currsize=1)
+    >>> cache.close()
+
+    Results computed with a :class:`~zyte_parsers.Budget` are only stored
+    if the budget was not exhausted. Extractors do not use the cache for
+    calls with a :class:`~zyte_parsers.SiteProfile`, whose results can
+    differ from those without one and which records statistics for every
+    call.
+
+    The same cache can be used from several threads at once.
+
+    :param maxsize: Maximum number of results in memory.
+    :param path: Path of an SQLite database to also store results in.
+    """
+
+    def __init__(
+        self, maxsize: int = 4096, *, path: str | os.PathLike[str] | None = None
+    ) -> None:
+        self.maxsize = maxsize
+        self._results: OrderedDict[bytes, Any] = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+        if path is not None:
+            # Only imported if needed, as extractors import this module.
+            import sqlite3  # noqa: PLC0415
+
+            # The lock serializes the use of the connection from several
+            # threads. Results can be computed again, so they do not need to
+            # be durable.
+            self._db = sqlite3.connect(
+                path, check_same_thread=False, isolation_level=None
+            )
+            self._db.execute("PRAGMA journal_mode = WAL")
+            self._db.execute("PRAGMA synchronous = OFF")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results"
+                " (key BLOB PRIMARY KEY, value BLOB NOT NULL)"
+            )
+
+    def key(
+        self,
+        extractor: str,
+        node: HtmlElement | HtmlComment,
+        *args: Hashable,
+        base_url: str | None = None,
+    ) -> bytes:
+        """Return the key of the result of an extractor for a fragment.
+
+        :param extractor: Name of the extractor.
+        :param node: Root of the fragment. Its tail is not part of it.
+        :param args: Other arguments of the extractor that the result
+            depends on. Their :func:`repr` is part of the key.
+        :param base_url: Base URL to resolve the links of the fragment with,
+            if the result depends on it.
+        """
+        key = hashlib.blake2b(digest_size=16)
+        key.update(
+            f"{__version__}\0{extractor}\0{args!r}\0{base_url is None}\0".encode()
+        )
+        if base_url is not None:
+            key.update(f"{_base_url_part(base_url, _LINKS(node))}\0".encode())
+        key.update(tostring(node, with_tail=False))
+        return key.digest()
+
+    def get_or_compute(
+        self, key: bytes, compute: Callable[[], _T], *, budget: Budget | None = None
+    ) -> _T:
+        """Return the result with the given key, calling ``compute`` to get
+        it and store it if it is not in the cache.
+
+        :param key: Key of the result, from :meth:`key`.
+        :param compute: Function that returns the result.
+        :param budget: The :class:`~zyte_parsers.Budget` that ``compute``
+            uses, if any. The result is not stored if it is exhausted.
+        """
+        value = self._get(key)
+        if value is not _MISSING:
+            return cast("_T", value)
+        value = compute()
+        if budget is None or not budget.exhausted:
+            self._set(key, value)
+        return value
+
+    def _get(self, key: bytes) -> Any:
+        with self._lock:
+            try:
+                value = self._results[key]
+            except KeyError:
+                row = None
+                if self._db is not None:
+                    row = self._db.execute(
+                        "SELECT value FROM results WHERE key = ?", (key,)
+                    ).fetchone()
+                if row is None:
+                    self._misses += 1
+                    return _MISSING
+                value = _loads(row[0])
+                self._store(key, value)
+            else:
+                self._results.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def _set(self, key: bytes, value: Any) -> None:
+        with self._lock:
+            self._store(key, value)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO results VALUES (?, ?)",
+                    (key, _dumps(value)),
+                )
+
+    def _store(self, key: bytes, value: Any) -> None:
+        self._results[key] = value
+        self._results.move_to_end(key)
+        if len(self._results) > self.maxsize:
+            self._results.popitem(last=False)
+
+    def info(self) -> CacheInfo:
+        """Return the hit and miss statistics and the size of the cache."""
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self.maxsize, len(self._results))
+
+    def clear(self) -> None:
+        """Remove all results, also from the database, and reset the
+        statistics."""
+        with self._lock:
+            self._results.clear()
+            self._hits = self._misses = 0
+            if self._db is not None:
+                self._db.execute("DELETE FROM results")
+
+    def close(self) -> None:
+        """Close the database, if any. Results in memory are kept."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+def _dumps(value: Any) -> bytes:
+    import pickle  # noqa: PLC0415
+
+    return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+
+def _loads(data: bytes) -> Any:
+    import pickle  # noqa: PLC0415
+
+    return pickle.loads(data)  # noqa: S301
+
+
+def _base_url_part(base_url: str, links: list[str]) -> str:
+    """Return the part of ``base_url`` that joining it with ``links``, as
+    :func:`~zyte_parsers.utils.extract_link` does, depends on."""
+    needs_netloc = needs_scheme = False
+    for raw_link in links:
+        if not raw_link or is_js_url(raw_link):
+            continue
+        link = strip_html5_whitespace(raw_link)
+        if _NETLOC_LINK.match(link):
+            needs_scheme = True
+        elif _ROOT_LINK.match(link):
+            needs_netloc = True
+        else:
+            return base_url
+    if not (needs_netloc or needs_scheme):
+        return ""
+    try:
+        parts = urlsplit(base_url)
+    except ValueError:
+        return base_url
+    return f"{parts.scheme}://{parts.netloc}" if needs_netloc else parts.scheme
@@ -1,26 +1,36 @@
 import re
-from contextlib import suppress
+import sys
+from collections.abc import Callable, Iterable, Sequence
+from typing import TYPE_CHECKING
 
 import attr
-from gtin.validator import is_valid_GTIN
-from stdnum import isbn, ismn, issn
 
-from . import SelectorOrElement
+from .budget import Budget
+from .instrumentation import instrumented
 from .utils import extract_text
 
+if TYPE_CHECKING:
+    from .api import SelectorOrElement
+else:
+    from .api import _RuntimeSelectorOrElement as SelectorOrElement
 
-@attr.s(frozen=True, auto_attribs=True)
+
+@attr.s(frozen=True, auto_attribs=True, slots=True)
 class Gtin:
-    type: str
+    # There are only a few GTIN types, so all results share the same strings.
+    type: str = attr.ib(converter=sys.intern)
     value: str
 
+    def __reduce__(self) -> tuple[Callable[[str, str], "Gtin"], tuple[str, str]]:
+        return type(self), (self.type, self.value)
+
 
 GTIN_MATCH_SPECIAL_CHARACTER_REGEX = re.compile(r"[^0-9a-zA-Z]")
 GTIN_MATCH_NON_NUMERIC_REGEX = re.compile(r"[^0-9]")
 
 # Consider only those prefix which have some numeric values as these
 # values interfere with the gtin id extraction
-GTIN_PREFIX = [
+GTIN_PREFIX = (
     "isbn13",
     "isbn10",
     "ean13",
@@ -28,12 +38,15 @@ GTIN_PREFIX = [
     "gtin12",
     "gtin13",
     "gtin14",
-]
+)
 GTIN_PREFIX_REGEX = re.compile("|".join(GTIN_PREFIX), re.IGNORECASE)
 GTIN_CENTER_REGEX = re.compile(r"^\D*|\D*$")
 
 
-def extract_gtin(node: SelectorOrElement | str) -> Gtin | None:
+@instrumented("extract_gtin")
+def extract_gtin(
+    node: "SelectorOrElement | str", *, budget: "Budget | None" = None
+) -> Gtin | None:
     """Extract a GTIN (Global Trade Item Number) from a node or a string that contains its text.
 
     It detects the GTIN type and returns it together with the cleaned GTIN
@@ -41,17 +54,55 @@ def extract_gtin(node: SelectorOrElement | str) -> Gtin | None:
     `ismn`, `upc`, `gtin8`, `gtin13`, `gtin14`.
 
     :param node: A node or a string that includes the GTIN text.
+    :param budget: A :class:`~zyte_parsers.Budget` to count the work
+        against.
     :return: A GTIN item.
     """
-    gtin = node if isinstance(node, str) else extract_text(node)
+    if isinstance(node, str):
+        gtin = node if budget is None or budget.read_text(node) else None
+    else:
+        gtin = extract_text(node, budget=budget)
     gtin_id = extract_gtin_id(gtin)
-    gtin_class = gtin_classification(gtin_id)
+    if not gtin_id:
+        return None
+    gtin_class = _classify_gtin_id(gtin_id)
     if gtin_class:
-        assert isinstance(gtin_id, str)
         return Gtin(gtin_class, gtin_id)
     return None
 
 
+@instrumented("extract_gtin_many")
+def extract_gtin_many(
+    nodes: "Iterable[SelectorOrElement | str | None]",
+) -> list[Gtin | None]:
+    """Extract GTINs from many nodes or strings that contain their text.
+
+    The result for each input is the same as the result of
+    :func:`extract_gtin`, with ``None`` for ``None`` inputs, but this is much
+    faster for large inputs, like whole product feeds: each distinct value is
+    only classified once, inputs that are just digits are not cleaned up, and
+    if NumPy is installed, check digits are validated for all values at once.
+
+    >>> extract_gtin_many(["EAN: 7350053850019", None, "7350053850018"])
+    [Gtin(type='gtin13', value='7350053850019'), None, None]
+
+    :param nodes: Nodes or strings that include GTIN texts.
+    :return: A list with a GTIN item or None for each input.
+    """
+    input_ids: list[str | None] = []
+    for node in nodes:
+        text = node if node is None or isinstance(node, str) else extract_text(node)
+        if text and text.isascii() and text.isdigit():
+            input_ids.append(text)
+        else:
+            input_ids.append(extract_gtin_id(text) or None)
+    gtin_ids = list(dict.fromkeys(filter(None, input_ids)))
+    gtins: dict[str | None, Gtin | None] = {None: None}
+    for gtin_id, gtin_class in zip(gtin_ids, _classify_gtin_ids(gtin_ids), strict=True):
+        gtins[gtin_id] = Gtin(gtin_class, gtin_id) if gtin_class else None
+    return [gtins[gtin_id] for gtin_id in input_ids]
+
+
 def _remove_gtin_numeric_prefix(gtin_code: str) -> str:
     """
     The function removes the gtin specific numeric prefix from the gtin text if
@@ -110,30 +161,119 @@ def gtin_classification(gtin: str | None) -> str | None:
     gtin = extract_gtin_id(gtin)
     if not gtin:
         return None
+    return _classify_gtin_id(gtin)
 
-    with suppress(Exception):
-        if ismn.validate(gtin):
-            return "ismn"
 
-    with suppress(Exception):
-        if isbn.validate(gtin):
-            if len(gtin) == 10:
-                return "isbn10"
-            if len(gtin) == 13:
-                return "isbn13"
+def _classify_gtin_id(gtin: str) -> str | None:
+    """Classify a non-empty string of ASCII digits, e.g. from extract_gtin_id.
 
-    with suppress(Exception):
-        if issn.validate(gtin):
+    The type is determined by the length, the prefix and the check digit. The
+    rules match those of ``python-stdnum`` (ISMN, ISBN, ISSN) and
+    ``gtin-validator`` (other GTIN types), checked in that order.
+
+    >>> _classify_gtin_id("9790035236338")
+    'ismn'
+    >>> _classify_gtin_id("9781625441775")
+    'isbn13'
+    >>> _classify_gtin_id("0545010225")
+    'isbn10'
+    >>> _classify_gtin_id("10637710")
+    'issn'
+    >>> _classify_gtin_id("10637711") is None
+    True
+    """
+    length = len(gtin)
+    if length == 13:
+        if not _is_gs1_check_digit_valid(gtin):
+            return None
+        if gtin.startswith("9790"):
+            return "ismn"
+        if gtin.startswith(("978", "979")):
+            return "isbn13"
+        return "gtin13"
+    if length == 10:
+        check = sum(i * int(d) for i, d in enumerate(gtin[:-1], 1)) % 11
+        # a check value of 10 is written as "X", which is not a digit
+        return "isbn10" if check == int(gtin[-1]) else None
+    if length == 8:
+        check = (11 - sum((8 - i) * int(d) for i, d in enumerate(gtin[:-1]))) % 11
+        if check == int(gtin[-1]):
             return "issn"
+    gtin_type = _GS1_TYPES_BY_LENGTH.get(length)
+    if gtin_type and _is_gs1_check_digit_valid(gtin):
+        return gtin_type
+    return None
 
-    if is_valid_GTIN(gtin):
-        if len(gtin) == 8:
-            return "gtin8"
-        if len(gtin) == 14:
-            return "gtin14"
-        if len(gtin) == 13:
-            return "gtin13"
-        if len(gtin) == 12:
-            return "upc"
 
-    return None
+_GS1_TYPES_BY_LENGTH = {8: "gtin8", 12: "upc", 13: "gtin13", 14: "gtin14"}
+
+
+def _is_gs1_check_digit_valid(gtin: str) -> bool:
+    """Check the mod-10 check digit used by all GTIN types.
+
+    >>> _is_gs1_check_digit_valid("7350053850019")
+    True
+    >>> _is_gs1_check_digit_valid("7350053850018")
+    False
+    """
+    total = 3 * sum(map(int, gtin[-2::-2])) + sum(map(int, gtin[-3::-2]))
+    return (10 - total % 10) % 10 == int(gtin[-1])
+
+
+_GTIN_TYPE_CODES = (
+    None,
+    "ismn",
+    "isbn13",
+    "isbn10",
+    "issn",
+    "gtin8",
+    "gtin13",
+    "gtin14",
+    "upc",
+)
+
+
+def _classify_gtin_ids(gtin_ids: Sequence[str]) -> list[str | None]:
+    """Run _classify_gtin_id on many ids, vectorized with NumPy if installed."""
+    try:
+        import numpy as np  # noqa: PLC0415
+    except ImportError:
+        return [_classify_gtin_id(gtin_id) for gtin_id in gtin_ids]
+
+    code = _GTIN_TYPE_CODES.index
+    results: list[str | None] = [None] * len(gtin_ids)
+    indices_by_length: dict[int, list[int]] = {}
+    for index, gtin_id in enumerate(gtin_ids):
+        indices_by_length.setdefault(len(gtin_id), []).append(index)
+    for length, indices in indices_by_length.items():
+        if length not in {8, 10, 12, 13, 14}:
+            continue
+        data = "".join([gtin_ids[index] for index in indices]).encode("ascii")
+        digits = np.frombuffer(data, dtype=np.uint8).reshape(-1, length) - ord("0")
+        body = digits[:, :-1].astype(np.int64)
+        check = digits[:, -1]
+        # weights 3, 1, 3, … from the right of the body
+        gs1_weights = np.where(np.arange(length - 1)[::-1] % 2 == 0, 3, 1)
+        gs1_valid = (10 - (body @ gs1_weights) % 10) % 10 == check
+        if length == 13:
+            isbn = (body[:, 0] == 9) & (body[:, 1] == 7) & (body[:, 2] >= 8)
+            ismn = isbn & (body[:, 2] == 9) & (body[:, 3] == 0)
+            codes = np.select(
+                [~gs1_valid, ismn, isbn],
+                [code(None), code("ismn"), code("isbn13")],
+                code("gtin13"),
+            )
+        elif length == 10:
+            isbn10_valid = (body @ np.arange(1, 10)) % 11 == check
+            codes = np.where(isbn10_valid, code("isbn10"), code(None))
+        elif length == 8:
+            issn_valid = (11 - (body @ np.arange(8, 1, -1)) % 11) % 11 == check
+            codes = np.select(
+                [issn_valid, gs1_valid], [code("issn"), code("gtin8")], code(None)
+            )
+        else:
+            gs1_type = code(_GS1_TYPES_BY_LENGTH[length])
+            codes = np.where(gs1_valid, gs1_type, code(None))
+        for index, type_code in zip(indices, codes.tolist(), strict=True):
+            results[index] = _GTIN_TYPE_CODES[type_code]
+    return results
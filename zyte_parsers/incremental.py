@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import itertools
+from typing import TYPE_CHECKING, Any, cast
+
+from lxml.etree import ElementDefaultClassLookup, HTMLPullParser, XPath
+from lxml.html import HtmlComment, HtmlElement
+from parsel.csstranslator import css2xpath
+
+from .fields import FIELD_EXTRACTORS
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator, Mapping
+
+
+FieldQuery = str | dict[str, str]
+
+# Fields whose extractor also reads the tail of the node ("tail"), or the
+# tail and the next sibling ("next"). The rest only need the node itself.
+_FIELD_CONTEXT = {
+    "aggregateRating": "next",
+    "breadcrumbs": "tail",
+}
+
+
+def _compile_query(query: FieldQuery) -> XPath:
+    if isinstance(query, str):
+        return XPath(css2xpath(query))
+    if "xpath" in query:
+        return XPath(query["xpath"])
+    if "css" in query:
+        return XPath(css2xpath(query["css"]))
+    raise ValueError(f"Expected a 'css' or an 'xpath' key in {query!r}")
+
+
+class IncrementalExtractor:
+    """Extract fields from an HTML document while it is being received.
+
+    Feed the document with :meth:`feed` as data arrives. The value of each
+    field is returned by the :meth:`feed` call that completes the element
+    it is extracted from, so it can be used before the rest of the document
+    is received. Elements that are complete and not needed by any field are
+    removed from the tree, so memory usage does not grow with the document
+    size, and once all fields are extracted the rest of the document is
+    ignored.
+
+    >>> extractor = IncrementalExtractor(
+    ...     {"price": ".price", "breadcrumbs": {"xpath": "//nav"}},
+    ...     base_url="http://example.com",
+    ... )
+    >>> extractor.feed(b'<html><body><nav><a href="/a">A</a> / ')
+    {}
+    >>> extractor.feed(b'<a href="/b">B</a></nav><p class="price">$')
+    {'breadcrumbs': (Breadcrumb(name='A', url='http://example.com/a'), Breadcrumb(name='B', url='http://example.com/b'))}
+    >>> extractor.feed(b"10</p>" + b"<div>...</div>" * 1000)
+    {'price': Price(amount=Decimal('10'), currency='$')}
+    >>> extractor.close()
+    {}
+
+    Fields are extracted from the first element that matches their
+    selector, like in :func:`~zyte_parsers.cli.process_record`. Selectors
+    are matched when the start tag of an element is received, and earlier
+    elements may have been removed by then, so selectors must only depend
+    on the element and its ancestors, e.g. ``nav.breadcrumbs a``, but not
+    ``h1 + div`` or ``li:nth-child(2)``.
+
+    :param fields: Selectors of the elements to extract fields from, by
+        field name (see :data:`~zyte_parsers.fields.FIELD_EXTRACTORS`): a
+        CSS selector string, or a dict with a ``css`` or an ``xpath`` key.
+    :param base_url: URL of the document, used to resolve relative URLs.
+    :param encoding: Encoding of the document, if known.
+    """
+
+    def __init__(
+        self,
+        fields: Mapping[str, FieldQuery],
+        *,
+        base_url: str | None = None,
+        encoding: str | None = None,
+    ):
+        unknown = fields.keys() - FIELD_EXTRACTORS.keys()
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+        self._base_url = base_url
+        self._queries = {name: _compile_query(query) for name, query in fields.items()}
+        self._parser = HTMLPullParser(events=("start", "end"), encoding=encoding)
+        # Unlike lxml.html.HtmlElementClassLookup, which picks classes in
+        # Python, this lookup is implemented in C. Extractors do not need
+        # the classes of specific elements, like FormElement.
+        self._parser.set_element_class_lookup(
+            ElementDefaultClassLookup(element=HtmlElement, comment=HtmlComment)
+        )
+        # Matched elements that are not complete yet, and complete elements
+        # that wait for their tail or next sibling.
+        self._open: dict[str, HtmlElement] = {}
+        self._waiting: dict[str, HtmlElement] = {}
+        self._results: dict[str, Any] = {}
+
+    @property
+    def results(self) -> dict[str, Any]:
+        """Values of all fields extracted so far."""
+        return dict(self._results)
+
+    def feed(self, data: bytes | str) -> dict[str, Any]:
+        """Feed the next part of the document.
+
+        :return: Values of the fields that were extracted thanks to this
+            part of the document.
+        """
+        if len(self._results) == len(self._queries):
+            # Once all fields are extracted, the rest of the document is not
+            # parsed at all.
+            return {}
+        self._parser.feed(data)
+        return self._process_events()
+
+    def close(self) -> dict[str, Any]:
+        """Signal the end of the document.
+
+        :return: Values of the remaining fields. Fields whose selector did
+            not match any element are ``None``.
+        """
+        if len(self._results) == len(self._queries):
+            return {}
+        self._parser.close()
+        new = self._process_events()
+        for name, node in (*self._open.items(), *self._waiting.items()):
+            new[name] = self._extract(name, node)
+        self._open.clear()
+        self._waiting.clear()
+        for name in self._queries:
+            if name not in self._results:
+                new[name] = self._results[name] = None
+        return new
+
+    def _extract(self, name: str, node: HtmlElement) -> Any:
+        value = FIELD_EXTRACTORS[name](node, self._base_url)
+        self._results[name] = value
+        return value
+
+    def _process_events(self) -> dict[str, Any]:
+        new: dict[str, Any] = {}
+        # The element class lookup makes all elements HtmlElement objects.
+        events = cast(
+            "Iterator[tuple[str, HtmlElement]]", iter(self._parser.read_events())
+        )
+        first_event = next(events, None)
+        if first_event is None:
+            return new
+        # The parser builds the tree ahead of the events, so every element
+        # with an event is already in the tree. Selectors are evaluated once
+        # for all of them, as evaluating them for every start event would
+        # take quadratic time.
+        candidates = self._find_candidates(first_event[1])
+        if not (self._open or self._waiting or any(candidates.values())):
+            # Nothing to extract from this part of the document, so only
+            # release the memory it uses.
+            event, node = first_event
+            for event, node in events:  # noqa: B007
+                pass
+            if event == "end":
+                node.clear(keep_tail=True)
+            ancestor: HtmlElement | None = node
+            while ancestor is not None:
+                _remove_previous_siblings(ancestor)
+                ancestor = ancestor.getparent()
+            return new
+        for event, node in itertools.chain([first_event], events):
+            if self._waiting:
+                self._resolve_waiting(event, node, new)
+            if event == "start":
+                for name, matches in candidates.items():
+                    if node in matches and name not in self._open:
+                        self._open[name] = node
+            else:
+                self._end(node, new, candidates)
+                if len(self._results) == len(self._queries):
+                    break
+        return new
+
+    def _find_candidates(self, node: HtmlElement) -> dict[str, set[Any]]:
+        root = node.getroottree().getroot()
+        candidates = {}
+        for name, query in self._queries.items():
+            if name in self._results or name in self._open or name in self._waiting:
+                continue
+            matches = query(root)
+            if isinstance(matches, list):
+                candidates[name] = set(matches)
+        return candidates
+
+    def _resolve_waiting(
+        self, event: str, node: HtmlElement, new: dict[str, Any]
+    ) -> None:
+        # The tail of an element is known at the next event, which is the
+        # start of its next sibling or the end of its parent. Its next
+        # sibling is complete at the end of that sibling.
+        for name, waiting_node in list(self._waiting.items()):
+            if _FIELD_CONTEXT[name] == "next" and not (
+                event == "end"
+                and (node is waiting_node.getnext() or node is waiting_node.getparent())
+            ):
+                continue
+            del self._waiting[name]
+            new[name] = self._extract(name, waiting_node)
+
+    def _end(
+        self,
+        node: HtmlElement,
+        new: dict[str, Any],
+        candidates: dict[str, set[Any]],
+    ) -> None:
+        for name, open_node in list(self._open.items()):
+            if open_node is node:
+                del self._open[name]
+                candidates.pop(name, None)
+                if name in _FIELD_CONTEXT:
+                    self._waiting[name] = node
+                else:
+                    new[name] = self._extract(name, node)
+        if self._open or self._waiting:
+            return
+        # The element itself cannot be removed yet, as the parser may still
+        # add its tail, but its content and its previous siblings can.
+        node.clear(keep_tail=True)
+        _remove_previous_siblings(node)
+
+
+def _remove_previous_siblings(node: HtmlElement) -> None:
+    parent = node.getparent()
+    if parent is not None:
+        while (previous := node.getprevious()) is not None:
+            parent.remove(previous)
@@ -0,0 +1,159 @@
+"""Opt-in timing and counters for extractors and their heuristics.
+
+Recording is disabled by default. When it is disabled, the only overhead
+is an extra function call that checks a flag, which takes a fraction of a
+microsecond per extractor call.
+
+>>> from zyte_parsers import extract_price, instrumentation
+>>> with instrumentation.recording():
+...     _ = extract_price("$10")
+...     _ = extract_price("20 €")
+>>> stats = instrumentation.snapshot()["extract_price"]
+>>> stats["calls"], stats["total_size"]
+(2, 7)
+"""
+
+from __future__ import annotations
+
+import threading
+from collections.abc import Sized
+from contextlib import contextmanager
+from functools import wraps
+from time import perf_counter_ns
+from typing import TYPE_CHECKING, Any, ParamSpec, TypeVar
+
+from lxml.etree import iselement
+
+from .utils import ThreadLocalXPath
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+
+_P = ParamSpec("_P")
+_T = TypeVar("_T")
+
+_LOCK = threading.Lock()
+_STATS: dict[str, list[int]] = {}
+_ENABLED = False
+
+_CALLS, _TOTAL_TIME, _MAX_TIME, _TOTAL_SIZE = range(4)
+_COUNT_ELEMENTS = ThreadLocalXPath("count(descendant-or-self::*)")
+
+
+def is_enabled() -> bool:
+    """Return whether recording is enabled."""
+    return _ENABLED
+
+
+def enable() -> None:
+    """Start recording."""
+    global _ENABLED  # noqa: PLW0603
+    _ENABLED = True
+
+
+def disable() -> None:
+    """Stop recording. Recorded data is kept until :func:`reset`."""
+    global _ENABLED  # noqa: PLW0603
+    _ENABLED = False
+
+
+def reset() -> None:
+    """Remove all recorded data."""
+    with _LOCK:
+        _STATS.clear()
+
+
+@contextmanager
+def recording(*, reset_stats: bool = True) -> Iterator[None]:
+    """Enable recording within a block of code.
+
+    :param reset_stats: Whether to remove previously recorded data first.
+    """
+    was_enabled = _ENABLED
+    if reset_stats:
+        reset()
+    enable()
+    try:
+        yield
+    finally:
+        if not was_enabled:
+            disable()
+
+
+def snapshot() -> dict[str, dict[str, int | float]]:
+    """Return the recorded data as a plain dict.
+
+    Keys are extractor names, e.g. ``"extract_price"``, and heuristic names
+    prefixed by the name of their extractor, e.g.
+    ``"extract_rating_stars.class"``. Values are dicts with:
+
+    * ``calls``: number of calls.
+    * ``total_time`` and ``max_time``: wall time in seconds.
+    * ``total_size``: sum of input sizes: the number of characters of
+      string inputs, the number of elements of node inputs, the number of
+      inputs of bulk extractors or, for heuristics, the number of items
+      they process.
+    """
+    with _LOCK:
+        return {
+            name: {
+                "calls": stats[_CALLS],
+                "total_time": stats[_TOTAL_TIME] / 1e9,
+                "max_time": stats[_MAX_TIME] / 1e9,
+                "total_size": stats[_TOTAL_SIZE],
+            }
+            for name, stats in _STATS.items()
+        }
+
+
+def record(name: str, duration_ns: int, size: int = 1) -> None:
+    """Record a call.
+
+    :param name: Name of the extractor or heuristic.
+    :param duration_ns: Wall time of the call in nanoseconds.
+    :param size: Size of the input of the call.
+    """
+    with _LOCK:
+        stats = _STATS.get(name)
+        if stats is None:
+            stats = _STATS[name] = [0, 0, 0, 0]
+        stats[_CALLS] += 1
+        stats[_TOTAL_TIME] += duration_ns
+        stats[_TOTAL_SIZE] += size
+        stats[_MAX_TIME] = max(stats[_MAX_TIME], duration_ns)
+
+
+def input_size(node: Any) -> int:
+    """Return the size of an extractor input, for :func:`record`."""
+    root = getattr(node, "root", node)  # Selector
+    if iselement(root):
+        return int(_COUNT_ELEMENTS(root))
+    if isinstance(root, Sized):  # strings and sequences of inputs
+        return len(root)
+    return 0 if root is None else 1
+
+
+def instrumented(name: str) -> Callable[[Callable[_P, _T]], Callable[_P, _T]]:
+    """Record calls to the decorated extractor under ``name``.
+
+    The size of the first argument is recorded as the input size.
+    """
+
+    def decorator(func: Callable[_P, _T]) -> Callable[_P, _T]:
+        @wraps(func)
+        def wrapper(*args: _P.args, **kwargs: _P.kwargs) -> _T:
+            if not _ENABLED:
+                return func(*args, **kwargs)
+            start = perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(
+                    name,
+                    perf_counter_ns() - start,
+                    input_size(args[0]) if args else 0,
+                )
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,123 @@
+"""Numbers in text, shared by the rating, review count and star extractors.
+
+Text is scanned once for runs of digits, and the result is cached, so
+extractors that run on the same text, e.g. :func:`~.extract_rating` and
+:func:`~.extract_review_count` on the same node, do not scan it again.
+Each extractor then joins digit runs into numbers its own way:
+
+>>> rating_numbers("4,5/5 (1 234 reviews)")
+['4,5', '5', '1', '234']
+>>> review_numbers("4,5/5 (1 234 reviews)")
+['4,5', '5', '1 234']
+>>> review_numbers("4,5/5 (1 234 reviews)", in_brackets=True)
+['1 234']
+>>> star_numbers("stars-4_5.png"), star_numbers("stars-4.png")
+(['4_5'], ['4.'])
+"""
+
+import re
+from functools import lru_cache
+
+_DIGITS = re.compile(r"\d+")
+_BRACKETS = re.compile(r"\((.*?)\)")
+
+# Texts longer than this are not cached, so that the cache does not keep
+# e.g. the text of whole pages alive.
+MAX_CACHED_LENGTH = 256
+
+
+Runs = tuple[tuple[int, int], ...]
+
+
+def _tokenize(text: str) -> Runs:
+    return tuple(match.span() for match in _DIGITS.finditer(text))
+
+
+_tokenize_cached = lru_cache(maxsize=1024)(_tokenize)
+
+
+def tokenize(text: str) -> Runs:
+    """Return the start and end of every maximal run of digits in a text.
+
+    Runs are returned as spans, rather than as objects, because creating an
+    object for every run would take longer than the regular expressions
+    this replaces.
+    """
+    if len(text) <= MAX_CACHED_LENGTH:
+        return _tokenize_cached(text)
+    return _tokenize(text)
+
+
+def rating_numbers(text: str) -> list[str]:
+    r"""Numbers as found by ``re.findall(r"\d*,\d+|\d*\.\d+|\d+", text)``.
+
+    Decimal separators can be commas or dots, and numbers can start with
+    them, e.g. ``.5``.
+    """
+    runs = tokenize(text)
+    numbers = []
+    i = 0
+    while i < len(runs):
+        start, end = runs[i]
+        i += 1
+        if start and text[start - 1] in ",.":
+            numbers.append(text[start - 1 : end])
+        elif i < len(runs) and runs[i][0] == end + 1 and text[end] in ",.":
+            numbers.append(text[start : runs[i][1]])
+            i += 1
+        else:
+            numbers.append(text[start:end])
+    return numbers
+
+
+def review_numbers(text: str, *, in_brackets: bool = False) -> list[str]:
+    r"""Numbers as found by ``re.findall(r"\d+?,\d+|\d+? \d+|\d+", text)``.
+
+    Thousands separators can be commas or spaces.
+
+    :param in_brackets: Only return numbers inside the first pair of
+        brackets, as if *text* was the content of those brackets.
+    """
+    runs = tokenize(text)
+    if in_brackets:
+        brackets = _BRACKETS.search(text) if "(" in text else None
+        if brackets is None:
+            return []
+        bracket_start, bracket_end = brackets.span(1)
+        runs = tuple(
+            run for run in runs if bracket_start <= run[0] and run[1] <= bracket_end
+        )
+    numbers = []
+    i = 0
+    while i < len(runs):
+        start, end = runs[i]
+        i += 1
+        if i < len(runs) and runs[i][0] == end + 1 and text[end] in ", ":
+            numbers.append(text[start : runs[i][1]])
+            i += 1
+        else:
+            numbers.append(text[start:end])
+    return numbers
+
+
+def star_numbers(text: str) -> list[str]:
+    r"""Numbers as found by ``re.findall(r"\d+[.\-_,]?\d*", text)``.
+
+    Decimal separators can be dots, dashes, underscores or commas, as in
+    file names and class names, and they can end a number, e.g. ``5.``.
+    """
+    runs = tokenize(text)
+    numbers = []
+    i = 0
+    while i < len(runs):
+        start, end = runs[i]
+        i += 1
+        if end < len(text) and text[end] in ".-_,":
+            if i < len(runs) and runs[i][0] == end + 1:
+                numbers.append(text[start : runs[i][1]])
+                i += 1
+            else:
+                numbers.append(text[start : end + 1])
+        else:
+            numbers.append(text[start:end])
+    return numbers
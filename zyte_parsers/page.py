@@ -0,0 +1,249 @@
+import heapq
+import itertools
+import re
+from collections.abc import Callable, Collection
+from typing import TYPE_CHECKING, Any
+
+import attr
+from lxml.etree import Element
+from lxml.html import HtmlElement
+from price_parser import Price
+
+from .aggregate_rating import AggregateRating, extract_rating
+from .api import input_to_element
+from .breadcrumbs import Breadcrumb, _extract_markup_type, extract_breadcrumbs
+from .budget import Budget
+from .gtin import Gtin, extract_gtin
+from .instrumentation import instrumented
+from .price import extract_price
+from .structured_data import extract_structured_data
+
+if TYPE_CHECKING:
+    from .api import SelectorOrElement
+else:
+    from .api import _RuntimeSelectorOrElement as SelectorOrElement
+
+
+@attr.s(frozen=True, auto_attribs=True, slots=True)
+class PageFields:
+    breadcrumbs: tuple[Breadcrumb, ...] | None = None
+    aggregateRating: AggregateRating | None = None
+    price: Price | None = None
+    gtin: Gtin | None = None
+
+    def __reduce__(self) -> "tuple[type[PageFields], tuple[Any, ...]]":
+        return type(self), (
+            self.breadcrumbs,
+            self.aggregateRating,
+            self.price,
+            self.gtin,
+        )
+
+
+_CURRENCY_SYMBOLS = "$€£¥₹₽₩"
+_CURRENCY_NUMBER = re.compile(rf"[{_CURRENCY_SYMBOLS}]\s*\d|\d\s*[{_CURRENCY_SYMBOLS}]")
+_GTIN_LABEL = re.compile(r"(?:^|[\W_])(?:gtin|ean|upc|isbn)", re.IGNORECASE)
+_GTIN_NUMBER = re.compile(r"(?<!\d)(?:\d{8}|\d{12,14})(?!\d)")
+_GTIN_ITEMPROPS = frozenset({"gtin", "gtin8", "gtin12", "gtin13", "gtin14", "isbn"})
+# Elements are only scored if they have one of these hints in their class,
+# id or aria-label, or if their text matches one of the text patterns.
+_HINTS = re.compile(r"breadcrumb|rating|price|gtin|ean|upc|isbn")
+_TEXT_HINTS = re.compile(
+    rf"{_CURRENCY_NUMBER.pattern}|{_GTIN_NUMBER.pattern}", re.IGNORECASE
+)
+_SKIPPED_TAGS = frozenset({"script", "style"})
+# Prices that are not the current one, e.g. "was $20".
+_OLD_PRICE_TAGS = frozenset({"del", "s", "strike"})
+_OLD_PRICE_HINTS = ("old", "was", "strike", "compare", "regular")
+
+
+# Extractors of each field, which get a node, the base URL and a budget.
+_EXTRACTORS: dict[str, Callable[[HtmlElement, str | None, "Budget | None"], Any]] = {
+    "aggregateRating": lambda node, _, budget: extract_rating(node, budget=budget),
+    "breadcrumbs": lambda node, base_url, budget: extract_breadcrumbs(
+        node, base_url=base_url, budget=budget
+    ),
+    "gtin": lambda node, _, budget: extract_gtin(node, budget=budget),
+    "price": lambda node, _, budget: extract_price(node, budget=budget),
+}
+
+# Extractors of fields that can be extracted from a content attribute.
+_CONTENT_EXTRACTORS: dict[str, Callable[[str, "Budget | None"], Any]] = {
+    "gtin": lambda content, budget: extract_gtin(content, budget=budget),
+    "price": lambda content, budget: extract_price(content, budget=budget),
+}
+
+
+class _Scores:
+    """Scores of candidate elements for each field."""
+
+    def __init__(self) -> None:
+        self.by_field: dict[str, dict[HtmlElement, int]] = {
+            name: {} for name in attr.fields_dict(PageFields)
+        }
+        self._positions: dict[HtmlElement, int] = {}
+
+    def add(self, field: str, node: HtmlElement, position: int, score: int) -> None:
+        scores = self.by_field[field]
+        scores[node] = scores.get(node, 0) + score
+        self._positions.setdefault(node, position)
+
+    def best(self, field: str, n: int) -> list[HtmlElement]:
+        """Return the ``n`` best candidates for a field, in order. Ties are
+        broken by position in the page."""
+        scores = self.by_field[field]
+        return heapq.nsmallest(
+            n,
+            (node for node, score in scores.items() if score > 0),
+            key=lambda node: (-scores[node], self._positions[node]),
+        )
+
+
+def _score_page(
+    root: HtmlElement, fields: Collection[str], budget: "Budget | None" = None
+) -> _Scores:
+    """Score the elements of the page as candidates for the given fields."""
+    scores = _Scores()
+    if not fields:
+        return scores
+    add = scores.add
+    breadcrumbs = "breadcrumbs" in fields
+    rating = "aggregateRating" in fields
+    price = "price" in fields
+    gtin = "gtin" in fields
+    nodes = root.iter(Element)  # not comments
+    if budget is not None:
+        nodes = itertools.takewhile(lambda _: budget.visit(), nodes)
+    for position, node in enumerate(nodes):
+        # Getting all attributes at once is faster than getting each one.
+        items = node.items()
+        attrib = dict(items) if items else {}
+        itemprop = attrib.get("itemprop")
+        itemtype = attrib.get("itemtype") or attrib.get("typeof")
+        hints = (
+            f"{attrib.get('class', '')} {attrib.get('id', '')} "
+            f"{attrib.get('aria-label', '')}".lower()
+            if items
+            else ""
+        )
+        if hints and not _HINTS.search(hints):
+            hints = ""
+        text = node.text
+        if text and (node.tag in _SKIPPED_TAGS or not _TEXT_HINTS.search(text)):
+            text = None
+        if not (itemprop or itemtype or hints or text):
+            continue
+
+        if breadcrumbs:
+            if "breadcrumb" in hints:
+                add("breadcrumbs", node, position, 2)
+            if itemtype:
+                if "breadcrumblist" in itemtype.lower():
+                    add("breadcrumbs", node, position, 3)
+                # Breadcrumb items marked up with schema.org or
+                # data-vocabulary.org.
+                parent = node.getparent()
+                if parent is not None and _extract_markup_type(node):
+                    add("breadcrumbs", parent, position, 1)
+
+        if rating and (itemprop == "ratingValue" or "rating" in hints):
+            add("aggregateRating", node, position, 3 if itemprop else 2)
+
+        if price:
+            if itemprop == "price":
+                add("price", node, position, 3)
+            if "price" in hints:
+                if any(hint in hints for hint in _OLD_PRICE_HINTS):
+                    add("price", node, position, -3)
+                else:
+                    add("price", node, position, 2)
+            if text and _CURRENCY_NUMBER.search(text):
+                add("price", node, position, -3 if node.tag in _OLD_PRICE_TAGS else 1)
+
+        if gtin:
+            if itemprop in _GTIN_ITEMPROPS:
+                add("gtin", node, position, 3)
+            if hints and _GTIN_LABEL.search(hints):
+                add("gtin", node, position, 2)
+            if text and _GTIN_NUMBER.search(text):
+                add("gtin", node, position, 2 if _GTIN_LABEL.search(text) else 1)
+    return scores
+
+
+def _is_found(value: Any) -> bool:
+    if isinstance(value, AggregateRating):
+        return value.ratingValue is not None
+    if isinstance(value, (Breadcrumb, Gtin, tuple)) or value is None:
+        return bool(value)
+    return value.amount is not None  # Price
+
+
+@instrumented("extract_page")
+def extract_page(
+    tree: "SelectorOrElement",
+    base_url: str | None,
+    *,
+    max_candidates: int = 3,
+    budget: "Budget | None" = None,
+) -> PageFields:
+    """Extract all supported product fields from a whole page.
+
+    Breadcrumbs, rating and GTIN are first taken from the JSON-LD and
+    microdata of the page, see :func:`~.extract_structured_data`. For the
+    other fields, instead of requiring the node of each field, like the
+    other extractors, the page is walked once to score every element as a
+    candidate for each field, using markup (e.g. ``itemprop`` and
+    breadcrumb item types), ``class``, ``id`` and ``aria-label`` values
+    (e.g. ``price`` or ``rating``) and the text of the element (e.g.
+    currency symbols next to numbers or GTIN-like numbers). The extractor
+    of each field then only runs on its best candidates, in order, until
+    one of them returns a value.
+
+    >>> from lxml.html import fromstring
+    >>> page = extract_page(
+    ...     fromstring(
+    ...         '<html><body><nav class="breadcrumbs"><a href="/">Home</a> / '
+    ...         '<a href="/c">Category</a></nav><h1>Product</h1>'
+    ...         '<p class="price">$10</p><p>EAN: 7350053850019</p></body></html>'
+    ...     ),
+    ...     base_url="http://example.com",
+    ... )
+    >>> page.price
+    Price(amount=Decimal('10'), currency='$')
+    >>> page.gtin
+    Gtin(type='gtin13', value='7350053850019')
+    >>> [breadcrumb.name for breadcrumb in page.breadcrumbs]
+    ['Home', 'Category']
+
+    :param tree: The root of the page, or any other element to search in.
+        Structured data is always read from the whole page.
+    :param base_url: Base URL of the page.
+    :param max_candidates: Maximum number of candidates to try per field.
+    :param budget: A :class:`~zyte_parsers.Budget` to count the work
+        against, both the walk of the page and the extraction of each
+        field. Reading structured data is not counted.
+    :return: The fields that were found. Missing fields are ``None``.
+    """
+    root = input_to_element(tree)
+    if not isinstance(root, HtmlElement):
+        return PageFields()
+    structured_data = extract_structured_data(root, base_url)
+    fields: dict[str, Any] = {
+        name: value
+        for name, value in attr.asdict(structured_data, recurse=False).items()
+        if _is_found(value)
+    }
+    missing = [name for name in attr.fields_dict(PageFields) if name not in fields]
+    scores = _score_page(root, missing, budget)
+    for name in missing:
+        for node in scores.best(name, max_candidates):
+            content = node.get("content")
+            if content and name in _CONTENT_EXTRACTORS:
+                # e.g. <meta itemprop="price" content="10.00">
+                value = _CONTENT_EXTRACTORS[name](content, budget)
+            else:
+                value = _EXTRACTORS[name](node, base_url, budget)
+            if _is_found(value):
+                fields[name] = value
+                break
+    return PageFields(**fields)
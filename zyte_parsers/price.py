@@ -1,19 +1,65 @@
 from __future__ import annotations
 
+from functools import lru_cache
 from typing import TYPE_CHECKING
 
 from price_parser import Price
 
+from zyte_parsers.budget import Budget
+from zyte_parsers.instrumentation import instrumented
 from zyte_parsers.utils import extract_text
 
 if TYPE_CHECKING:
-    from zyte_parsers import SelectorOrElement
+    from functools import _CacheInfo
 
+    from zyte_parsers.api import SelectorOrElement
+else:
+    from zyte_parsers.api import _RuntimeSelectorOrElement as SelectorOrElement
 
+
+class PriceCache:
+    """Cache of price parsing results, to pass to :func:`extract_price`.
+
+    Price strings are often repeated a lot, e.g. in listing pages of the same
+    website, and with this cache each distinct combination of price text and
+    currency hint text is only parsed once. The least recently used entries
+    are discarded once there are ``maxsize`` of them.
+
+    The same cache can be used from several threads at once.
+
+    >>> cache = PriceCache(maxsize=100)
+    >>> extract_price("$19.99", cache=cache)
+    Price(amount=Decimal('19.99'), currency='$')
+    >>> extract_price("$19.99", cache=cache)
+    Price(amount=Decimal('19.99'), currency='$')
+    >>> cache.info()
+    CacheInfo(hits=1, misses=1, maxsize=100, currsize=1)
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        self._fromstring = lru_cache(maxsize=maxsize)(Price.fromstring)
+
+    def fromstring(self, text: str | None, currency_hint: str | None) -> Price:
+        price = self._fromstring(text, currency_hint=currency_hint)
+        # Price objects are mutable, so every caller gets its own copy.
+        return Price(price.amount, price.currency, price.amount_text)
+
+    def info(self) -> _CacheInfo:
+        """Return the hit and miss statistics and the size of the cache."""
+        return self._fromstring.cache_info()
+
+    def clear(self) -> None:
+        """Remove all entries and reset the statistics."""
+        self._fromstring.cache_clear()
+
+
+@instrumented("extract_price")
 def extract_price(
     node: SelectorOrElement | str,
     *,
     currency_hint: SelectorOrElement | str | None = None,
+    cache: PriceCache | None = None,
+    budget: Budget | None = None,
 ) -> Price:
     """Extract a price value from a node or a string that contains it.
 
@@ -22,9 +68,22 @@ def extract_price(
         be passed as a hint to ``price-parser``. If currency is present in the
         price string, it could be preferred over the value extracted from
         ``currency_hint``.
+    :param cache: A cache of parsing results to use.
+    :param budget: A :class:`~zyte_parsers.Budget` to count the work
+        against.
     :return: The price value as a ``price_parser.Price`` object.
     """
-    text = node if isinstance(node, str) else extract_text(node)
-    if currency_hint is not None and not isinstance(currency_hint, str):
-        currency_hint = extract_text(currency_hint)
+    text = _extract_text(node, budget)
+    if currency_hint is not None:
+        currency_hint = _extract_text(currency_hint, budget)
+    if cache is not None:
+        return cache.fromstring(text, currency_hint)
     return Price.fromstring(text, currency_hint=currency_hint)
+
+
+def _extract_text(node: SelectorOrElement | str, budget: Budget | None) -> str | None:
+    if not isinstance(node, str):
+        return extract_text(node, budget=budget)
+    if budget is not None and not budget.read_text(node):
+        return None
+    return node
@@ -0,0 +1,300 @@
+"""Streaming readers of crawl archives.
+
+The readers yield the URL and the parsed HTML of each page of an archive,
+to pass to the extractors::
+
+    from zyte_parsers import extract_page
+    from zyte_parsers.readers import read_warc
+
+    for url, tree in read_warc("crawl.warc.gz"):
+        print(url, extract_page(tree, url))
+
+Archives are read and parsed one record at a time, so memory usage does not
+depend on their size. Compression with gzip, including the per-record
+compression of ``.warc.gz`` files, and with Zstandard is detected and
+decompressed on the fly. Zstandard needs Python 3.14 or later, or the
+``zstandard`` package (``pip install zyte-parsers[zstd]``).
+"""
+
+from __future__ import annotations
+
+import gzip
+import io
+import json
+import os
+import zlib
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO, cast
+
+from lxml.etree import ParserError
+from lxml.html import HTMLParser, document_fromstring
+from w3lib.encoding import html_to_unicode
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from lxml.html import HtmlElement
+
+_GZIP_MAGIC = b"\x1f\x8b"
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+_HTML_CONTENT_TYPES = frozenset({"text/html", "application/xhtml+xml"})
+# Size of the reads used to skip records that are not needed.
+_SKIP_SIZE = 64 * 1024
+
+
+def _open_zstd(f: BinaryIO) -> BinaryIO:
+    try:
+        from compression import zstd  # noqa: PLC0415
+    except ImportError:
+        try:
+            import zstandard  # noqa: PLC0415
+        except ImportError:
+            raise ImportError(
+                "Reading Zstandard-compressed files requires Python 3.14 or"
+                " later, or the zstandard package"
+            ) from None
+        reader = zstandard.ZstdDecompressor().stream_reader(
+            f, read_across_frames=True, closefd=False
+        )
+        return cast("BinaryIO", io.BufferedReader(reader))
+    return cast("BinaryIO", zstd.ZstdFile(f))
+
+
+def _peek(f: BinaryIO, size: int) -> bytes:
+    peek = getattr(f, "peek", None)
+    if peek is not None:
+        return cast("bytes", peek(size))[:size]
+    position = f.tell()
+    data = f.read(size)
+    f.seek(position)
+    return data
+
+
+@contextmanager
+def open_archive(source: str | os.PathLike[str] | BinaryIO) -> Iterator[BinaryIO]:
+    """Open a file for reading, decompressing it on the fly if it is
+    compressed with gzip or Zstandard.
+
+    :param source: Path of the file, or a binary file object, which must be
+        seekable or have a ``peek`` method, like files opened in ``"rb"``
+        mode. File objects are not closed.
+    """
+    with ExitStack() as stack:
+        if isinstance(source, (str, os.PathLike)):
+            source = stack.enter_context(Path(source).open("rb"))
+        magic = _peek(source, 4)
+        if magic.startswith(_GZIP_MAGIC):
+            yield cast("BinaryIO", stack.enter_context(gzip.GzipFile(fileobj=source)))
+        elif magic == _ZSTD_MAGIC:
+            yield stack.enter_context(_open_zstd(source))
+        else:
+            yield source
+
+
+def _parse_html(html: str, url: str | None) -> HtmlElement | None:
+    # Parsing the UTF-8 encoding of the text, like parsel does, supports
+    # documents with an XML declaration, unlike parsing the text.
+    try:
+        return document_fromstring(
+            html.encode("utf8"), parser=HTMLParser(encoding="utf-8"), base_url=url
+        )
+    except ParserError:  # empty document
+        return None
+
+
+def read_jsonl(
+    source: str | os.PathLike[str] | BinaryIO,
+    *,
+    url_key: str = "url",
+    html_key: str = "html",
+) -> Iterator[tuple[str | None, HtmlElement]]:
+    r"""Yield the URL and the parsed HTML of each record of a JSONL file.
+
+    >>> records = io.BytesIO(
+    ...     b'{"url": "https://example.com", "html": "<p>Hello</p>"}\n'
+    ...     b'{"url": "https://example.com/image.png"}\n'
+    ... )
+    >>> [(url, tree.text_content()) for url, tree in read_jsonl(records)]
+    [('https://example.com', 'Hello')]
+
+    Records without HTML or with an empty one are skipped.
+
+    :param source: Path of the file, or a binary file object, see
+        :func:`open_archive`.
+    :param url_key: Key of the URL in the records.
+    :param html_key: Key of the HTML in the records.
+    :raises ValueError: If a line is not valid JSON.
+    """
+    with open_archive(source) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            html = record.get(html_key)
+            if not isinstance(html, str):
+                continue
+            url = record.get(url_key)
+            tree = _parse_html(html, url)
+            if tree is not None:
+                yield url, tree
+
+
+def _read_headers(f: BinaryIO, limit: int, encoding: str) -> tuple[dict[str, str], int]:
+    """Read header lines up to an empty line, reading at most ``limit``
+    bytes.
+
+    :return: The headers, with lowercase names, and the number of bytes read.
+    """
+    headers: dict[str, str] = {}
+    size = 0
+    name = None
+    while size < limit:
+        line = f.readline(limit - size)
+        size += len(line)
+        if not line.strip():
+            break
+        text = line.decode(encoding, "replace")
+        if text[0] in " \t" and name is not None:  # continuation line
+            headers[name] += " " + text.strip()
+            continue
+        name, _, value = text.partition(":")
+        name = name.strip().lower()
+        headers[name] = value.strip()
+    return headers, size
+
+
+def _skip(f: BinaryIO, size: int) -> None:
+    if f.seekable():
+        f.seek(size, io.SEEK_CUR)
+        return
+    while size > 0:
+        data = f.read(min(size, _SKIP_SIZE))
+        if not data:
+            return
+        size -= len(data)
+
+
+def _is_html(content_type: str) -> bool:
+    return content_type.partition(";")[0].strip().lower() in _HTML_CONTENT_TYPES
+
+
+def _dechunk(body: bytes) -> bytes:
+    """Decode a body with the chunked transfer encoding.
+
+    Some tools store decoded bodies without removing the Transfer-Encoding
+    header, so bodies that are not validly chunked are returned as is.
+    """
+    chunks: list[bytes] = []
+    position = 0
+    try:
+        while True:
+            end = body.index(b"\r\n", position)
+            size = int(body[position:end].partition(b";")[0], 16)
+            if size == 0:
+                return b"".join(chunks)
+            position = end + 2
+            chunks.append(body[position : position + size])
+            position += size + 2
+    except ValueError:
+        return body
+
+
+def _decode_body(body: bytes, headers: dict[str, str]) -> bytes | None:
+    """Undo the transfer and content encodings of an HTTP body.
+
+    :return: The decoded body, or ``None`` if it cannot be decoded.
+    """
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        body = _dechunk(body)
+    encodings = headers.get("content-encoding", "").lower().split(",")
+    try:
+        for encoding in reversed([e.strip() for e in encodings if e.strip()]):
+            if encoding in {"gzip", "x-gzip"}:
+                body = gzip.decompress(body)
+            elif encoding == "deflate":
+                try:
+                    body = zlib.decompress(body)
+                except zlib.error:  # raw deflate, without zlib headers
+                    body = zlib.decompress(body, -zlib.MAX_WBITS)
+            elif encoding != "identity":  # e.g. Brotli
+                return None
+    except (OSError, EOFError, zlib.error):
+        return None
+    return body
+
+
+def read_warc_html(
+    source: str | os.PathLike[str] | BinaryIO,
+) -> Iterator[tuple[str, str]]:
+    """Yield the URL and the HTML of each HTML page of a WARC file, like
+    :func:`read_warc`, but without parsing the HTML.
+
+    :param source: Path of the file, or a binary file object, see
+        :func:`open_archive`.
+    :raises ValueError: If the file is not a valid WARC file.
+    """
+    with open_archive(source) as f:
+        yield from _read_warc_html(f)
+
+
+def _read_warc_html(f: BinaryIO) -> Iterator[tuple[str, str]]:
+    while line := f.readline():
+        if not line.strip():  # end of the previous record
+            continue
+        if not line.startswith(b"WARC/"):
+            raise ValueError(f"Expected the start of a WARC record, got {line[:50]!r}")
+        headers, _ = _read_headers(f, 1 << 20, "utf8")
+        try:
+            remaining = int(headers.get("content-length", ""))
+        except ValueError:
+            raise ValueError(
+                f"Invalid Content-Length in WARC record {headers!r}"
+            ) from None
+        url = headers.get("warc-target-uri", "")
+        if url.startswith("<") and url.endswith(">"):
+            url = url[1:-1]
+        record_type = headers.get("warc-type")
+        content_type = headers.get("content-type", "")
+        body = None
+        if record_type == "response" and content_type.startswith("application/http"):
+            status_line = f.readline(remaining)
+            remaining -= len(status_line)
+            http_headers, size = _read_headers(f, remaining, "latin-1")
+            remaining -= size
+            status = status_line.split(None, 2)[1:2]
+            content_type = http_headers.get("content-type", "")
+            if status and status[0].startswith(b"2") and _is_html(content_type):
+                body = f.read(remaining)
+                remaining -= len(body)
+                body = _decode_body(body, http_headers)
+        elif record_type == "resource" and _is_html(content_type):
+            body = f.read(remaining)
+            remaining -= len(body)
+        _skip(f, remaining)
+        if body is not None:
+            _, html = html_to_unicode(content_type, body)
+            yield url, html
+
+
+def read_warc(
+    source: str | os.PathLike[str] | BinaryIO,
+) -> Iterator[tuple[str, HtmlElement]]:
+    """Yield the URL and the parsed HTML of each HTML page of a WARC file.
+
+    Pages are read from ``response`` records with a 2xx HTTP status and an
+    HTML content type, and from ``resource`` records with an HTML content
+    type. Other records, and bodies with content encodings other than gzip
+    and deflate, e.g. Brotli, are skipped without being parsed.
+
+    The encoding of each page is detected from its HTTP headers and its
+    content, the way web browsers do.
+
+    :param source: Path of the file, or a binary file object, see
+        :func:`open_archive`.
+    :raises ValueError: If the file is not a valid WARC file.
+    """
+    for url, html in read_warc_html(source):
+        tree = _parse_html(html, url)
+        if tree is not None:
+            yield url, tree
@@ -1,21 +1,34 @@
 from __future__ import annotations
 
-import re
+from typing import TYPE_CHECKING
 
 from price_parser.parser import parse_number
 
-from .api import SelectorOrElement, input_to_element
+from .api import input_to_element
+from .budget import Budget
+from .instrumentation import instrumented
+from .numeric import review_numbers
 from .utils import extract_text
 
+if TYPE_CHECKING:
+    from .api import SelectorOrElement
+else:
+    from .api import _RuntimeSelectorOrElement as SelectorOrElement
 
-def extract_review_count(node: SelectorOrElement) -> int | None:
+
+@instrumented("extract_review_count")
+def extract_review_count(
+    node: SelectorOrElement, *, budget: Budget | None = None
+) -> int | None:
     """Extract review count from a node containing it.
 
     :param node: Node that includes the review count.
+    :param budget: A :class:`~zyte_parsers.Budget` to count the work
+        against.
     :return: Review count as an int or None.
     """
     node = input_to_element(node)
-    node_text = extract_text(node)
+    node_text = extract_text(node, budget=budget)
     return extract_review_count_from_text(node_text)
 
 
@@ -28,17 +41,14 @@ def extract_review_count_from_text(node_text: str | None) -> int | None:
     """
     if not node_text:
         return None
-    review_count_regex = r"\d+?,\d+|\d+? \d+|\d+"
-    review_counts = re.findall(review_count_regex, node_text)
-    bracket_content = re.search(r"\((.*?)\)", node_text)
+    review_counts = review_numbers(node_text)
     if len(review_counts) == 1:
         return normalize_to_int(review_counts[0])
-    if len(review_counts) > 1 and bracket_content:
+    if len(review_counts) > 1:
         # Sometime text consist of both rating and review count
         # Eg. 4.5/5 (2 reviews)
-        # Extract the text from brackets in such cases
-        bracket_text = bracket_content.group(1)
-        review_counts = re.findall(review_count_regex, bracket_text)
+        # Extract the number from brackets in such cases
+        review_counts = review_numbers(node_text, in_brackets=True)
         if len(review_counts) == 1:
             return normalize_to_int(review_counts[0])
     return None
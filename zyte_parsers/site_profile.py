@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import threading
+from typing import NamedTuple
+
+
+class ProfileInfo(NamedTuple):
+    """Statistics of a :class:`SiteProfile` for one extractor."""
+
+    #: Name of the last strategy that produced a result.
+    strategy: str | None
+    #: Number of calls where that strategy, tried first, produced the result.
+    hits: int
+    #: Number of calls where all strategies were run.
+    misses: int
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of calls that only needed the strategy tried first."""
+        calls = self.hits + self.misses
+        return self.hits / calls if calls else 0.0
+
+
+class SiteProfile:
+    """What worked for previous pages of a website, to pass to extractors.
+
+    On a given website, results usually come from the same extraction
+    strategy, e.g. rating stars from the ``title`` attribute of an element.
+    Extractors that get a profile record the strategy that produced each
+    result, and on later calls try it first, stopping as soon as it
+    produces a result that is confirmed, e.g. by another strategy. When it
+    does not, all strategies are run, as without a profile, and the one
+    that produces the result is tried first next time.
+
+    Results can differ from those without a profile when a confirmed value
+    is contradicted by elements that were not visited, so use one profile
+    per website, e.g. per domain:
+
+    >>> from collections import defaultdict
+    >>> from lxml.html import fromstring
+    >>> from zyte_parsers import extract_rating_stars
+    >>> profiles = defaultdict(SiteProfile)
+    >>> profile = profiles["example.com"]
+    >>> for value in (4, 3):
+    ...     html = f'<p title="{value} of 5" class="stars-{value}">*</p>'
+    ...     extract_rating_stars(fromstring(html), profile=profile)
+    4.0
+    3.0
+    >>> profile.info()
+    {'extract_rating_stars': ProfileInfo(strategy='attrib', hits=1, misses=1)}
+
+    Extractors that support profiles, and their strategies:
+
+    - :func:`~zyte_parsers.extract_rating_stars`: ``attrib``, ``img``,
+      ``class``, ``nodes`` and ``style_width``. A value is only confirmed
+      if another strategy finds it in the same element, and none finds a
+      different one there. A value of 5 is often the scale of the rating
+      rather than the rating, so when the strategy tried first finds it,
+      all strategies are run.
+    - :func:`~zyte_parsers.extract_breadcrumbs`: ``markup`` and
+      ``separators``, the post-processing used for the result. Only
+      ``markup`` has a faster path, which stops visiting the page after the
+      breadcrumb items with markup when no markup is left, so calls that
+      use ``separators`` are always misses.
+
+    The same profile can be used from several threads at once.
+    """
+
+    def __init__(self) -> None:
+        self._strategies: dict[str, str] = {}
+        self._hits: dict[str, int] = {}
+        self._misses: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def strategy(self, extractor: str) -> str | None:
+        """Return the strategy to try first for an extractor, if any."""
+        return self._strategies.get(extractor)
+
+    def record(self, extractor: str, strategy: str | None, *, hit: bool) -> None:
+        """Record the result of an extractor call.
+
+        :param extractor: Name of the extractor.
+        :param strategy: Strategy that produced the result, or ``None`` if
+            there was no result.
+        :param hit: Whether the strategy tried first produced the result.
+        """
+        counts = self._hits if hit else self._misses
+        with self._lock:
+            counts[extractor] = counts.get(extractor, 0) + 1
+            if strategy is not None:
+                self._strategies[extractor] = strategy
+
+    def info(self) -> dict[str, ProfileInfo]:
+        """Return the statistics of each extractor that used the profile."""
+        with self._lock:
+            names = sorted({*self._hits, *self._misses})
+            return {
+                name: ProfileInfo(
+                    self._strategies.get(name),
+                    self._hits.get(name, 0),
+                    self._misses.get(name, 0),
+                )
+                for name in names
+            }
+
+    def clear(self) -> None:
+        """Forget all strategies and reset the statistics."""
+        with self._lock:
+            self._strategies.clear()
+            self._hits.clear()
+            self._misses.clear()
@@ -1,89 +1,228 @@
 from __future__ import annotations
 
-import copy
 import re
+from time import perf_counter_ns
+from typing import TYPE_CHECKING, cast
 from urllib.parse import urlparse
 
-from lxml.etree import strip_attributes
-from lxml.html import HtmlElement, tostring
+from lxml.html import tostring
 
-from .api import SelectorOrElement, input_to_element
+from . import instrumentation
+from .api import input_to_element
+from .budget import Budget
+from .fragment_cache import FragmentCache
+from .instrumentation import instrumented
+from .numeric import star_numbers
+from .site_profile import SiteProfile
+from .utils import ThreadLocalXPath
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Hashable, Iterable, Iterator
+
+    from lxml.html import HtmlElement
+
+    from .api import SelectorOrElement
+else:
+    from .api import _RuntimeSelectorOrElement as SelectorOrElement
 
 # this is by far the most common, although 10 is also possible
 # Some code below assumes it's 5 (with asserts in place).
 BEST_RATING = 5
 
-OF_STAR_PATTERNS = [
+# In order of priority. Each pattern must have a single capturing group.
+OF_STAR_PATTERNS = (
     r"^(\d+\.?\d*) stars",
-    r"^(\d+\.?\d*) (out )?of 5 stars",
-    r"^rated (\d+\.?\d*) (out )?of 5\b",
-    r"\b(\d+\.?\d*) (out )?of 5\b",
+    r"^(\d+\.?\d*) (?:out )?of 5 stars",
+    r"^rated (\d+\.?\d*) (?:out )?of 5\b",
+    r"\b(\d+\.?\d*) (?:out )?of 5\b",
     r"^(\d+\.?\d*)$",
-]
+)
+# All patterns are anchored at the start of the text except one, which can
+# only match at the start of the text if no other pattern does, so for a
+# given text the leftmost match of the alternation is also the match of the
+# pattern with the highest priority, and its group number is the priority.
+_OF_STAR_REGEX = re.compile("|".join(f"(?:{p})" for p in OF_STAR_PATTERNS))
+_WHITESPACE_REGEX = re.compile(r"\s+")
 
 
-def extract_rating_stars(node: SelectorOrElement) -> float | None:
+@instrumented("extract_rating_stars")
+def extract_rating_stars(
+    node: SelectorOrElement,
+    *,
+    budget: Budget | None = None,
+    profile: SiteProfile | None = None,
+    cache: FragmentCache | None = None,
+) -> float | None:
     """Extract a rating value from a node containing rating stars.
 
     :param node: Node that includes the rating stars.
+    :param budget: A :class:`~zyte_parsers.Budget` to count the work
+        against. If it runs out, the value is decided from the elements
+        visited so far.
+    :param profile: A :class:`~zyte_parsers.SiteProfile` of the website of
+        the node, to try the strategy that worked for its previous pages
+        first.
+    :param cache: A :class:`~zyte_parsers.FragmentCache` of results for
+        fragments seen before. It is not used if ``profile`` is given.
     :return: Rating value as a float or None.
     """
     node = input_to_element(node)
-    if any(_extract_rating_stars_nodes_quick_check(subnode) for subnode in node.iter()):
-        node = copy.deepcopy(node)
-        strip_attributes(node, "ng-class")
-
-    extractions: set[float] = set()
-    for subnode in node.iter():
-        extractions.update(
-            extractor(subnode)  # type: ignore[misc]
-            for extractor in [
-                _extract_rating_stars_attrib,
-                _extract_rating_stars_img,
-                _extract_rating_stars_class,
-                _extract_rating_stars_nodes,
-                _extract_rating_stars_style_width,
-            ]
+    if cache is not None and profile is None:
+        return cache.get_or_compute(
+            cache.key("extract_rating_stars", node),
+            lambda: _extract(node, budget, profile),
+            budget=budget,
         )
-    extractions = {
+    return _extract(node, budget, profile)
+
+
+def _extract(
+    node: HtmlElement, budget: Budget | None, profile: SiteProfile | None
+) -> float | None:
+    if profile is not None:
+        return _extract_with_profile(node, budget, profile)
+    fingerprints = _Fingerprints()
+    extractions: Iterable[float | None]
+    if instrumentation.is_enabled():
+        extractions = _extract_instrumented(_subnodes(node, budget), fingerprints)
+    else:
+        extractions = set()
+        for subnode in _subnodes(node, budget):
+            extractions.update(
+                (
+                    _extract_rating_stars_attrib(subnode),
+                    _extract_rating_stars_img(subnode),
+                    _extract_rating_stars_class(subnode),
+                    _extract_rating_stars_nodes(subnode, fingerprints),
+                    _extract_rating_stars_style_width(subnode),
+                )
+            )
+    return _select_value(extractions)
+
+
+def _select_value(extractions: Iterable[float | None]) -> float | None:
+    """Return the rating value from the values found by all strategies."""
+    values = {
         value
         for value in extractions
         if value is not None and 1 <= value <= BEST_RATING
     }
 
-    if len(extractions) == 1:
-        (value,) = extractions
+    if len(values) == 1:
+        (value,) = values
         assert isinstance(value, float)
         return value
 
-    if len(extractions) == 2:
-        li_extractions: list[float] = sorted(extractions)
+    if len(values) == 2:
+        li_extractions: list[float] = sorted(values)
         if li_extractions[1] == BEST_RATING:
-            value, _ = extractions
+            value, _ = values
             assert isinstance(value, float)
             return value
 
     return None
 
 
+def _subnodes(node: HtmlElement, budget: Budget | None) -> Iterator[HtmlElement]:
+    if budget is None:
+        yield from node.iter()
+        return
+    for subnode in node.iter():
+        if not budget.visit():
+            return
+        yield subnode
+
+
+def _extract_with_profile(
+    node: HtmlElement, budget: Budget | None, profile: SiteProfile
+) -> float | None:
+    fingerprints = _Fingerprints()
+    name = profile.strategy("extract_rating_stars")
+    if name is not None:
+        strategy = _STRATEGIES[name]
+        for subnode in _subnodes(node, budget):
+            value = strategy(subnode, fingerprints)
+            if value is None or not 1 <= value <= BEST_RATING:
+                continue
+            # Without a profile, BEST_RATING only wins if no other value is
+            # found, as it is often the scale rather than the rating, so it
+            # is decided by all strategies.
+            if value == BEST_RATING or not _confirmed(
+                value, subnode, name, fingerprints
+            ):
+                break
+            profile.record("extract_rating_stars", name, hit=True)
+            return value
+    if instrumentation.is_enabled():
+        strategies = _extract_instrumented(_subnodes(node, budget), fingerprints)
+    else:
+        strategies = {}
+        for subnode in _subnodes(node, budget):
+            for name, strategy in _STRATEGIES.items():
+                strategies.setdefault(strategy(subnode, fingerprints), name)
+    value = _select_value(strategies)
+    profile.record(
+        "extract_rating_stars",
+        None if value is None else strategies[value],
+        hit=False,
+    )
+    return value
+
+
+def _confirmed(
+    value: float, node: HtmlElement, name: str, fingerprints: _Fingerprints
+) -> bool:
+    """Return whether another strategy finds *value* in *node*, and none
+    finds a different value that would change the result of
+    :func:`_select_value`.
+    """
+    others = {
+        strategy(node, fingerprints)
+        for other, strategy in _STRATEGIES.items()
+        if other != name
+    }
+    return value in others and _select_value(others) == value
+
+
+def _extract_instrumented(
+    subnodes: Iterable[HtmlElement], fingerprints: _Fingerprints
+) -> dict[float | None, str]:
+    """Run all strategies, recording the time spent in each of them.
+
+    :return: The values found, with the name of the first strategy that
+        found each of them.
+    """
+    durations = dict.fromkeys(_STRATEGIES, 0)
+    extractions: dict[float | None, str] = {}
+    n_subnodes = 0
+    for subnode in subnodes:
+        n_subnodes += 1
+        for name, strategy in _STRATEGIES.items():
+            start = perf_counter_ns()
+            extractions.setdefault(strategy(subnode, fingerprints), name)
+            durations[name] += perf_counter_ns() - start
+    for name, duration in durations.items():
+        instrumentation.record(f"extract_rating_stars.{name}", duration, n_subnodes)
+    return extractions
+
+
 def _extract_rating_stars_attrib(node: HtmlElement) -> float | None:
     """Extract from title like "4 of out 5 stars"."""
-    texts: list[str] = list(
-        filter(
-            None,
-            (
-                re.sub(r"\s+", " ", node.attrib.get(attrib, "")).lower().strip()
-                for attrib in ["title", "alt", "aria-label"]
-            ),
-        )
-    )
     assert BEST_RATING == 5
-    for pattern in OF_STAR_PATTERNS:
-        for text in texts:
-            match = re.search(pattern, text)
-            if match:
-                return float(match.groups()[0])
-    return None
+    best_priority = len(OF_STAR_PATTERNS) + 1
+    best_value = None
+    for attrib in ["title", "alt", "aria-label"]:
+        value = node.attrib.get(attrib)
+        if not value:
+            continue
+        text = _WHITESPACE_REGEX.sub(" ", value).lower().strip()
+        match = _OF_STAR_REGEX.search(text) if text else None
+        if match and cast("int", match.lastindex) < best_priority:
+            best_priority = cast("int", match.lastindex)
+            best_value = match[best_priority]
+            if best_priority == 1:
+                break
+    return None if best_value is None else float(best_value)
 
 
 def _extract_rating_stars_img(node: HtmlElement) -> float | None:
@@ -98,7 +237,7 @@ def _extract_rating_stars_img(node: HtmlElement) -> float | None:
 def _single_like_a_number(text: str) -> float | None:
     """Things similar to numbers in file names and URLs."""
     # 5.0, 5-0, 5_0, 50 are all fine
-    numbers = re.findall(r"\d+[.\-_,]?\d*", text)
+    numbers = star_numbers(text)
     if len(numbers) == 1:
         value = float(numbers[0].replace("-", ".").replace("_", ".").replace(",", "."))
         assert BEST_RATING == 5  # for below heuristics
@@ -112,21 +251,38 @@ def _single_like_a_number(text: str) -> float | None:
 
 N_CHILD_STARS = BEST_RATING
 
+# Attributes ignored when comparing star elements, e.g. the AngularJS
+# expression that sets the class of each star, which differs for every star.
+IGNORED_STAR_ATTRIBUTES = frozenset({"ng-class"})
+_CHILDREN_HAVE_IGNORED_STAR_ATTRIBUTES = ThreadLocalXPath(
+    "boolean(*/descendant-or-self::*[{}])".format(
+        " or ".join(f"@{name}" for name in sorted(IGNORED_STAR_ATTRIBUTES))
+    )
+)
+
 
 def _extract_rating_stars_nodes_quick_check(node: HtmlElement) -> bool:
     """Quick check whether an element might contain stars encoded as html."""
-    children = list(node)
-    if len(children) != N_CHILD_STARS:
+    # len() does not create Python objects for the children, unlike iterating
+    # over them, which matters for elements with many children.
+    if len(node) != N_CHILD_STARS:
         return False
-    return len({ch.tag for ch in children}) == 1
+    return len({ch.tag for ch in node}) == 1
 
 
-def _extract_rating_stars_nodes(node: HtmlElement) -> float | None:
+def _extract_rating_stars_nodes(
+    node: HtmlElement, fingerprints: _Fingerprints | None = None
+) -> float | None:
     """Look for N_CHILD_STARS children, first N of one kind and rest of another kind."""
     if not _extract_rating_stars_nodes_quick_check(node):
         return None
-    children = list(node)
-    child_ids = [tostring(ch, encoding="unicode").strip() for ch in children]
+    if fingerprints is None:
+        fingerprints = _Fingerprints()
+    # the same kind of fingerprint must be used for all children
+    masked = _CHILDREN_HAVE_IGNORED_STAR_ATTRIBUTES(node)
+    child_ids = [
+        (fingerprints.get(ch, masked), (ch.tail or "").rstrip()) for ch in node
+    ]
     if len(set(child_ids)) == 1:
         return float(N_CHILD_STARS)
     # this is quadratic but it's fine with low number of stars
@@ -137,6 +293,61 @@ def _extract_rating_stars_nodes(node: HtmlElement) -> float | None:
     return None
 
 
+class _Fingerprints:
+    """Integer ids of the markup of nodes, computed once per node.
+
+    Nodes with the same markup get the same id. The tail of the node is not
+    part of its markup. If ``masked`` is true, IGNORED_STAR_ATTRIBUTES are not
+    part of it either; ids of masked and unmasked markup are not comparable.
+    """
+
+    def __init__(self) -> None:
+        self._node_ids: dict[tuple[HtmlElement, bool], int] = {}
+        self._markup_ids: dict[Hashable, int] = {}
+
+    def get(self, node: HtmlElement, masked: bool) -> int:
+        key = (node, masked)
+        try:
+            return self._node_ids[key]
+        except KeyError:
+            pass
+        markup: Hashable
+        if masked:
+            descendants = node.iter()
+            next(descendants)
+            # The pre-order list of elements with their number of children
+            # determines the tree structure.
+            markup = (
+                node.tag,
+                _star_attributes(node),
+                node.text or "",
+                len(node),
+                tuple(
+                    (
+                        el.tag,
+                        _star_attributes(el),
+                        el.text or "",
+                        len(el),
+                        el.tail or "",
+                    )
+                    for el in descendants
+                ),
+            )
+        else:
+            # serialization is implemented in C, it is faster than walking
+            # the tree in Python
+            markup = tostring(node, encoding="unicode", with_tail=False)
+        node_id = self._markup_ids.setdefault(markup, len(self._markup_ids))
+        self._node_ids[key] = node_id
+        return node_id
+
+
+def _star_attributes(node: HtmlElement) -> tuple[tuple[str, str], ...]:
+    return tuple(
+        item for item in node.attrib.items() if item[0] not in IGNORED_STAR_ATTRIBUTES
+    )
+
+
 def _extract_rating_stars_class(node: HtmlElement) -> float | None:
     """Extract rating from html class."""
     matches = set()
@@ -159,3 +370,13 @@ def _extract_rating_stars_style_width(node: HtmlElement) -> float | None:
         if f"width:{width}%" in style:
             return float(rating)
     return None
+
+
+# Strategies by name, in the order in which they are run.
+_STRATEGIES: dict[str, Callable[[HtmlElement, _Fingerprints], float | None]] = {
+    "attrib": lambda node, _: _extract_rating_stars_attrib(node),
+    "img": lambda node, _: _extract_rating_stars_img(node),
+    "class": lambda node, _: _extract_rating_stars_class(node),
+    "nodes": _extract_rating_stars_nodes,
+    "style_width": lambda node, _: _extract_rating_stars_style_width(node),
+}
@@ -0,0 +1,258 @@
+import json
+import threading
+from collections.abc import Iterator
+from typing import TYPE_CHECKING, Any
+from weakref import WeakKeyDictionary
+
+import attr
+from lxml.html import HtmlElement
+
+from .aggregate_rating import AggregateRating, _normalize_rating
+from .api import input_to_element
+from .breadcrumbs import Breadcrumb
+from .gtin import Gtin, extract_gtin
+from .instrumentation import instrumented
+from .utils import ThreadLocalXPath, strip_urljoin
+
+if TYPE_CHECKING:
+    from .api import SelectorOrElement
+else:
+    from .api import _RuntimeSelectorOrElement as SelectorOrElement
+
+
+@attr.s(frozen=True, auto_attribs=True, slots=True)
+class StructuredData:
+    breadcrumbs: tuple[Breadcrumb, ...] | None = None
+    aggregateRating: AggregateRating | None = None
+    gtin: Gtin | None = None
+
+    def __reduce__(self) -> "tuple[type[StructuredData], tuple[Any, ...]]":
+        return type(self), (self.breadcrumbs, self.aggregateRating, self.gtin)
+
+
+_GTIN_KEYS = ("gtin13", "gtin14", "gtin12", "gtin8", "gtin", "isbn")
+
+_JSON_LD_SCRIPTS = ThreadLocalXPath(
+    "//script[translate(@type, 'JSONLD', 'jsonld') = 'application/ld+json']"
+)
+_MICRODATA_BREADCRUMB_LISTS = ThreadLocalXPath(
+    "//*[@itemscope][contains(@itemtype, 'BreadcrumbList')]"
+)
+_MICRODATA_BREADCRUMB_ITEMS = ThreadLocalXPath(".//*[@itemprop='itemListElement']")
+_MICRODATA_RATINGS = ThreadLocalXPath(
+    "//*[@itemscope][contains(@itemtype, 'AggregateRating')]"
+    " | //*[@itemscope][@itemprop='aggregateRating']"
+)
+_MICRODATA_GTINS = ThreadLocalXPath(
+    "//*[{}]".format(" or ".join(f"@itemprop='{key}'" for key in _GTIN_KEYS))
+)
+
+_CACHE: "WeakKeyDictionary[HtmlElement, StructuredData]" = WeakKeyDictionary()
+_CACHE_LOCK = threading.Lock()
+
+
+def _has_type(obj: dict[str, Any], name: str) -> bool:
+    types = obj.get("@type")
+    if isinstance(types, str):
+        types = [types]
+    return isinstance(types, list) and any(
+        isinstance(t, str) and t.rsplit("/", 1)[-1] == name for t in types
+    )
+
+
+def _iter_objects(value: Any) -> Iterator[dict[str, Any]]:
+    """Iterate over all JSON objects in a JSON value, in document order."""
+    stack = [value]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, dict):
+            yield value
+            stack.extend(reversed(value.values()))
+        elif isinstance(value, list):
+            stack.extend(reversed(value))
+
+
+def _as_list(value: Any) -> list[Any]:
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def _text(value: Any) -> str | None:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    if isinstance(value, str) and value.strip():
+        return value.strip()
+    return None
+
+
+def _position(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("inf")
+
+
+def _rating(rating_value: Any, best_rating: Any) -> AggregateRating | None:
+    value = _normalize_rating(_text(rating_value))
+    if value is None:
+        return None
+    return AggregateRating(
+        ratingValue=value, bestRating=_normalize_rating(_text(best_rating))
+    )
+
+
+def _gtin(value: Any) -> Gtin | None:
+    text = _text(value)
+    return extract_gtin(text) if text else None
+
+
+def _json_ld_breadcrumbs(obj: dict[str, Any]) -> tuple[Breadcrumb, ...] | None:
+    items = []
+    for item in _as_list(obj.get("itemListElement")):
+        if not isinstance(item, dict):
+            continue
+        target = item.get("item")
+        if isinstance(target, dict):
+            name = _text(item.get("name")) or _text(target.get("name"))
+            url = _text(target.get("@id")) or _text(target.get("url"))
+        else:
+            name, url = _text(item.get("name")), _text(target)
+        if name or url:
+            items.append((_position(item.get("position")), Breadcrumb(name, url)))
+    items.sort(key=lambda item: item[0])
+    return tuple(breadcrumb for _, breadcrumb in items) or None
+
+
+def _parse_json_ld(root: HtmlElement) -> dict[str, Any]:
+    fields: dict[str, Any] = {}
+    for script in _JSON_LD_SCRIPTS(root):
+        try:
+            data = json.loads(script.text or "")
+        except ValueError:
+            continue
+        for obj in _iter_objects(data):
+            if "breadcrumbs" not in fields and _has_type(obj, "BreadcrumbList"):
+                fields["breadcrumbs"] = _json_ld_breadcrumbs(obj)
+            if "aggregateRating" not in fields and _has_type(obj, "AggregateRating"):
+                fields["aggregateRating"] = _rating(
+                    obj.get("ratingValue"), obj.get("bestRating")
+                )
+            if "gtin" not in fields:
+                for key in _GTIN_KEYS:
+                    if key in obj:
+                        fields["gtin"] = _gtin(obj[key])
+                        break
+    return {name: value for name, value in fields.items() if value is not None}
+
+
+def _microdata_value(node: HtmlElement) -> str | None:
+    """Return the value of a microdata property."""
+    for attribute in ("content", "href", "src", "datetime"):
+        value = node.get(attribute)
+        if value is not None:
+            return value.strip() or None
+    return _text(node.text_content())
+
+
+def _microdata_property(scope: HtmlElement, name: str) -> str | None:
+    for node in scope.iterdescendants():
+        if node.get("itemprop") == name:
+            return _microdata_value(node)
+    return None
+
+
+def _microdata_breadcrumbs(scope: HtmlElement) -> tuple[Breadcrumb, ...] | None:
+    items = []
+    for item in _MICRODATA_BREADCRUMB_ITEMS(scope):
+        name = _microdata_property(item, "name")
+        url = _microdata_property(item, "item") or item.get("itemid")
+        if name or url:
+            position = _position(_microdata_property(item, "position"))
+            items.append((position, Breadcrumb(name, url)))
+    items.sort(key=lambda item: item[0])
+    return tuple(breadcrumb for _, breadcrumb in items) or None
+
+
+def _parse_microdata(root: HtmlElement) -> dict[str, Any]:
+    fields: dict[str, Any] = {}
+    for scope in _MICRODATA_BREADCRUMB_LISTS(root):
+        if breadcrumbs := _microdata_breadcrumbs(scope):
+            fields["breadcrumbs"] = breadcrumbs
+            break
+    for scope in _MICRODATA_RATINGS(root):
+        rating = _rating(
+            _microdata_property(scope, "ratingValue"),
+            _microdata_property(scope, "bestRating"),
+        )
+        if rating is not None:
+            fields["aggregateRating"] = rating
+            break
+    for node in _MICRODATA_GTINS(root):
+        if gtin := _gtin(_microdata_value(node)):
+            fields["gtin"] = gtin
+            break
+    return fields
+
+
+def _parse(root: HtmlElement) -> StructuredData:
+    # JSON-LD is preferred, as it is usually more complete than microdata.
+    return StructuredData(**{**_parse_microdata(root), **_parse_json_ld(root)})
+
+
+@instrumented("extract_structured_data")
+def extract_structured_data(
+    tree: "SelectorOrElement", base_url: str | None = None
+) -> StructuredData:
+    """Extract breadcrumbs, rating and GTIN from the JSON-LD and microdata
+    of a page.
+
+    When these are present, they are more reliable than the results of the
+    other extractors, and much faster to get. :func:`~.extract_page` uses
+    them when available.
+
+    Results are cached per page, so calling this several times for the
+    same page, e.g. with different elements of it, only parses the
+    structured data once, as long as the root element of the page is kept.
+
+    >>> from lxml.html import fromstring
+    >>> data = extract_structured_data(
+    ...     fromstring(
+    ...         '<html><body><script type="application/ld+json">'
+    ...         '{"@type": "Product", "gtin13": "7350053850019",'
+    ...         ' "aggregateRating": {"@type": "AggregateRating",'
+    ...         ' "ratingValue": "4.5", "bestRating": 5}}'
+    ...         "</script></body></html>"
+    ...     )
+    ... )
+    >>> data.aggregateRating
+    AggregateRating(bestRating=5.0, ratingValue=4.5)
+    >>> data.gtin
+    Gtin(type='gtin13', value='7350053850019')
+
+    :param tree: The root of the page, or any other element of it.
+    :param base_url: Base URL of the page, to resolve breadcrumb URLs.
+    :return: The fields that were found. Missing fields are ``None``.
+    """
+    node = input_to_element(tree)
+    if not isinstance(node, HtmlElement):
+        return StructuredData()
+    root = node.getroottree().getroot()
+    with _CACHE_LOCK:
+        data = _CACHE.get(root)
+    if data is None:
+        data = _parse(root)
+        with _CACHE_LOCK:
+            _CACHE[root] = data
+    if data.breadcrumbs and base_url:
+        data = attr.evolve(
+            data,
+            breadcrumbs=tuple(
+                Breadcrumb(
+                    breadcrumb.name,
+                    strip_urljoin(base_url, breadcrumb.url) if breadcrumb.url else None,
+                )
+                for breadcrumb in data.breadcrumbs
+            ),
+        )
+    return data
@@ -1,27 +1,38 @@
 from __future__ import annotations
 
 import itertools
-from typing import TYPE_CHECKING, TypeVar
+import re
+import threading
+from collections import OrderedDict
+from collections.abc import Iterator  # noqa: TC003  # for get_type_hints()
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any, TypeVar
 from urllib.parse import urljoin
 
-import html_text
+from lxml.etree import XPath, iterwalk
 from lxml.html import (  # noqa: F401
     HtmlComment,
     HtmlElement,
     fragment_fromstring,
     fromstring,
 )
-from parsel import Selector  # noqa: F401
-from w3lib.html import strip_html5_whitespace
 
-from zyte_parsers.api import SelectorOrElement, input_to_element
+from zyte_parsers.api import input_to_element
 
 if TYPE_CHECKING:
     from collections.abc import Callable, Iterable
 
+    from lxml.etree import _Element
+
+    from zyte_parsers.api import SelectorOrElement
+    from zyte_parsers.budget import Budget
+
 
 _T = TypeVar("_T")
 
+_TEXT_CACHE: ContextVar[_TextCache | None] = ContextVar("_TEXT_CACHE", default=None)
+
 
 def is_js_url(url: str) -> bool:
     """Check if the URL is intended for handling by JS.
@@ -55,6 +66,8 @@ def strip_urljoin(base_url: str | None, url: str | None) -> str:
     ''
     """
     if url is not None:
+        from w3lib.html import strip_html5_whitespace  # noqa: PLC0415
+
         url = strip_html5_whitespace(url)
     # XXX: mypy doesn't like when one passes None to urljoin
     return urljoin(base_url or "", url or "")
@@ -71,6 +84,7 @@ def extract_link(a_node: SelectorOrElement, base_url: str | None) -> str | None:
     >>> extract_link(fromstring("<a href='' data-url='http://example.com'></a>"), "")
     'http://example.com'
     >>> extract_link(fromstring("<a href='javascript:void(0)'></a>"), "")
+    >>> from parsel import Selector
     >>> extract_link(Selector(text="<a href='http://example.com'></a>").css("a")[0], "")
     'http://example.com'
     """
@@ -89,28 +103,304 @@ def extract_link(a_node: SelectorOrElement, base_url: str | None) -> str | None:
 
 
 def extract_text(
-    node: SelectorOrElement | None, guess_layout: bool = False
+    node: SelectorOrElement | None,
+    guess_layout: bool = False,
+    *,
+    budget: Budget | None = None,
 ) -> str | None:
-    """Extract text from HTML using ``html_text``.
+    """Extract text from HTML the way ``html_text`` does.
+
+    The text of elements that only contain inline elements, like most of
+    the elements extractors read, is extracted without ``html_text``, which
+    copies and cleans the element first.
 
     >>> extract_text(fromstring("<p>foo  bar </p>"))
     'foo bar'
+    >>> from parsel import Selector
     >>> extract_text(Selector(text="<p>foo  bar </p>"))
     'foo bar'
     >>> extract_text(fragment_fromstring("<!-- a comment -->"))
     >>> extract_text(Selector(text="<!-- a comment -->"))
+
+    If a :class:`~zyte_parsers.Budget` is given, the elements of ``node``
+    and the extracted text are counted against it, and ``None`` is returned
+    if they do not fit.
     """
     if node is None:
         return None
     node = input_to_element(node)
     if isinstance(node, HtmlComment):
         return None
-    value = html_text.extract_text(node, guess_layout=guess_layout)
+    if budget is not None:
+        return _extract_text_within_budget(node, guess_layout, budget)
+    return _extract_text_cached(node, guess_layout)
+
+
+def _active_text_cache() -> _TextCache | None:
+    cache = _TEXT_CACHE.get()
+    # Threads can inherit the context of the thread that starts them, e.g.
+    # by default on free-threaded builds, but caches are not thread-safe.
+    if cache is None or cache.thread != threading.get_ident():
+        return None
+    return cache
+
+
+def _extract_text_cached(node: HtmlElement, guess_layout: bool) -> str | None:
+    cache = _active_text_cache()
+    if cache is None:
+        return _extract_text(node, guess_layout)
+    key = (node, guess_layout)
+    try:
+        return cache.get(key)
+    except KeyError:
+        value = _extract_text(node, guess_layout)
+        cache.set(key, value)
+        return value
+
+
+def _extract_text_within_budget(
+    node: HtmlElement, guess_layout: bool, budget: Budget
+) -> str | None:
+    # Text is counted against the budget even if it is cached, so that
+    # results do not depend on what was extracted before.
+    if not budget.visit_subtree(node):
+        return None
+    if not _text_may_fit(node, budget):
+        budget.exhausted = True
+        return None
+    value = _extract_text_cached(node, guess_layout)
+    if value and not budget.read_text(value):
+        return None
+    return value
+
+
+# Tags that html_text removes, with their text. Skipping more tags than it
+# does only makes the bound of _text_may_fit() lower.
+_REMOVED_TAGS = frozenset(
+    {
+        "applet",
+        "embed",
+        "frame",
+        "frameset",
+        "iframe",
+        "layer",
+        "link",
+        "meta",
+        "object",
+        "param",
+        "script",
+        "style",
+    }
+)
+
+
+def _text_may_fit(node: HtmlElement, budget: Budget) -> bool:
+    """Return ``False`` if the text of *node* cannot fit in the text length
+    left in *budget*, without extracting it.
+
+    Whitespace is collapsed and separators are only ever added, so the
+    non-whitespace characters of the text chunks are a lower bound of the
+    length of the extracted text. Only as much text as fits in the budget
+    is read, so this is cheap for huge subtrees.
+    """
+    if budget.max_text_length is None or node.tag in _REMOVED_TAGS:
+        return True
+    remaining = budget.max_text_length - budget.text_length
+    length = 0
+    walker = iterwalk(node, events=("start", "end"))
+    for event, el in walker:
+        if not isinstance(el.tag, str) or el.tag in _REMOVED_TAGS:
+            if event == "start":
+                walker.skip_subtree()
+            continue
+        text = el.text if event == "start" else el.tail if el is not node else None
+        if text:
+            length += len("".join(text.split()))
+            if length > remaining:
+                return False
+    return True
+
+
+def _extract_text(node: HtmlElement, guess_layout: bool) -> str | None:
+    if _is_simple(node, guess_layout):
+        value = _extract_simple_text(node)
+    else:
+        import html_text  # noqa: PLC0415
+
+        value = html_text.extract_text(node, guess_layout=guess_layout)
     if value:
         return value
     return None
 
 
+# Tags that html_text neither removes nor starts a new line for, so that the
+# text of subtrees made only of them can be extracted without html_text.
+_INLINE_TAGS = frozenset(
+    {
+        "a",
+        "abbr",
+        "b",
+        "bdi",
+        "bdo",
+        "big",
+        "cite",
+        "code",
+        "data",
+        "del",
+        "dfn",
+        "em",
+        "font",
+        "i",
+        "img",
+        "ins",
+        "kbd",
+        "label",
+        "mark",
+        "q",
+        "s",
+        "samp",
+        "small",
+        "span",
+        "strike",
+        "strong",
+        "sub",
+        "sup",
+        "time",
+        "tt",
+        "u",
+        "var",
+        "wbr",
+    }
+)
+# Line breaks only matter when guessing the layout.
+_INLINE_TAGS_AND_BR = _INLINE_TAGS | {"br"}
+# Tags of the root of such subtrees. Its own line breaks are stripped.
+_SIMPLE_ROOT_TAGS = _INLINE_TAGS_AND_BR | {
+    "article",
+    "aside",
+    "blockquote",
+    "caption",
+    "dd",
+    "div",
+    "dl",
+    "dt",
+    "figcaption",
+    "footer",
+    "h1",
+    "h2",
+    "h3",
+    "h4",
+    "h5",
+    "h6",
+    "header",
+    "li",
+    "main",
+    "nav",
+    "ol",
+    "p",
+    "section",
+    "td",
+    "th",
+    "ul",
+}
+
+_whitespace = re.compile(r"\s+")
+_has_trailing_whitespace = re.compile(r"\s$").search
+_has_punct_after = re.compile(r'^[,:;.!?")]').search
+_has_open_bracket_before = re.compile(r"\($").search
+
+
+def _is_simple(node: HtmlElement, guess_layout: bool) -> bool:
+    """Return whether the text of *node* can be extracted with
+    :func:`_extract_simple_text`.
+
+    Comments and processing instructions, which html_text removes, have a
+    non-string tag and are never in the allowed tags.
+    """
+    if node.tag not in _SIMPLE_ROOT_TAGS:
+        return False
+    allowed = _INLINE_TAGS if guess_layout else _INLINE_TAGS_AND_BR
+    return all(child.tag in allowed for child in node.iterdescendants())
+
+
+def _extract_simple_text(node: HtmlElement) -> str:
+    """Extract the text of a subtree accepted by :func:`_is_simple`.
+
+    This gives the same result as ``html_text.extract_text``, which joins
+    text chunks in the same way, but it does not need to copy and clean the
+    subtree first.
+    """
+    chunks = []
+    prev = None
+    for text_content in node.itertext():
+        text = _whitespace.sub(" ", text_content.strip())
+        if not text:
+            continue
+        if prev is not None and (
+            _has_trailing_whitespace(prev)
+            or (not _has_punct_after(text) and not _has_open_bracket_before(prev))
+        ):
+            chunks.append(" ")
+        chunks.append(text)
+        prev = text_content
+    return "".join(chunks)
+
+
+class _TextCache:
+    """A size-bounded LRU mapping of elements to their extracted text, only
+    used by the thread that created it."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.thread = threading.get_ident()
+        self._data: OrderedDict[tuple[HtmlElement, bool], str | None] = OrderedDict()
+
+    def get(self, key: tuple[HtmlElement, bool]) -> str | None:
+        value = self._data[key]
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: tuple[HtmlElement, bool], value: str | None) -> None:
+        self._data[key] = value
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+
+@contextmanager
+def text_cache(maxsize: int = 1024) -> Iterator[None]:
+    """Cache the results of text extraction within a ``with`` block.
+
+    Several extractors extract the text of the same elements, e.g. when
+    running all of them on the same part of a page. Inside this context
+    manager the text of each element is only extracted once, and later
+    extractions of the same element reuse it. Cached entries are discarded
+    when leaving the block, so it should wrap the processing of a single
+    document, which must not be modified inside the block.
+
+    If a cache is already active, it is reused and ``maxsize`` is ignored.
+    Caches are per thread, also in threads that inherit the context of the
+    thread that started them.
+
+    >>> root = fromstring("<p>foo <b>bar</b></p>")
+    >>> with text_cache():
+    ...     extract_text(root)
+    ...     extract_text(root)
+    'foo bar'
+    'foo bar'
+
+    :param maxsize: Maximum number of elements for which the text is kept;
+        the least recently used entries are discarded first.
+    """
+    if _active_text_cache() is not None:
+        yield
+        return
+    token = _TEXT_CACHE.set(_TextCache(maxsize))
+    try:
+        yield
+    finally:
+        _TEXT_CACHE.reset(token)
+
+
 def first_satisfying(
     xs: Iterable[_T],
     condition_fun: Callable[[_T], bool] = bool,
@@ -143,3 +433,27 @@ def iterwalk_limited(node: HtmlElement, search_depth: int) -> Iterable[HtmlEleme
 
 def take(iterable: Iterable[_T], n: int) -> list[_T]:
     return list(itertools.islice(iterable, n))
+
+
+class ThreadLocalXPath:
+    """An XPath expression, compiled separately for each thread.
+
+    lxml only runs one evaluation of an :class:`~lxml.etree.XPath` object at
+    a time, so a module-level one would make threads that use it wait for
+    each other.
+
+    >>> count = ThreadLocalXPath("count(//p)")
+    >>> count(fromstring("<div><p>a</p><p>b</p></div>"))
+    2.0
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._local = threading.local()
+
+    def __call__(self, node: _Element, /, **variables: Any) -> Any:
+        try:
+            xpath = self._local.xpath
+        except AttributeError:
+            xpath = self._local.xpath = XPath(self.path)
+        return xpath(node, **variables)